@@ -13,13 +13,29 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 
-from .const import _LOGGER, CONF_MODEL, CONF_SERIAL, CONF_SLAVE, DOMAIN
+from .const import (
+    _LOGGER,
+    CONF_COMPACT_CELLS,
+    CONF_DECODE_OFFLOAD,
+    CONF_MODEL,
+    CONF_PRUNE,
+    CONF_SERIAL,
+    CONF_SITE_INTERVAL,
+    CONF_SLAVE,
+    CONF_SLAVES,
+    DOMAIN,
+    SITE_MODEL,
+)
 from .device_protocol.device_config import DEVICE_CLASS_MAP, PROTOCOL_MAP
 from .mqtt_helper.mqtt_global import get_mqtt_manager
+from .protocol_helper.offload import DecodeOffload
+from .services import async_setup_services
+from .site_helper.aggregator import DEFAULT_INTERVAL, SiteAggregator
 from .ssdp import SSDPBroadcaster
 
 # List the platforms that you want to support.
 _PLATFORMS: list[Platform] = [
+    Platform.BINARY_SENSOR,
     Platform.BUTTON,
     Platform.SENSOR,
     Platform.LIGHT,
@@ -41,6 +57,7 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
         broadcaster = SSDPBroadcaster(hass, interval=5.0)
         hass.data[DOMAIN]["broadcaster"] = broadcaster
         await broadcaster.start()
+    async_setup_services(hass)
     return True
 
 
@@ -56,9 +73,16 @@ async def async_setup_entry(
     serial = entry.data[CONF_SERIAL]
     model = entry.data[CONF_MODEL]
 
+    if model == SITE_MODEL:
+        return await _async_setup_site(hass, entry)
+
     if serial not in hass.data[DOMAIN]:
         hass.data[DOMAIN][serial] = {"devices": []}
 
+    broadcaster = hass.data[DOMAIN].get("broadcaster")
+    if broadcaster:
+        broadcaster.async_expect(serial)
+
     protocol = PROTOCOL_MAP.get(model)
     if protocol is None:
         _LOGGER.error("Protocol not found for model %s", model)
@@ -71,28 +95,108 @@ async def async_setup_entry(
 
     protocol_file_path = Path(__file__).parent / "device_protocol" / f"{protocol}.json"
     if model == "JK BMS":
-        slave_id = entry.data.get(CONF_SLAVE, 15)
-        device = device_class(hass, protocol_file_path, serial, model, id=slave_id)
+        # One device per pack of the bank, the first one handles the topics
+        slave_ids = get_slave_ids(entry)
+        compact = entry.options.get(CONF_COMPACT_CELLS, False)
+        primary = device_class(
+            hass, protocol_file_path, serial, model, id=slave_ids[0], compact=compact
+        )
+        devices = [primary] + [
+            device_class(
+                hass,
+                protocol_file_path,
+                serial,
+                model,
+                id=slave_id,
+                primary=primary,
+                compact=compact,
+            )
+            for slave_id in slave_ids[1:]
+        ]
     else:
-        device = device_class(hass, protocol_file_path, serial, model)
+        devices = [device_class(hass, protocol_file_path, serial, model)]
+
+    offload = None
+    if entry.options.get(CONF_DECODE_OFFLOAD):
+        offload = hass.data[DOMAIN].get("decode_offload")
+        if offload is None:
+            offload = DecodeOffload()
+            await hass.async_add_executor_job(offload.start)
+            hass.data[DOMAIN]["decode_offload"] = offload
+            _LOGGER.info("Started decode offload with %s", offload.as_dict())
+        offload.users.add(serial)
+
+    platforms = set()
+    for device in devices:
+        await device.load_protocol()
+        if offload is not None:
+            device.parser.set_offload(offload)
+        await device.async_load_pruning(entry.options.get(CONF_PRUNE, True))
+
+        solar_platforms = await device.unpack_device_info()
+
+        hass.data[DOMAIN][serial]["devices"].append(device)
+
+        for platform, items in solar_platforms.items():
+            for item in items:
+                if item.get("name") in device.pruned and not item.get("diagnostic"):
+                    continue
+                item["parser"] = device.parser
+                item["device"] = device
+                if platform not in hass.data[DOMAIN][serial]:
+                    hass.data[DOMAIN][serial][platform] = []
+                hass.data[DOMAIN][serial][platform].append(item)
+            platforms.add(platform)
+
+    await hass.config_entries.async_forward_entry_setups(entry, platforms)
+
+    site = hass.data[DOMAIN].get("site")
+    for device in devices:
+        await device.async_init()
+        if site is not None:
+            site.attach(device)
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+    return True
 
-    await device.load_protocol()
 
-    solar_platforms = await device.unpack_device_info()
+async def _async_setup_site(
+    hass: HomeAssistant, entry: SolarManagerConfigEntry
+) -> bool:
+    """Set up the site device with the totals of all other devices."""
+    if "site" in hass.data[DOMAIN]:
+        _LOGGER.error("Only one site can be configured")
+        return False
 
-    hass.data[DOMAIN][serial]["devices"].append(device)
+    site = SiteAggregator(
+        hass, entry.options.get(CONF_SITE_INTERVAL, DEFAULT_INTERVAL)
+    )
+    hass.data[DOMAIN]["site"] = site
+    hass.data[DOMAIN][entry.data[CONF_SERIAL]] = {
+        "devices": [],
+        Platform.SENSOR: [],
+    }
+    for data in list(hass.data[DOMAIN].values()):
+        if isinstance(data, dict):
+            for device in data.get("devices", []):
+                site.attach(device)
+
+    await hass.config_entries.async_forward_entry_setups(entry, [Platform.SENSOR])
+    site.start()
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+    return True
 
-    for platform, items in solar_platforms.items():
-        for item in items:
-            item["parser"] = device.parser
-            item["device"] = device
-            if platform not in hass.data[DOMAIN][serial]:
-                hass.data[DOMAIN][serial][platform] = []
-            hass.data[DOMAIN][serial][platform].append(item)
-        await hass.config_entries.async_forward_entry_setups(entry, [platform])
 
-    await device.async_init()
-    return True
+def get_slave_ids(entry: SolarManagerConfigEntry) -> list[int]:
+    """Return the slave ids of a JK BMS bank, the options take precedence."""
+    slave_ids = entry.options.get(CONF_SLAVES) or entry.data.get(CONF_SLAVES)
+    return slave_ids or [entry.data.get(CONF_SLAVE, 15)]
+
+
+async def _async_update_listener(
+    hass: HomeAssistant, entry: SolarManagerConfigEntry
+) -> None:
+    """Reload the entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
 
 
 async def async_unload_entry(
@@ -119,7 +223,25 @@ async def async_unload_entry(
             device.cleanup()
             _LOGGER.info("Cleaned up device for serial %s", serial)
 
+        # Write energy totals now, a pending delayed save may be lost on reload
+        energy_store = hass.data[DOMAIN].get("energy_store")
+        if energy_store:
+            await energy_store.async_flush()
+
         hass.data[DOMAIN].pop(serial)
+        if entry.data[CONF_MODEL] == SITE_MODEL:
+            hass.data[DOMAIN].pop("site").stop()
+
+        broadcaster = hass.data[DOMAIN].get("broadcaster")
+        if broadcaster:
+            broadcaster.async_forget(serial)
+
+        offload = hass.data[DOMAIN].get("decode_offload")
+        if offload is not None:
+            offload.users.discard(serial)
+            if not offload.users:
+                offload.shutdown()
+                hass.data[DOMAIN].pop("decode_offload")
 
         # Clean up broadcaster only if no config entries remain
         if not hass.config_entries.async_entries(DOMAIN):
@@ -0,0 +1,94 @@
+"""Binary sensor entity for Solar Manager integration.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+"""
+
+from typing import Any
+
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import _LOGGER, CONF_MODEL, CONF_SERIAL, DOMAIN
+
+
+class SolarManagerBitSensor(BinarySensorEntity):
+    """Representation of one bit of a Solar Manager alarm or status word."""
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        device: Any,
+        unique_id: str,
+        device_id: str,
+        device_class: str | None = None,
+        icon: str | None = None,
+    ) -> None:
+        """Initialize the binary sensor."""
+        self._device = device
+        self._name = name
+        self._model = model
+        self._attr_unique_id = unique_id
+        self._device_id = device_id
+        self._attr_translation_key = name
+        self._attr_has_entity_name = True
+        self._attr_icon = icon
+        try:
+            self._attr_device_class = (
+                BinarySensorDeviceClass(device_class) if device_class else None
+            )
+        except ValueError:
+            _LOGGER.warning("Invalid device class for %s: %s", name, device_class)
+        self._device.register_entity(name, self)
+
+    @property
+    def is_on(self) -> bool | None:
+        """Return true if the bit is set."""
+        return self._device.get_bit(self._name)
+
+    @property
+    def available(self) -> bool:
+        """Return if the alarm word has been reported."""
+        return self.is_on is not None
+
+    @property
+    def device_info(self):
+        """Return device information about this entity."""
+        return {
+            "identifiers": {(DOMAIN, self._device_id)},
+            "name": f"{self._model} {self._device_id}",
+            "manufacturer": "@maybetaken",
+            "model": self._model,
+            "sw_version": "1.0",
+        }
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
+) -> None:
+    """Set up Solar Manager binary sensors from a config entry."""
+    serial = entry.data[CONF_SERIAL]
+    model = entry.data[CONF_MODEL]
+    entities = []
+    for item in hass.data[DOMAIN][serial].get(Platform.BINARY_SENSOR, []):
+        device_id = item["device"].device_id
+        entities.append(
+            SolarManagerBitSensor(
+                name=item["name"],
+                model=model,
+                device=item["device"],
+                unique_id=f"{item['name']}_{model}_{device_id}",
+                device_id=device_id,
+                device_class=item.get("device_class"),
+                icon=item.get("icon"),
+            )
+        )
+    async_add_entities(entities)
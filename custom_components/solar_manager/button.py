@@ -87,7 +87,8 @@ async def async_setup_entry(
     buttons_data = hass.data[DOMAIN][serial].get(Platform.BUTTON, [])
 
     for device_data in buttons_data:
-        unique_id = f"{device_data['name']}_action_{model}_{serial}"
+        device_id = device_data["device"].device_id
+        unique_id = f"{device_data['name']}_action_{model}_{device_id}"
 
         if "register" in device_data:
             button = SolarManagerCommandButton(
@@ -95,7 +96,7 @@ async def async_setup_entry(
                 model=model,
                 device=device_data["device"],
                 unique_id=unique_id,
-                device_id=serial,
+                device_id=device_id,
                 icon=device_data.get("icon"),
                 register=device_data["register"],
                 payload=device_data.get("payload_press", 1),
@@ -106,7 +107,7 @@ async def async_setup_entry(
                 model=model,
                 device=device_data["device"],
                 unique_id=unique_id,
-                device_id=serial,
+                device_id=device_id,
                 icon=device_data.get("icon"),
             )
 
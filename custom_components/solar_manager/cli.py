@@ -0,0 +1,223 @@
+"""Command line decoder for Solar Manager devices.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+
+Runs the protocol codec without Home Assistant. Frames are read from an
+MQTT broker (requires paho-mqtt) or from a recorded log with one
+"<topic> <hex payload>" line per message, as written by
+``mosquitto_sub -v -F "%t %x"``. The values decoded by the codec, as the
+plugins receive them, are printed by register name as JSON lines.
+
+    python custom_components/solar_manager/cli.py --protocol jkbms --log frames.log
+    python custom_components/solar_manager/cli.py --protocol megarevo \\
+        --broker 192.168.1.10 --serial SN123
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections.abc import Iterable, Iterator
+import json
+import logging
+from pathlib import Path
+import sys
+import time
+from typing import Any, TextIO
+
+if __package__:
+    from .protocol_helper.codec import ProtocolCodec, load_protocol_file
+else:
+    # Run as a script: import the engine without the Home Assistant package
+    sys.path.insert(0, str(Path(__file__).parent))
+    from protocol_helper.codec import ProtocolCodec, load_protocol_file
+
+PROTOCOL_DIR = Path(__file__).parent / "device_protocol"
+
+
+class FrameDecoder:
+    """Decode notify frames of one protocol into register values by name."""
+
+    def __init__(self, protocol_data: dict[str, Any], changes_only: bool) -> None:
+        """Initialize the decoder."""
+        self._codec = ProtocolCodec(protocol_data)
+        self._names = {
+            register: details["name"]
+            for register, details in protocol_data.get("registers", {}).items()
+            if details.get("name")
+        }
+        self._last: dict[str, dict[str, Any]] = {}  # Values per topic
+        self._changes_only = changes_only
+        self.frames = 0
+
+    def decode(self, topic: str, payload: bytes) -> dict[str, Any] | None:
+        """Decode a notify message and return the record to print."""
+        if not topic.endswith("/notify"):
+            return None
+        frame = self._codec.validate_frame(payload)
+        if frame is None:
+            return {"topic": topic, "error": "bad crc"}
+        frame, trailer = self._codec.split_trailer(frame)
+        self.frames += 1
+
+        values = {
+            self._names[register]: value
+            for register, value in self._codec.parse(frame).items()
+            if register in self._names
+        }
+        if self._changes_only:
+            last = self._last.setdefault(topic, {})
+            changed = {
+                name: value
+                for name, value in values.items()
+                if name not in last or last[name] != value
+            }
+            last.update(values)
+            values = changed
+        if not values:
+            return None
+        record = {"time": round(time.time(), 3), "topic": topic, "values": values}
+        if trailer is not None:
+            record["sequence"], record["device_ms"] = trailer
+        return record
+
+
+def read_log(stream: TextIO) -> Iterator[tuple[str, bytes]]:
+    """Yield (topic, payload) from "<topic> <hex payload>" lines."""
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        topic, _, payload = line.partition(" ")
+        try:
+            yield topic, bytes.fromhex(payload)
+        except ValueError:
+            logging.warning("Skipping line with invalid hex payload: %s", line)
+
+
+def read_broker(args: argparse.Namespace) -> Iterator[tuple[str, bytes]]:
+    """Yield (topic, payload) of notify messages from an MQTT broker."""
+    try:
+        import paho.mqtt.client as mqtt  # noqa: PLC0415
+    except ImportError:
+        sys.exit("Reading from a broker requires paho-mqtt: pip install paho-mqtt")
+    from queue import Queue  # noqa: PLC0415
+
+    messages: Queue[tuple[str, bytes]] = Queue()
+    try:
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    except AttributeError:  # paho-mqtt < 2.0
+        client = mqtt.Client()
+    if args.username:
+        client.username_pw_set(args.username, args.password)
+    client.on_message = lambda _client, _userdata, msg: messages.put(
+        (msg.topic, msg.payload)
+    )
+    host, _, port = args.broker.partition(":")
+    client.connect(host, int(port or 1883))
+    for serial in args.serial or ["+"]:
+        client.subscribe(f"{serial}/#")
+    client.loop_start()
+    try:
+        while True:
+            yield messages.get()
+    finally:
+        client.loop_stop()
+        client.disconnect()
+
+
+def write_command(args: argparse.Namespace, codec: ProtocolCodec) -> None:
+    """Encode a register write and publish it to the device."""
+    try:
+        import paho.mqtt.publish as publish  # noqa: PLC0415
+    except ImportError:
+        sys.exit("Writing commands requires paho-mqtt: pip install paho-mqtt")
+    register, _, value = args.write.partition("=")
+    address = int(register, 0)
+    details = codec.protocol_data.get("registers", {}).get(address, {})
+    write_cmd = details.get("write_command", 6)
+    raw_value = int(round(float(value) / details.get("scale", 1)))
+    if write_cmd == 16:
+        raw_value = [raw_value]
+    data = codec.pack(args.slave, address, raw_value, write_cmd)
+    host, _, port = args.broker.partition(":")
+    auth = {"username": args.username, "password": args.password}
+    for serial in args.serial:
+        publish.single(
+            f"{serial}/control/cmd",
+            data,
+            hostname=host,
+            port=int(port or 1883),
+            auth=auth if args.username else None,
+        )
+        print(json.dumps({"topic": f"{serial}/control/cmd", "payload": data.hex()}))
+
+
+def run(
+    messages: Iterable[tuple[str, bytes]], decoder: FrameDecoder, output: TextIO
+) -> None:
+    """Decode messages and print one JSON line per decoded frame."""
+    for topic, payload in messages:
+        record = decoder.decode(topic, payload)
+        if record is not None:
+            output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            output.flush()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the command line decoder."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument(
+        "--protocol",
+        required=True,
+        help="protocol name in device_protocol (e.g. jkbms) or a protocol file",
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--log", help='recorded "<topic> <hex>" lines, - for stdin')
+    source.add_argument("--broker", help="MQTT broker as host[:port]")
+    parser.add_argument(
+        "--serial", action="append", help="device serial to follow (repeatable)"
+    )
+    parser.add_argument("--username", help="MQTT username")
+    parser.add_argument("--password", help="MQTT password")
+    parser.add_argument(
+        "--write",
+        metavar="REGISTER=VALUE",
+        help="publish a register write (e.g. 0x300010=54.5) and exit",
+    )
+    parser.add_argument("--slave", type=int, default=1, help="slave id for --write")
+    parser.add_argument(
+        "--changes-only", action="store_true", help="only print changed values"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    protocol_path = Path(args.protocol)
+    if not protocol_path.is_file():
+        protocol_path = PROTOCOL_DIR / f"{args.protocol}.json"
+    protocol_data = load_protocol_file(protocol_path)
+
+    if args.write:
+        if not args.broker or not args.serial:
+            parser.error("--write needs --broker and --serial")
+        write_command(args, ProtocolCodec(protocol_data))
+        return 0
+
+    decoder = FrameDecoder(protocol_data, args.changes_only)
+    try:
+        if args.log:
+            if args.log == "-":
+                run(read_log(sys.stdin), decoder, sys.stdout)
+            else:
+                with open(args.log, encoding="utf-8") as stream:
+                    run(read_log(stream), decoder, sys.stdout)
+        else:
+            run(read_broker(args), decoder, sys.stdout)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,17 +12,30 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant.components.mqtt import DOMAIN as MQTT_DOMAIN, MqttData
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers.selector import (
-    NumberSelector,
-    NumberSelectorConfig,
-    NumberSelectorMode,
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
 )
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 
-from .const import CONF_MODEL, CONF_SERIAL, CONF_SLAVE, DOMAIN
+from . import get_slave_ids
+from .const import (
+    CONF_COMPACT_CELLS,
+    CONF_DECODE_OFFLOAD,
+    CONF_MODEL,
+    CONF_PRUNE,
+    CONF_SERIAL,
+    CONF_SITE_INTERVAL,
+    CONF_SLAVE,
+    CONF_SLAVES,
+    DOMAIN,
+    SITE_MODEL,
+)
 from .device_protocol.device_config import PROTOCOL_MAP, SUPPORTED_MODELS
+from .site_helper.aggregator import DEFAULT_INTERVAL
 
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
@@ -32,24 +45,29 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
 
 STEP_MODEL_DATA_SCHEMA = vol.Schema(
     {
-        vol.Required(CONF_MODEL, default="MakeSkyBlue"): vol.In(SUPPORTED_MODELS),
+        vol.Required(CONF_MODEL, default="MakeSkyBlue"): vol.In(
+            [*SUPPORTED_MODELS, SITE_MODEL]
+        ),
     }
 )
 
 STEP_SETTINGS_DATA_SCHEMA = vol.Schema(
     {
-        vol.Required(CONF_SLAVE, default=15): NumberSelector(
-            NumberSelectorConfig(
-                min=0,
-                max=255,
-                step=1,
-                mode=NumberSelectorMode.BOX,
-            )
-        ),
+        vol.Required(CONF_SLAVES, default="15"): str,
     }
 )
 
 
+def parse_slave_ids(text: str) -> list[int]:
+    """Parse a comma separated list of slave ids, e.g. "1, 2, 3"."""
+    slave_ids = [int(part) for part in text.replace(" ", "").split(",") if part]
+    if not slave_ids or len(set(slave_ids)) != len(slave_ids):
+        raise ValueError("slave ids must be unique")
+    if any(not 0 <= slave_id <= 255 for slave_id in slave_ids):
+        raise ValueError("slave ids must be between 0 and 255")
+    return slave_ids
+
+
 class SolarManagerHub:
     """Class to manage the Solar Manager hub."""
 
@@ -92,6 +110,12 @@ class SolarManagerConfigFlow(ConfigFlow, domain=DOMAIN):
         self._serial = None
         self._model = None
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Return the options flow."""
+        return SolarManagerOptionsFlow()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -132,7 +156,7 @@ class SolarManagerConfigFlow(ConfigFlow, domain=DOMAIN):
                 return await self.async_step_settings()
 
             return await self._async_create_entry_helper(
-                slave_id=None, error_step="model"
+                slave_ids=None, error_step="model"
             )
 
         return self.async_show_form(
@@ -142,14 +166,18 @@ class SolarManagerConfigFlow(ConfigFlow, domain=DOMAIN):
     async def async_step_settings(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
-        """Step 3: Handle the Slave ID setting (Only for JK BMS)."""
+        """Step 3: Handle the slave ids of the packs (Only for JK BMS)."""
         errors: dict[str, str] = {}
 
         if user_input is not None:
-            slave_id = user_input[CONF_SLAVE]
-            return await self._async_create_entry_helper(
-                slave_id=slave_id, error_step="settings"
-            )
+            try:
+                slave_ids = parse_slave_ids(user_input[CONF_SLAVES])
+            except ValueError:
+                errors["base"] = "invalid_slave_ids"
+            else:
+                return await self._async_create_entry_helper(
+                    slave_ids=slave_ids, error_step="settings"
+                )
 
         return self.async_show_form(
             step_id="settings",
@@ -159,7 +187,7 @@ class SolarManagerConfigFlow(ConfigFlow, domain=DOMAIN):
         )
 
     async def _async_create_entry_helper(
-        self, slave_id: int | None, error_step: str
+        self, slave_ids: list[int] | None, error_step: str
     ) -> ConfigFlowResult:
         """Common helper to validate and create the entry."""
         errors: dict[str, str] = {}
@@ -170,15 +198,16 @@ class SolarManagerConfigFlow(ConfigFlow, domain=DOMAIN):
             )
 
             protocol = PROTOCOL_MAP.get(self._model)
-            if protocol is None:
+            if protocol is None and self._model != SITE_MODEL:
                 errors["base"] = "invalid_model"
             else:
                 data = {
                     CONF_SERIAL: self._serial,
                     CONF_MODEL: self._model,
                 }
-                if slave_id is not None:
-                    data[CONF_SLAVE] = slave_id
+                if slave_ids is not None:
+                    data[CONF_SLAVE] = slave_ids[0]
+                    data[CONF_SLAVES] = slave_ids
 
                 return self.async_create_entry(
                     title=f"{self._model} ({self._serial})",
@@ -201,6 +230,75 @@ class SolarManagerConfigFlow(ConfigFlow, domain=DOMAIN):
         )
 
 
+class SolarManagerOptionsFlow(OptionsFlow):
+    """Handle the options of a Solar Manager device."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the options."""
+        errors: dict[str, str] = {}
+        model = self.config_entry.data.get(CONF_MODEL)
+        is_bank = model == "JK BMS"
+
+        if model == SITE_MODEL:
+            return await self.async_step_site(user_input)
+
+        if user_input is not None:
+            if is_bank:
+                try:
+                    user_input[CONF_SLAVES] = parse_slave_ids(user_input[CONF_SLAVES])
+                except ValueError:
+                    errors["base"] = "invalid_slave_ids"
+            if not errors:
+                return self.async_create_entry(data=user_input)
+
+        schema = {
+            vol.Required(
+                CONF_DECODE_OFFLOAD,
+                default=self.config_entry.options.get(CONF_DECODE_OFFLOAD, False),
+            ): bool,
+            vol.Required(
+                CONF_PRUNE,
+                default=self.config_entry.options.get(CONF_PRUNE, True),
+            ): bool,
+        }
+        if is_bank:
+            slave_ids = ", ".join(map(str, get_slave_ids(self.config_entry)))
+            schema[vol.Required(CONF_SLAVES, default=slave_ids)] = str
+            schema[
+                vol.Required(
+                    CONF_COMPACT_CELLS,
+                    default=self.config_entry.options.get(CONF_COMPACT_CELLS, False),
+                )
+            ] = bool
+
+        return self.async_show_form(
+            step_id="init", data_schema=vol.Schema(schema), errors=errors
+        )
+
+    async def async_step_site(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the options of the site device."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        return self.async_show_form(
+            step_id="site",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_SITE_INTERVAL,
+                        default=self.config_entry.options.get(
+                            CONF_SITE_INTERVAL, DEFAULT_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=3600)),
+                }
+            ),
+        )
+
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
@@ -14,5 +14,16 @@ CONF_SERIAL: str = "serial"
 CONF_MODEL: str = "model"
 CONF_PROTOCOL: str = "protocol"
 CONF_SLAVE: str = "slave_id"
+CONF_SLAVES: str = "slave_ids"
+CONF_DECODE_OFFLOAD: str = "decode_offload"
+CONF_SITE_INTERVAL: str = "update_interval"
+CONF_COMPACT_CELLS: str = "compact_cells"
+CONF_PRUNE: str = "prune_entities"
+
+# Virtual device with the totals of all other devices
+SITE_MODEL = "Site"
+
+# Fired when a fault bit of an alarm word is raised or cleared
+EVENT_FAULT = f"{DOMAIN}_fault"
 
 _LOGGER = logging.getLogger(__name__)
@@ -0,0 +1,49 @@
+"""Diagnostics support for Solar Manager integration.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_SERIAL, DOMAIN
+
+TO_REDACT = {"ssid"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics and performance metrics of a config entry."""
+    serial = entry.data[CONF_SERIAL]
+    devices = hass.data.get(DOMAIN, {}).get(serial, {}).get("devices", [])
+    offload = hass.data.get(DOMAIN, {}).get("decode_offload")
+    site = hass.data.get(DOMAIN, {}).get("site")
+    return {
+        "entry": dict(entry.data),
+        "options": dict(entry.options),
+        "decode_offload": (
+            offload.as_dict()
+            if offload is not None and serial in offload.users
+            else None
+        ),
+        "site": site.as_dict() if site is not None else None,
+        "devices": [
+            {
+                "device_id": device.device_id,
+                "model": device.model,
+                "slave_id": getattr(device, "slave_id", None),
+                "diagnostics": async_redact_data(device.get_diagnostics(), TO_REDACT),
+                "metrics": device.metrics.as_dict(),
+                "pruned": sorted(device.pruned),
+            }
+            for device in devices
+        ],
+    }
@@ -0,0 +1,6 @@
+"""Energy helper for Solar Manager integration.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+"""
@@ -0,0 +1,197 @@
+"""Persistent energy accumulators for Solar Manager devices.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+import logging
+import time
+from typing import Any
+
+from custom_components.solar_manager.const import DOMAIN
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.energy"
+# All devices share one store, so a single delayed write covers every update
+SAVE_DELAY = 60
+
+# Gaps longer than this are treated as missing data and are not integrated,
+# matching the interval after which device data is cleared as stale
+MAX_INTEGRATION_STEP = 120.0
+
+PERIODS = ("daily", "weekly", "monthly", "lifetime")
+
+
+def _period_keys(now: datetime) -> dict[str, str]:
+    """Return the identifiers of the periods containing the given time."""
+    year, week, _ = now.isocalendar()
+    return {
+        "daily": now.date().isoformat(),
+        "weekly": f"{year}-W{week:02d}",
+        "monthly": f"{now.year}-{now.month:02d}",
+    }
+
+
+class EnergyStore:
+    """Shared persistent storage for all energy accumulators."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the energy store."""
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._data: dict[str, Any] | None = None
+
+    async def async_load(self) -> None:
+        """Load the stored accumulators once."""
+        if self._data is None:
+            self._data = await self._store.async_load() or {}
+
+    def get(self, key: str) -> dict[str, Any]:
+        """Return the mutable state for the given accumulator key."""
+        return self._data.setdefault(key, {})
+
+    def schedule_save(self) -> None:
+        """Schedule a debounced write of all accumulators."""
+        self._store.async_delay_save(lambda: self._data, SAVE_DELAY)
+
+    async def async_flush(self) -> None:
+        """Write all accumulators immediately."""
+        if self._data is not None:
+            await self._store.async_save(self._data)
+
+
+async def async_get_energy_store(hass: HomeAssistant) -> EnergyStore:
+    """Return the shared energy store, loading it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if "energy_store" not in domain_data:
+        domain_data["energy_store"] = EnergyStore(hass)
+    store = domain_data["energy_store"]
+    await store.async_load()
+    return store
+
+
+class EnergyAccumulator:
+    """Integrate power or meter readings into period energy totals (kWh)."""
+
+    def __init__(self, hass: HomeAssistant, key: str, channels: list[str]) -> None:
+        """Initialize the accumulator.
+
+        Args:
+            hass: HomeAssistant instance.
+            key: Unique storage key of the device.
+            channels: Energy channels, e.g. ["charge", "discharge"].
+        """
+        self.hass = hass
+        self._key = key
+        self._channels = channels
+        self._store: EnergyStore | None = None
+        self._state: dict[str, Any] = {}
+        self._current_day: str | None = None
+        self._last_power: float | None = None
+        self._last_sample: float | None = None
+
+    async def async_load(self) -> None:
+        """Restore the accumulator from storage."""
+        self._store = await async_get_energy_store(self.hass)
+        self._state = self._store.get(self._key)
+        self._state.setdefault("periods", {})
+        self._state.setdefault("counters", {})
+        totals = self._state.setdefault("totals", {})
+        for channel in self._channels:
+            channel_totals = totals.setdefault(channel, {})
+            for period in PERIODS:
+                channel_totals.setdefault(period, 0.0)
+        self.roll_periods()
+
+    @staticmethod
+    def entity_name(period: str, channel: str) -> str:
+        """Return the data name used for a period/channel total."""
+        return f"{period}_{channel}_energy" if channel else f"{period}_energy"
+
+    def roll_periods(self, now: datetime | None = None) -> bool:
+        """Reset totals whose period has ended; return True if any was reset."""
+        now = now or dt_util.now()
+        day = now.date().isoformat()
+        if day == self._current_day:
+            return False
+        self._current_day = day
+
+        rolled = False
+        periods = self._state["periods"]
+        for period, period_key in _period_keys(now).items():
+            if periods.get(period) == period_key:
+                continue
+            if period in periods:
+                for channel in self._channels:
+                    self._state["totals"][channel][period] = 0.0
+                rolled = True
+            periods[period] = period_key
+        if rolled:
+            self._store.schedule_save()
+        return rolled
+
+    def add_energy(self, channel: str, energy_kwh: float) -> None:
+        """Add energy to every period total of a channel."""
+        if energy_kwh <= 0:
+            return
+        self.roll_periods()
+        channel_totals = self._state["totals"][channel]
+        for period in PERIODS:
+            channel_totals[period] += energy_kwh
+        self._store.schedule_save()
+
+    def add_power(
+        self, power_w: float, positive: str, negative: str | None = None
+    ) -> None:
+        """Integrate a power sample (W) with the trapezoidal rule.
+
+        Positive energy goes to the ``positive`` channel and negative energy to
+        the ``negative`` channel. Steps longer than MAX_INTEGRATION_STEP are
+        not integrated, so outages do not extrapolate the last reading.
+        """
+        now = time.monotonic()
+        last_power, last_sample = self._last_power, self._last_sample
+        self._last_power, self._last_sample = power_w, now
+        if last_sample is None:
+            return
+        step = now - last_sample
+        if step <= 0 or step > MAX_INTEGRATION_STEP:
+            return
+
+        energy_kwh = (power_w + last_power) / 2.0 * step / 3_600_000.0
+        if energy_kwh > 0:
+            self.add_energy(positive, energy_kwh)
+        elif energy_kwh < 0 and negative is not None:
+            self.add_energy(negative, -energy_kwh)
+
+    def add_counter(self, channel: str, total_kwh: float) -> None:
+        """Accumulate the increase of a device lifetime energy counter (kWh)."""
+        counters = self._state["counters"]
+        last_total = counters.get(channel)
+        counters[channel] = total_kwh
+        if last_total is None or total_kwh < last_total:
+            # First reading or meter reset, use it as the new baseline
+            self._store.schedule_save()
+            return
+        self.add_energy(channel, total_kwh - last_total)
+
+    def get(self, channel: str, period: str) -> float:
+        """Return the total of a channel for a period."""
+        return self._state["totals"][channel][period]
+
+    def values(self) -> dict[str, float]:
+        """Return all totals keyed by data name."""
+        return {
+            self.entity_name(period, channel): self._state["totals"][channel][period]
+            for channel in self._channels
+            for period in PERIODS
+        }
@@ -86,14 +86,15 @@ async def async_setup_entry(
     serial = entry.data[CONF_SERIAL]
     model = entry.data[CONF_MODEL]
     for item in hass.data[DOMAIN][serial].get(Platform.LIGHT, []):
-        unique_id = f"{item['name']}_{model}_{serial}"
+        device_id = item["device"].device_id
+        unique_id = f"{item['name']}_{model}_{device_id}"
         light = SolarManagerLight(
             name=item["name"],
             model=model,
             device=item["device"],
             register=item["register"],
             unique_id=unique_id,
-            device_id=serial,
+            device_id=device_id,
             icon=item.get("icon"),
         )
         lights.append(light)
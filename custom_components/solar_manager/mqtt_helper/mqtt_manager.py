@@ -5,9 +5,15 @@ licensed under Creative Commons
 Attribution-NonCommercial-NoDerivatives 4.0 International.
 """
 
+from __future__ import annotations
+
 import json
 import logging
 
+from custom_components.solar_manager.telemetry_helper.profiler import (
+    HotPathProfiler,
+)
+
 from homeassistant.components import mqtt
 from homeassistant.components.mqtt import ReceiveMessage
 from homeassistant.core import HomeAssistant
@@ -27,6 +33,7 @@ class MQTTManager:
         """
         self.hass = hass
         self._callbacks = {}  # topic_prefix -> (unsubscribe func, callback)
+        self.profiler: HotPathProfiler | None = None  # Set while profiling
 
     async def publish(self, topic: str, payload) -> None:
         """Publish message to topic."""
@@ -42,7 +49,11 @@ class MQTTManager:
 
         async def wrapped_callback(msg: ReceiveMessage):
             try:
-                await callback(msg.topic, msg.payload)
+                profiler = self.profiler
+                if profiler is not None and profiler.matches(msg.topic):
+                    await profiler.run(callback, msg.topic, msg.payload)
+                else:
+                    await callback(msg.topic, msg.payload)
             except Exception:
                 _LOGGER.exception("Callback error on topic %s", msg.topic)
 
@@ -128,15 +128,16 @@ async def async_setup_entry(
     serial = entry.data[CONF_SERIAL]
     model = entry.data[CONF_MODEL]
     for item in hass.data[DOMAIN][serial].get(Platform.NUMBER, []):
+        device_id = item["device"].device_id
         unit = item.get("unit")
-        unique_id = f"{item['name']}_{model}_{serial}"
+        unique_id = f"{item['name']}_{model}_{device_id}"
         number = SolarManagerNumber(
             name=item["name"],
             model=model,
             device=item["device"],
             register=item["register"],
             unique_id=unique_id,
-            device_id=serial,
+            device_id=device_id,
             min_value=item.get("min_value", 0.0),
             max_value=item.get("max_value", 100.0),
             unit=unit_mapping.get(unit, unit),
@@ -7,10 +7,12 @@ Attribution-NonCommercial-NoDerivatives 4.0 International.
 
 import json
 import logging
-from datetime import datetime, date, time
 from typing import Any
-import asyncio
 
+from custom_components.solar_manager.energy_helper.energy_accumulator import (
+    PERIODS,
+    EnergyAccumulator,
+)
 from custom_components.solar_manager.protocol_helper.modbus_protocol_helper import (
     ModbusProtocolHelper,
 )
@@ -35,11 +37,7 @@ class ChintDDSU666(BaseDevice):
         self.slave_id = int(id)
         self.setup_protocol()
         self._register_to_name = {}
-        
-        # Daily energy tracking variables
-        self._daily_energy_start = None  # Cumulative energy at start of day
-        self._last_date = None  # Last recorded date
-        self._daily_energy = 0.0  # Daily energy consumption
+        self._energy = EnergyAccumulator(hass, sn, [""])
         self._hass = hass
         self._midnight_timer = None  # Midnight timer
 
@@ -94,10 +92,7 @@ class ChintDDSU666(BaseDevice):
 
             if sensor_type == "sensor":
                 if "enum" in details:
-                    entity_def["enum_mapping"] = {
-                        int(k, 16) if k.startswith("0x") else int(k): v
-                        for k, v in details["enum"].items()
-                    }
+                    entity_def["enum_mapping"] = details["enum_map"]
                 device_info["sensor"].append(entity_def)
             elif sensor_type == "button":
                 entity_def.update(
@@ -111,37 +106,36 @@ class ChintDDSU666(BaseDevice):
                     device_info["button"] = []
                 device_info["button"].append(entity_def)
 
-        # Add daily energy sensor
-        daily_energy_entity = {
-            "addressing": "byte",
-            "name": "daily_energy",
-            "scale": 1.0,
-            "unit": "KILOWATT_HOUR",
-            "icon": "mdi:calendar-today",
-            "display_precision": 2,
-            "device": self,
-            "offset": 0,
-            "device_class": "energy",
-            "state_class": "total",
-        }
-        device_info["sensor"].append(daily_energy_entity)
-
-        # Initialize daily energy and setup timer
-        self._setup_daily_energy()
+        # Add energy sensors for every period
+        for period in PERIODS:
+            device_info["sensor"].append(
+                {
+                    "addressing": "byte",
+                    "name": EnergyAccumulator.entity_name(period, ""),
+                    "scale": 1.0,
+                    "unit": "KILOWATT_HOUR",
+                    "icon": "mdi:calendar-today",
+                    "display_precision": 2,
+                    "device": self,
+                    "offset": 0,
+                    "device_class": "energy",
+                    "state_class": (
+                        "total_increasing" if period == "lifetime" else "total"
+                    ),
+                }
+            )
+
+        # Restore energy totals and setup timer
+        await self._setup_energy()
 
         return device_info
 
-    def _setup_daily_energy(self) -> None:
-        """Setup daily energy tracking and midnight timer."""
-        current_date = date.today()
-        self._last_date = current_date
-        
-        # On first startup, don't set start value until we receive first data
-        # This ensures we use real cumulative energy as start value
-        self._daily_energy = 0.0
-        self._data_dict["daily_energy"] = self._daily_energy
-        
-        # Setup midnight timer to reset daily energy
+    async def _setup_energy(self) -> None:
+        """Restore energy totals and setup midnight timer."""
+        await self._energy.async_load()
+        self._data_dict.update(self._energy.values())
+
+        # Setup midnight timer to roll over period totals without new data
         if self._midnight_timer is None:
             self._midnight_timer = async_track_time_change(
                 self._hass, self._midnight_callback, hour=0, minute=0, second=0
@@ -159,47 +153,37 @@ class ChintDDSU666(BaseDevice):
                     self._data_dict[name] = value
                     if name in self._entities:
                         changed_entities.add(name)
-                    
-                    # Handle cumulative energy update, calculate daily energy
-                    if name == "active_energy":
-                        self._update_daily_energy(value)
 
-        for name in changed_entities:
-            entity = self._entities.get(name)
-            if entity is not None:
-                entity.schedule_update_ha_state()
+                    # Accumulate the increase of the cumulative energy counter
+                    if name == "active_energy":
+                        self._energy.add_counter("", value)
+                        self._refresh_energy(changed_entities)
 
-        # Update daily energy entity if it exists
-        if "daily_energy" in self._entities:
-            self._entities["daily_energy"].schedule_update_ha_state()
+        self._publish_changes(changed_entities)
 
         self._reset_notify_clear_timer()
 
-    def _update_daily_energy(self, current_total_energy: float) -> None:
-        """Update daily energy consumption."""
-        # If first time receiving data, set start value
-        if self._daily_energy_start is None:
-            self._daily_energy_start = current_total_energy
-            self._daily_energy = 0.0
-            _LOGGER.info("First time setup: DDSU666 daily energy start value set to %s kWh", current_total_energy)
-        else:
-            # Normal calculation of daily energy
-            self._daily_energy = max(0, current_total_energy - self._daily_energy_start)
-        
-        self._data_dict["daily_energy"] = self._daily_energy
+    def _refresh_energy(self, changed_entities: set) -> None:
+        """Copy energy totals into data dict and collect changed entities."""
+        for name, value in self._energy.values().items():
+            if self._data_dict.get(name) != value:
+                self._data_dict[name] = value
+                if name in self._entities:
+                    changed_entities.add(name)
 
     async def _midnight_callback(self, now) -> None:
-        """Midnight callback to record current cumulative energy as new day start value."""
-        current_energy = self._data_dict.get("active_energy", 0.0)
-        self._daily_energy_start = current_energy
-        self._daily_energy = 0.0
-        self._data_dict["daily_energy"] = self._daily_energy
-        
-        # Update entity state
-        if "daily_energy" in self._entities:
-            self._entities["daily_energy"].schedule_update_ha_state()
-        
-        _LOGGER.info("Midnight reset: DDSU666 daily energy start value set to %s kWh", current_energy)
+        """Midnight callback to roll over period energy totals."""
+        self._energy.roll_periods(now)
+        changed_entities = set()
+        self._refresh_energy(changed_entities)
+        self._publish_changes(changed_entities)
+
+    def cleanup(self) -> None:
+        """Cancel the midnight timer and clean up the device."""
+        if self._midnight_timer is not None:
+            self._midnight_timer()
+            self._midnight_timer = None
+        super().cleanup()
 
     async def handle_cmd(self, cmd: int, value: Any) -> None:
         """Handle writes (Buttons, Switches, etc)."""
@@ -219,4 +203,4 @@ class ChintDDSU666(BaseDevice):
             return
 
         data = self.parser.pack_data(self.slave_id, cmd, val_to_write, write_command)
-        await self.mqtt_manager.publish(self.cmd_topic, data)
+        await self.publish_command(data)
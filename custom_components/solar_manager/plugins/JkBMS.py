@@ -5,15 +5,23 @@ licensed under Creative Commons
 Attribution-NonCommercial-NoDerivatives 4.0 International.
 """
 
+from __future__ import annotations
+
 import json
 import logging
-from datetime import datetime, date, time
 from typing import Any
-import asyncio
 
+from custom_components.solar_manager.energy_helper.energy_accumulator import (
+    PERIODS,
+    EnergyAccumulator,
+)
 from custom_components.solar_manager.protocol_helper.modbus_protocol_helper import (
     ModbusProtocolHelper,
 )
+from custom_components.solar_manager.site_helper.bank_analytics import (
+    BANK_SENSORS,
+    BankAnalytics,
+)
 
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.event import async_track_time_change
@@ -22,36 +30,95 @@ from .base_device import BaseDevice
 
 _LOGGER = logging.getLogger(__name__)
 
+# Register carrying the battery power used for energy accounting
+TOTAL_POWER_REGISTER = 0x301294
+
 
 class JkBms(BaseDevice):
     """JkBms device class for Solar Manager integration."""
 
     def __init__(
-        self, hass: HomeAssistant, protocol_file: str, sn: str, model: str, id: int = 15
+        self,
+        hass: HomeAssistant,
+        protocol_file: str,
+        sn: str,
+        model: str,
+        id: int = 15,
+        primary: JkBms | None = None,
+        compact: bool = False,
     ) -> None:
-        """Init."""
+        """Init.
+
+        Packs of a bank share one gateway serial. The first pack (primary)
+        owns the MQTT subscriptions and routes frames to the other packs by
+        their slave id; each further pack is its own Home Assistant device.
+        In compact mode registers declaring an "array" are shown as one
+        sensor per array instead of one sensor per cell.
+        """
         super().__init__(hass, protocol_file, sn, model)
         self.parser = ModbusProtocolHelper(hass, protocol_file)
         self.slave_id = int(id)
+        self._primary = primary
+        self._packs: dict[int, JkBms] = {self.slave_id: self}
+        if primary is not None:
+            primary._packs[self.slave_id] = self
+            self.device_id = f"{sn}_{self.slave_id}"
         self.setup_protocol()
         self._register_to_name = {}
         self._unknown_registers = set()
-        
-        # Daily energy tracking variables
-        self._daily_charge_energy = 0.0  # Daily charge energy in kWh
-        self._daily_discharge_energy = 0.0  # Daily discharge energy in kWh
-        self._last_update_time = None  # Last update timestamp
-        self._last_power = 0.0  # Last power reading
+        self._energy = EnergyAccumulator(
+            hass, f"{sn}_{self.slave_id}", ["charge", "discharge"]
+        )
         self._hass = hass
         self._midnight_timer = None  # Midnight timer
+        self._bank: BankAnalytics | None = None  # Summary of all packs (primary)
+        self._bank_scheduled = False
+        self._bank_inputs: dict[str, float] = {}  # Name: scale of summary inputs
+        self._compact = compact
+        self._array_of: dict[str, str] = {}  # Cell name: array entity name
+        self._cell_numbers: dict[str, int] = {}  # Cell name: cell number
+
+    async def _async_connect(self) -> None:
+        """Connect the primary pack only, it handles the topics of the bank."""
+        if self._primary is None:
+            await super()._async_connect()
+
+    async def _handle_notify_frame(self, topic: str, payload: bytes) -> None:
+        """Route a frame to the pack of its slave id, so each pack parses its own."""
+        pack = self._packs.get(payload[0]) if payload else None
+        if pack is None:
+            if len(self._packs) > 1:
+                _LOGGER.debug(
+                    "Dropped frame of unknown slave %s on %s", payload[:1].hex(), topic
+                )
+                return
+            pack = self  # A single pack accepts frames of any slave id
+        await pack._handle_pack_frame(topic, payload)
+
+    async def _handle_pack_frame(self, topic: str, payload: bytes) -> None:
+        """Decode a frame of this pack."""
+        await super()._handle_notify_frame(topic, payload)
+
+    async def update_diagnostics(self, data: dict[str, Any]) -> None:
+        """Update the gateway diagnostics shown by every pack."""
+        await super().update_diagnostics(data)
+        if self._primary is None:
+            for pack in self._packs.values():
+                if pack is not self:
+                    await pack.update_diagnostics(data)
 
     async def send_config(self) -> None:
-        """Send config via MQTT."""
+        """Send config via MQTT, with the segments of every pack of the bank."""
+        if self._primary is not None:
+            await self._primary.send_config()
+            return
         try:
             raw_segments = self.parser.protocol_data.get("segments", [])
 
             final_segments = [
-                {**seg, "slave_id": self.slave_id} for seg in raw_segments
+                {**seg, "slave_id": slave_id}
+                for slave_id in sorted(self._packs)
+                for seg in raw_segments
             ]
 
             config = {"segments": final_segments}
@@ -69,6 +136,10 @@ class JkBms(BaseDevice):
     async def unpack_device_info(self) -> dict[str, list[dict[str, Any]]]:
         """Unpack device info based on JSON definition."""
         self._register_to_name = {}
+        self._bank_inputs = {}
+        self._array_of = {}
+        self._cell_numbers = {}
+        arrays: dict[str, dict[str, Any]] = {}
         device_info = super().unpack_device_info()
 
         for register, details in self.parser.protocol_data.get("registers", {}).items():
@@ -77,7 +148,28 @@ class JkBms(BaseDevice):
                 continue
 
             self._register_to_name[register] = name
+            if name.startswith(("cell_voltage_", "temp_sensor_", "capacity_")):
+                self._bank_inputs[name] = details.get("scale") or 1
             sensor_type = details.get("sensor_type", "sensor")
+            if details.get("array"):
+                self._cell_numbers[name] = int(name.rsplit("_", 1)[1])
+
+            if self._compact and (array := details.get("array")):
+                self._array_of[name] = array
+                if array not in arrays:
+                    arrays[array] = {
+                        "addressing": "byte",
+                        "name": array,
+                        "array": [],
+                        "scale": details.get("scale", 1),
+                        "unit": details.get("unit"),
+                        "icon": details.get("icon"),
+                        "display_precision": details.get("display_precision"),
+                        "device": self,
+                        "device_class": details.get("device_class", "None"),
+                    }
+                arrays[array]["array"].append(name)
+                continue
 
             entity_def = {
                 "addressing": "byte",
@@ -94,10 +186,7 @@ class JkBms(BaseDevice):
 
             if sensor_type == "sensor":
                 if "enum" in details:
-                    entity_def["enum_mapping"] = {
-                        int(k, 16) if k.startswith("0x") else int(k): v
-                        for k, v in details["enum"].items()
-                    }
+                    entity_def["enum_mapping"] = details["enum_map"]
                 device_info["sensor"].append(entity_def)
 
             elif sensor_type == "number":
@@ -120,49 +209,61 @@ class JkBms(BaseDevice):
                 )
                 device_info["switch"].append(entity_def)
 
-        # Add daily charge and discharge energy sensors
-        daily_charge_entity = {
-            "addressing": "byte",
-            "name": "daily_charge_energy",
-            "scale": 1.0,
-            "unit": "KILOWATT_HOUR",
-            "icon": "mdi:battery-charging",
-            "display_precision": 3,
-            "device": self,
-            "offset": 0,
-            "device_class": "energy",
-            "state_class": "total",
-        }
-        device_info["sensor"].append(daily_charge_entity)
-
-        daily_discharge_entity = {
-            "addressing": "byte",
-            "name": "daily_discharge_energy",
-            "scale": 1.0,
-            "unit": "KILOWATT_HOUR",
-            "icon": "mdi:battery-minus",
-            "display_precision": 3,
-            "device": self,
-            "offset": 0,
-            "device_class": "energy",
-            "state_class": "total",
-        }
-        device_info["sensor"].append(daily_discharge_entity)
-
-        # Initialize daily energy tracking and setup timer
-        self._setup_daily_energy()
+        # Add charge and discharge energy sensors for every period
+        for channel, icon in (
+            ("charge", "mdi:battery-charging"),
+            ("discharge", "mdi:battery-minus"),
+        ):
+            for period in PERIODS:
+                device_info["sensor"].append(
+                    {
+                        "addressing": "byte",
+                        "name": EnergyAccumulator.entity_name(period, channel),
+                        "scale": 1.0,
+                        "unit": "KILOWATT_HOUR",
+                        "icon": icon,
+                        "display_precision": 3,
+                        "device": self,
+                        "offset": 0,
+                        "device_class": "energy",
+                        "state_class": (
+                            "total_increasing" if period == "lifetime" else "total"
+                        ),
+                    }
+                )
+
+        device_info["sensor"].extend(arrays.values())
+
+        # Add the bank summary to the first pack of a bank
+        if self._primary is None and len(self._packs) > 1:
+            self._bank = BankAnalytics(self._packs)
+            for name, (unit, device_class, icon, precision) in BANK_SENSORS.items():
+                device_info["sensor"].append(
+                    {
+                        "addressing": "byte",
+                        "name": name,
+                        "scale": 1.0,
+                        "unit": unit,
+                        "icon": icon,
+                        "display_precision": precision,
+                        "device": self,
+                        "offset": 0,
+                        "device_class": device_class,
+                        "state_class": "measurement",
+                    }
+                )
+
+        # Restore energy totals and setup timer
+        await self._setup_energy()
 
         return device_info
 
-    def _setup_daily_energy(self) -> None:
-        """Setup daily energy tracking and midnight timer."""
-        # Initialize daily energy values
-        self._daily_charge_energy = 0.0
-        self._daily_discharge_energy = 0.0
-        self._data_dict["daily_charge_energy"] = self._daily_charge_energy
-        self._data_dict["daily_discharge_energy"] = self._daily_discharge_energy
-        
-        # Setup midnight timer to reset daily energy
+    async def _setup_energy(self) -> None:
+        """Restore energy totals and setup midnight timer."""
+        await self._energy.async_load()
+        self._data_dict.update(self._energy.values())
+
+        # Setup midnight timer to roll over period totals without new data
         if self._midnight_timer is None:
             self._midnight_timer = async_track_time_change(
                 self._hass, self._midnight_callback, hour=0, minute=0, second=0
@@ -172,6 +273,7 @@ class JkBms(BaseDevice):
         """Handle incoming data."""
         parsed_data = self.parser.parse_data(payload)
         changed_entities = set()
+        bank_changed = False
 
         for register, value in parsed_data.items():
             name = self._register_to_name.get(register)
@@ -180,6 +282,11 @@ class JkBms(BaseDevice):
                     self._data_dict[name] = value
                     if name in self._entities:
                         changed_entities.add(name)
+                    elif name in self._array_of:
+                        # One update of the array sensor for all its cells
+                        changed_entities.add(self._array_of[name])
+                    if name in self._bank_inputs:
+                        bank_changed = True
 
         # Sign power based on current direction
         if "total_power" in self._data_dict:
@@ -191,63 +298,109 @@ class JkBms(BaseDevice):
                 if "total_power" in self._entities:
                     changed_entities.add("total_power")
 
-        # Update daily energy calculations
-        self._update_daily_energy()
-
-        for name in changed_entities:
-            entity = self._entities.get(name)
-            if entity is not None:
-                entity.schedule_update_ha_state()
+        # Integrate battery power into energy totals
+        if TOTAL_POWER_REGISTER in parsed_data:
+            self._energy.add_power(
+                self._data_dict["total_power"] / 1000.0, "charge", "discharge"
+            )
+            self._refresh_energy(changed_entities)
 
-        # Update daily energy entities if they exist
-        if "daily_charge_energy" in self._entities:
-            self._entities["daily_charge_energy"].schedule_update_ha_state()
-        if "daily_discharge_energy" in self._entities:
-            self._entities["daily_discharge_energy"].schedule_update_ha_state()
+        self._publish_changes(changed_entities)
+        if bank_changed:
+            self._schedule_bank_update()
 
         self._reset_notify_clear_timer()
 
-    def _update_daily_energy(self) -> None:
-        """Update daily charge and discharge energy based on power consumption."""
-        current_time = datetime.now()
-        current_power = self._data_dict.get("total_power", 0.0) / 1000.0 # Power in watts
-        
-        if self._last_update_time is not None and self._last_power is not None:
-            # Calculate time difference in hours
-            time_diff = (current_time - self._last_update_time).total_seconds() / 3600.0
-            
-            # Use average power for energy calculation (trapezoidal integration)
-            avg_power = (current_power + self._last_power) / 2.0
-            
-            # Calculate energy in kWh
-            energy_kwh = abs(avg_power) * time_diff / 1000.0
-            
-            # Add to appropriate daily total based on power direction
-            if avg_power > 0:  # Charging (positive power)
-                self._daily_charge_energy += energy_kwh
-            elif avg_power < 0:  # Discharging (negative power)
-                self._daily_discharge_energy += energy_kwh
-        
-        # Update data dictionary
-        self._data_dict["daily_charge_energy"] = self._daily_charge_energy
-        self._data_dict["daily_discharge_energy"] = self._daily_discharge_energy
-        
-        # Store current values for next calculation
-        self._last_update_time = current_time
-        self._last_power = current_power
+    async def _clear_notify(self, now=None) -> None:
+        """Clear notify data after timeout and drop it from the bank summary."""
+        await super()._clear_notify(now)
+        self._schedule_bank_update()
+
+    def prunable_names(self, seen: set[str]) -> set[str]:
+        """Add the cells beyond the cell count, which report zero."""
+        silent = super().prunable_names(seen)
+        cell_count = self._data_dict.get("setting_cell_count")
+        if cell_count:
+            silent.update(
+                name
+                for name, number in self._cell_numbers.items()
+                if number > cell_count
+            )
+        return silent
+
+    def cell_voltages(self) -> list[float]:
+        """Return the voltages of the present cells of this pack."""
+        data = self._data_dict
+        return [
+            data[name] * scale
+            for name, scale in self._bank_inputs.items()
+            if name.startswith("cell_voltage_") and data.get(name)
+        ]
+
+    def temperatures(self) -> list[float]:
+        """Return the readings of the temperature sensors of this pack."""
+        data = self._data_dict
+        return [
+            data[name] * scale
+            for name, scale in self._bank_inputs.items()
+            if name[-1].isdigit()
+            and name.startswith("temp_sensor_")
+            and data.get(name) is not None
+        ]
+
+    def capacities(self) -> tuple[float | None, float | None]:
+        """Return the full and remaining capacity of this pack."""
+        return tuple(
+            None
+            if (value := self._data_dict.get(name)) is None
+            else value * self._bank_inputs.get(name, 1)
+            for name in ("capacity_full", "capacity_remaining")
+        )
+
+    def _schedule_bank_update(self) -> None:
+        """Update the bank summary once after the frames of this loop iteration."""
+        primary = self._primary or self
+        if primary._bank is None or primary._bank_scheduled:
+            return
+        primary._bank_scheduled = True
+        self.hass.loop.call_soon(primary._update_bank)
+
+    def _update_bank(self) -> None:
+        """Recompute the bank summary and push the changed sensors."""
+        self._bank_scheduled = False
+        changed_entities = set()
+        for name, value in self._bank.compute().items():
+            if self._data_dict.get(name) == value:
+                continue
+            if value is None:
+                self._data_dict.pop(name, None)
+            else:
+                self._data_dict[name] = value
+            if name in self._entities:
+                changed_entities.add(name)
+        self._publish_changes(changed_entities)
+
+    def _refresh_energy(self, changed_entities: set) -> None:
+        """Copy energy totals into data dict and collect changed entities."""
+        for name, value in self._energy.values().items():
+            if self._data_dict.get(name) != value:
+                self._data_dict[name] = value
+                if name in self._entities:
+                    changed_entities.add(name)
 
     async def _midnight_callback(self, now) -> None:
-        """Midnight callback to reset daily energy counters."""
-        self._daily_charge_energy = 0.0
-        self._daily_discharge_energy = 0.0
-        self._data_dict["daily_charge_energy"] = self._daily_charge_energy
-        self._data_dict["daily_discharge_energy"] = self._daily_discharge_energy
-        
-        # Update entity states
-        if "daily_charge_energy" in self._entities:
-            self._entities["daily_charge_energy"].schedule_update_ha_state()
-        if "daily_discharge_energy" in self._entities:
-            self._entities["daily_discharge_energy"].schedule_update_ha_state()
+        """Midnight callback to roll over period energy totals."""
+        self._energy.roll_periods(now)
+        changed_entities = set()
+        self._refresh_energy(changed_entities)
+        self._publish_changes(changed_entities)
+
+    def cleanup(self) -> None:
+        """Cancel the midnight timer and clean up the device."""
+        if self._midnight_timer is not None:
+            self._midnight_timer()
+            self._midnight_timer = None
+        super().cleanup()
 
     async def handle_cmd(self, cmd: int, value: Any) -> None:
         """Handle writes."""
@@ -263,4 +416,4 @@ class JkBms(BaseDevice):
             else:
                 value_list = [int(value)]
             data = self.parser.pack_data(self.slave_id, cmd, value_list, write_command)
-            await self.mqtt_manager.publish(self.cmd_topic, data)
+            await self.publish_command(data)
@@ -21,18 +21,6 @@ from .base_device import BaseDevice
 
 _LOGGER = logging.getLogger(__name__)
 
-SPECIAL_REGISTERS: dict[int, str] = {
-    0x300020: "scheduled_force_charge_start_time",
-    0x300021: "scheduled_force_charge_end_time",
-    0x300022: "scheduled_force_discharge_start_time",
-    0x300023: "scheduled_force_discharge_end_time",
-}
-
-PSEUDO_REGISTERS: dict[int, tuple[str, int]] = {
-    0x10020: ("force_charge_interval", 0x300020),  # Maps to real register 0x20
-    0x10022: ("force_discharge_interval", 0x300022),  # Maps to real register 0x22
-}
-
 voltage_ranges = {
     "72v": {
         0x300008: (60.0, 70.5),
@@ -118,11 +106,11 @@ class MakeSkyBlueDevice(BaseDevice):
             high_bytes = (packed_value >> 16) & 0xFFFF
             low_bytes = packed_value & 0xFFFF
 
-            await self.mqtt_manager.publish(
-                self.cmd_topic, self.parser.pack_data(self.slave_id, 0x1E, high_bytes)
+            await self.publish_command(
+                self.parser.pack_data(self.slave_id, 0x1E, high_bytes)
             )
-            await self.mqtt_manager.publish(
-                self.cmd_topic, self.parser.pack_data(self.slave_id, 0x1F, low_bytes)
+            await self.publish_command(
+                self.parser.pack_data(self.slave_id, 0x1F, low_bytes)
             )
         except Exception as e:
             _LOGGER.error("Failed to send network_time: %s", e)
@@ -148,18 +136,11 @@ class MakeSkyBlueDevice(BaseDevice):
                     "Skipping register %s: invalid or missing name: %s", register, name
                 )
                 continue
-            sensor_type = (
-                Platform.TIME
-                if register in SPECIAL_REGISTERS
-                else details.get("sensor_type", "sensor")
-            )
+            sensor_type = details.get("sensor_type", "sensor")
 
             if sensor_type == "sensor":
                 if "enum" in details:
-                    enum_mapping = {
-                        int(key, 16) if key.startswith("0x") else int(key): value
-                        for key, value in details["enum"].items()
-                    }
+                    enum_mapping = details["enum_map"]
                     device_info["sensor"].append(
                         {
                             "name": name,
@@ -207,12 +188,8 @@ class MakeSkyBlueDevice(BaseDevice):
                         {
                             "name": name,
                             "options": options,
-                            "enum_mapping": {
-                                int(key, 16)
-                                if key.startswith("0x")
-                                else int(key): value
-                                for key, value in details["enum"].items()
-                            },
+                            "enum_mapping": details["enum_map"],
+                            "reverse_mapping": details["enum_reverse"],
                             "device": self,
                             "register": register,
                         }
@@ -242,45 +219,6 @@ class MakeSkyBlueDevice(BaseDevice):
                     "Added time entity for register %s: name=%s", register, name
                 )
 
-        device_info["sensor"].append(
-            {
-                "name": "inverter_factor",
-                "scale": 0.01,
-                "icon": "mdi:angle-acute",
-                "display_precision": 2,
-                "device": self,
-            }
-        )
-
-        device_info["number"].append(
-            {
-                "name": "force_charge_interval",
-                "scale": 1,
-                "min_value": 0,
-                "max_value": 31,
-                "unit": None,
-                "step": 1,
-                "display_precision": 0,
-                "icon": "mdi:timer-sync",
-                "device": self,
-                "register": 0x10020,
-            }
-        )
-
-        device_info["number"].append(
-            {
-                "name": "force_discharge_interval",
-                "scale": 1,
-                "min_value": 0,
-                "max_value": 31,
-                "unit": None,
-                "step": 1,
-                "display_precision": 0,
-                "icon": "mdi:timer-sync",
-                "device": self,
-                "register": 0x10022,
-            }
-        )
         return device_info
 
     async def handle_notify(self, topic: str, payload: bytes) -> None:
@@ -288,7 +226,8 @@ class MakeSkyBlueDevice(BaseDevice):
         changed_entities = set()
 
         parsed_data = self.parser.parse_data(payload)
-        _LOGGER.debug("Parsed data keys: %s", list(parsed_data.keys()))
+        if self._trace:
+            self._logger.debug("Parsed data keys: %s", list(parsed_data))
 
         # Check if register 2 (inverter_ac_voltage) is updated for the first time
         register_2 = 0x300002
@@ -303,22 +242,15 @@ class MakeSkyBlueDevice(BaseDevice):
             if rated_voltage_raw != self._rate_voltage_factory:
                 self._rate_voltage_factory = rated_voltage_raw
                 # Map raw value to voltage using enum
-                enum_mapping = self.parser.protocol_data["registers"][register_7][
-                    "enum"
-                ]
-                rated_voltage = None
-                for key, value in enum_mapping.items():
-                    if (
-                        int(key, 16)
-                        == rated_voltage_raw
-                        * self.parser.protocol_data["registers"][register_7]["scale"]
-                    ):
-                        rated_voltage = value
-                        break
+                details = self.parser.protocol_data["registers"][register_7]
+                rated_voltage = details["enum_map"].get(
+                    round(rated_voltage_raw * details["scale"], 6)
+                )
                 if rated_voltage is None:
                     _LOGGER.error("Invalid rated voltage value: %s", rated_voltage_raw)
                 else:
-                    _LOGGER.debug("Detected rated voltage: %s", rated_voltage)
+                    if self._trace:
+                        self._logger.debug("Detected rated voltage: %s", rated_voltage)
                     # Update ranges for registers 8 and 9
                     for reg, entity_name in [
                         (0x300008, "battery_discharge_min_voltage"),
@@ -330,251 +262,53 @@ class MakeSkyBlueDevice(BaseDevice):
                             # Update entity attributes (assuming entity supports dynamic range updates)
                             entity._attr_native_min_value = min_value
                             entity._attr_native_max_value = max_value
-                            _LOGGER.debug(
-                                "Updated range for %s (register %s): min=%s, max=%s",
-                                entity_name,
-                                reg,
-                                min_value,
-                                max_value,
-                            )
+                            if self._trace:
+                                self._logger.debug(
+                                    "Updated range for %s (register %s): min=%s, max=%s",
+                                    entity_name,
+                                    reg,
+                                    min_value,
+                                    max_value,
+                                )
                             changed_entities.add(entity_name)
 
-        register_145 = 0x300091
-        if register_145 in parsed_data:
-            value = parsed_data[register_145]
-            name = self._register_to_name.get(register_145)
-            if name and isinstance(value, int):
-                major = (value >> 10) & 0x3
-                minor = (value >> 6) & 0x0F
-                patch = value & 0x3F
-                version_str = f"V{major}.{minor}.{patch}"
-                if self._data_dict.get(name) != version_str:
-                    self._data_dict[name] = version_str
-                    _LOGGER.debug(
-                        "Updated software version (register %s): %s",
-                        register_145,
-                        version_str,
-                    )
-                    if name in self._entities:
-                        changed_entities.add(name)
-            del parsed_data[register_145]
-
-        register_6e = 0x30006E
-        if register_6e in parsed_data:
-            power_factor_combined = parsed_data[register_6e]
-            inverter_factor = (power_factor_combined >> 8) & 0xFF
-            power_factor = power_factor_combined & 0xFF
-
-            if self._data_dict.get("inverter_factor") != inverter_factor:
-                self._data_dict["inverter_factor"] = inverter_factor
-                changed_entities.add("inverter_factor")
-                _LOGGER.debug("Updated inverter_factor: %s", inverter_factor)
-
-            if self._data_dict.get("power_factor") != power_factor:
-                self._data_dict["power_factor"] = power_factor
-                changed_entities.add("power_factor")
-                _LOGGER.debug("Updated power_factor: %s", power_factor)
-            del parsed_data[register_6e]
-
         for register, value in parsed_data.items():
-            if register in SPECIAL_REGISTERS:
-                name = SPECIAL_REGISTERS[register]
-                processed_value, interval_days = self._process_special_register(
-                    register, value
-                )
-                if processed_value is not None:
-                    # Store time string for time entity
-                    if self._data_dict.get(name) != processed_value:
-                        self._data_dict[name] = processed_value
-                        _LOGGER.debug(
-                            "Updated special register %s (%s): %s",
-                            register,
-                            name,
-                            processed_value,
-                        )
-                        if name in self._entities:
-                            changed_entities.add(name)
-
-                    # Store interval_days for corresponding interval entity
-                    if register in [0x300020, 0x300022]:
-                        interval_name = (
-                            "force_charge_interval"
-                            if register == 0x300020
-                            else "force_discharge_interval"
-                        )
-                        if interval_days is not None and 0 <= interval_days <= 31:
-                            if self._data_dict.get(interval_name) != interval_days:
-                                self._data_dict[interval_name] = interval_days
-                                changed_entities.add(interval_name)
-                                _LOGGER.debug(
-                                    "Updated %s: %s", interval_name, interval_days
-                                )
-                        else:
-                            _LOGGER.error(
-                                "Register %s invalid interval days: %s",
-                                register,
-                                interval_days,
-                            )
-            else:
-                name = self._register_to_name.get(register)
-                if name:
-                    if self._data_dict.get(name) != value:
-                        self._data_dict[name] = value
-                        _LOGGER.debug(
+            name = self._register_to_name.get(register)
+            if name:
+                if self._data_dict.get(name) != value:
+                    self._data_dict[name] = value
+                    if self._trace:
+                        self._logger.debug(
                             "Updated register %s (%s): %s",
                             register,
                             name,
                             value,
                         )
-                        if name in self._entities:
-                            changed_entities.add(name)
-                elif register not in self._unknown_registers:
-                    _LOGGER.warning(
-                        "No name found for register %s (hex format %s)",
-                        register,
-                        hex(register),
-                    )
-                    self._unknown_registers.add(register)
+                    if name in self._entities:
+                        changed_entities.add(name)
+            elif register not in self._unknown_registers:
+                _LOGGER.warning(
+                    "No name found for register %s (hex format %s)",
+                    register,
+                    hex(register),
+                )
+                self._unknown_registers.add(register)
 
-        for name in changed_entities:
-            entity = self._entities.get(name)
-            if entity is not None:
-                entity.schedule_update_ha_state()
-                _LOGGER.debug("Updated entity %s due to data change", name)
+        self._publish_changes(changed_entities)
 
         self._reset_notify_clear_timer()
 
-    def _process_special_register(
-        self, register: int, value: Any
-    ) -> tuple[str | None, int | None]:
-        """Process a single special register and return the time string and interval_days."""
-        if not isinstance(value, int):
-            _LOGGER.error(
-                "Invalid value type for register %s: %s", register, type(value)
-            )
-            return None, None
-
-        _LOGGER.debug("Processing register %s with raw value: 0x%04X", register, value)
-
-        hour = (value >> 11) & 0x1F
-        minute = (value >> 5) & 0x3F
-        interval_days = value & 0x1F if register in [0x300020, 0x300022] else None
-        if not (0 <= hour <= 23 and 0 <= minute <= 59):
-            _LOGGER.error(
-                "Invalid time for register %s: hour=%s, minute=%s",
-                register,
-                hour,
-                minute,
-            )
-            return None, None
-        if interval_days is not None and not (0 <= interval_days <= 31):
-            _LOGGER.error(
-                "Invalid interval_days for register %s: %s", register, interval_days
-            )
-            return None, None
-
-        try:
-            from datetime import time
-
-            time_str = time(hour, minute).strftime("%H:%M")
-            _LOGGER.debug(
-                "Processed scheduled time for %s: time=%s, interval_days=%s",
-                register,
-                time_str,
-                interval_days,
-            )
-            return time_str, interval_days
-        except ValueError as e:
-            _LOGGER.error("Invalid time for register %s: %s", register, e)
-            return None, None
-
     async def handle_cmd(self, cmd: int, value: Any) -> None:
         """Handle commands from the user."""
         _LOGGER.debug("Handling command: cmd=%s, value=%s", cmd, value)
         data: Any = None
 
-        # Handle time commands for registers 0x20, 0x21, 0x22, 0x23
-        if cmd in [0x300020, 0x300021, 0x300022, 0x300023]:
-            if not isinstance(value, int) or value > 0xFFFF:
-                _LOGGER.error("Invalid time value for register %s: %s", cmd, value)
-                return
-            hour = (value >> 8) & 0xFF
-            minute = value & 0xFF
-            if not (0 <= hour <= 23 and 0 <= minute <= 59):
-                _LOGGER.error(
-                    "Invalid time for register %s: hour=%s, minute=%s",
-                    cmd,
-                    hour,
-                    minute,
-                )
-                return
-            # For registers 0x20 and 0x22, preserve existing interval_days
-            interval_days = 0
-            if cmd in [0x300020, 0x300022]:
-                interval_name = (
-                    "force_charge_interval"
-                    if cmd == 0x300020
-                    else "force_discharge_interval"
-                )
-                interval_days = self._data_dict.get(interval_name, 0)
-                if not (0 <= interval_days <= 31):
-                    _LOGGER.error(
-                        "Invalid stored interval_days for %s: %s",
-                        interval_name,
-                        interval_days,
-                    )
-                    interval_days = 0
-            # Pack the value: hour (5 bits), minute (6 bits), interval_days (5 bits)
-            packed_value = (
-                (hour & 0x1F) << 11
-                | (minute & 0x3F) << 5
-                | ((int)(interval_days) & 0x1F)
-            )
-            data = self.parser.pack_data(self.slave_id, cmd, packed_value)
-            # Update _data_dict with time string
-            time_str = f"{hour:02d}:{minute:02d}"
-            entity_name = self._register_to_name.get(cmd)
-            if entity_name:
-                self._data_dict[entity_name] = time_str
-                _LOGGER.debug("Updated %s: time=%s", entity_name, time_str)
-                if entity_name in self._entities:
-                    self._entities[entity_name].schedule_update_ha_state()
-
-        # Handle interval commands for pseudo-registers 0x10020, 0x10022
-        elif cmd in [0x10020, 0x10022]:
-            interval_name, real_register = PSEUDO_REGISTERS.get(cmd, (None, None))
-            if not interval_name or not real_register:
-                _LOGGER.error("Invalid pseudo-register %s", cmd)
+        # Bit fields are written through their packed register
+        if self.is_field(cmd):
+            write = self.encode_field_write(cmd, value)
+            if write is None:
                 return
-            if not isinstance(value, int) or not (0 <= value <= 31):
-                _LOGGER.error("Invalid interval_days for register %s: %s", cmd, value)
-                return
-            interval_days = value
-            entity_name = self._register_to_name.get(real_register)
-            if not entity_name:
-                _LOGGER.error("No entity name found for register %s", real_register)
-                return
-            # Get current time from _data_dict
-            time_str = self._data_dict.get(entity_name, "00:00")
-            hour, minute = map(int, time_str.split(":")) if ":" in time_str else (0, 0)
-            if not (0 <= hour <= 23 and 0 <= minute <= 59):
-                _LOGGER.error(
-                    "Invalid stored time for %s (%s): %s",
-                    real_register,
-                    entity_name,
-                    time_str,
-                )
-                return
-            # Pack the value with existing time and new interval_days
-            packed_value = (
-                (hour & 0x1F) << 11 | (minute & 0x3F) << 5 | (interval_days & 0x1F)
-            )
-            data = self.parser.pack_data(self.slave_id, real_register, packed_value)
-            # Update _data_dict for interval entity
-            self._data_dict[interval_name] = interval_days
-            _LOGGER.debug("Updated %s: interval_days=%s", interval_name, interval_days)
-            if interval_name in self._entities:
-                self._entities[interval_name].schedule_update_ha_state()
+            data = self.parser.pack_data(self.slave_id, *write)
 
         # Validate register 2 (inverter_ac_voltage) commands
         elif cmd == 0x300002:
@@ -589,13 +323,8 @@ class MakeSkyBlueDevice(BaseDevice):
                         self._inverter_ac_voltage_initial,
                     )
                     return
-            enum_mapping = self.parser.protocol_data["registers"][0x300002]["enum"]
-            valid_value = False
-            for key in enum_mapping:
-                if int(key, 16) == value:
-                    valid_value = True
-                    break
-            if not valid_value:
+            enum_mapping = self.parser.protocol_data["registers"][0x300002]["enum_map"]
+            if value not in enum_mapping:
                 _LOGGER.error("Invalid inverter_ac_voltage value: %s", value)
                 return
             data = self.parser.pack_data(self.slave_id, cmd, value)
@@ -623,15 +352,8 @@ class MakeSkyBlueDevice(BaseDevice):
 
         if data is not None:
             _LOGGER.debug("Publishing to topic %s: %s", self.cmd_topic, data)
-            await self.mqtt_manager.publish(self.cmd_topic, data)
-            if not isinstance(value, str) and cmd not in [
-                0x300020,
-                0x300021,
-                0x300022,
-                0x300023,
-                0x10020,
-                0x10022,
-            ]:
+            await self.publish_command(data)
+            if not isinstance(value, str) and not self.is_field(cmd):
                 self._data_dict[cmd] = (
                     value if isinstance(value, int) else int(value / scale)
                 )
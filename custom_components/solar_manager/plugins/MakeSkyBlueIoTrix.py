@@ -89,10 +89,7 @@ class MakeSkyBlueIoTrix(BaseDevice):
 
             if sensor_type == "sensor":
                 if "enum" in details:
-                    enum_mapping = {
-                        int(key, 16) if key.startswith("0x") else int(key): value
-                        for key, value in details["enum"].items()
-                    }
+                    enum_mapping = details["enum_map"]
                     device_info["sensor"].append(
                         {
                             "name": name,
@@ -140,12 +137,8 @@ class MakeSkyBlueIoTrix(BaseDevice):
                         {
                             "name": name,
                             "options": options,
-                            "enum_mapping": {
-                                int(key, 16)
-                                if key.startswith("0x")
-                                else int(key): value
-                                for key, value in details["enum"].items()
-                            },
+                            "enum_mapping": details["enum_map"],
+                            "reverse_mapping": details["enum_reverse"],
                             "device": self,
                             "register": register,
                         }
@@ -161,16 +154,6 @@ class MakeSkyBlueIoTrix(BaseDevice):
                     }
                 )
 
-        device_info["sensor"].append(
-            {
-                "name": "inverter_factor",
-                "scale": 0.01,
-                "icon": "mdi:angle-acute",
-                "display_precision": 2,
-                "device": self,
-            }
-        )
-
         return device_info
 
     async def handle_notify(self, topic: str, payload: bytes) -> None:
@@ -178,7 +161,8 @@ class MakeSkyBlueIoTrix(BaseDevice):
         changed_entities = set()
 
         parsed_data = self.parser.parse_data(payload)
-        _LOGGER.debug("Parsed data keys: %s", list(parsed_data.keys()))
+        if self._trace:
+            self._logger.debug("Parsed data keys: %s", list(parsed_data))
 
         # Check if register 2 (inverter_ac_voltage) is updated for the first time
         register_2 = 0x300002
@@ -193,22 +177,15 @@ class MakeSkyBlueIoTrix(BaseDevice):
             if rated_voltage_raw != self._rate_voltage_factory:
                 self._rate_voltage_factory = rated_voltage_raw
                 # Map raw value to voltage using enum
-                enum_mapping = self.parser.protocol_data["registers"][register_7][
-                    "enum"
-                ]
-                rated_voltage = None
-                for key, value in enum_mapping.items():
-                    if (
-                        int(key, 16)
-                        == rated_voltage_raw
-                        * self.parser.protocol_data["registers"][register_7]["scale"]
-                    ):
-                        rated_voltage = value
-                        break
+                details = self.parser.protocol_data["registers"][register_7]
+                rated_voltage = details["enum_map"].get(
+                    round(rated_voltage_raw * details["scale"], 6)
+                )
                 if rated_voltage is None:
                     _LOGGER.error("Invalid rated voltage value: %s", rated_voltage_raw)
                 else:
-                    _LOGGER.debug("Detected rated voltage: %s", rated_voltage)
+                    if self._trace:
+                        self._logger.debug("Detected rated voltage: %s", rated_voltage)
                     # Update ranges for registers 8 and 9
                     for reg, entity_name in [
                         (0x300008, "battery_discharge_min_voltage"),
@@ -220,63 +197,28 @@ class MakeSkyBlueIoTrix(BaseDevice):
                             # Update entity attributes (assuming entity supports dynamic range updates)
                             entity._attr_native_min_value = min_value
                             entity._attr_native_max_value = max_value
-                            _LOGGER.debug(
-                                "Updated range for %s (register %s): min=%s, max=%s",
-                                entity_name,
-                                reg,
-                                min_value,
-                                max_value,
-                            )
+                            if self._trace:
+                                self._logger.debug(
+                                    "Updated range for %s (register %s): min=%s, max=%s",
+                                    entity_name,
+                                    reg,
+                                    min_value,
+                                    max_value,
+                                )
                             changed_entities.add(entity_name)
 
-        register_145 = 0x300091
-        if register_145 in parsed_data:
-            value = parsed_data[register_145]
-            name = self._register_to_name.get(register_145)
-            if name and isinstance(value, int):
-                major = (value >> 10) & 0x3
-                minor = (value >> 6) & 0x0F
-                patch = value & 0x3F
-                version_str = f"V{major}.{minor}.{patch}"
-                if self._data_dict.get(name) != version_str:
-                    self._data_dict[name] = version_str
-                    _LOGGER.debug(
-                        "Updated software version (register %s): %s",
-                        register_145,
-                        version_str,
-                    )
-                    if name in self._entities:
-                        changed_entities.add(name)
-            del parsed_data[register_145]
-
-        register_6e = 0x30006E
-        if register_6e in parsed_data:
-            power_factor_combined = parsed_data[register_6e]
-            inverter_factor = (power_factor_combined >> 8) & 0xFF
-            power_factor = power_factor_combined & 0xFF
-
-            if self._data_dict.get("inverter_factor") != inverter_factor:
-                self._data_dict["inverter_factor"] = inverter_factor
-                changed_entities.add("inverter_factor")
-                _LOGGER.debug("Updated inverter_factor: %s", inverter_factor)
-
-            if self._data_dict.get("power_factor") != power_factor:
-                self._data_dict["power_factor"] = power_factor
-                changed_entities.add("power_factor")
-                _LOGGER.debug("Updated power_factor: %s", power_factor)
-            del parsed_data[register_6e]
-
         for register, value in parsed_data.items():
             name = self._register_to_name.get(register)
             if name:
                 if self._data_dict.get(name) != value:
                     self._data_dict[name] = value
-                    _LOGGER.debug(
-                        "Updated register %s (%s): %s",
-                        register,
-                        name,
-                        value,
-                    )
+                    if self._trace:
+                        self._logger.debug(
+                            "Updated register %s (%s): %s",
+                            register,
+                            name,
+                            value,
+                        )
                     if name in self._entities:
                         changed_entities.add(name)
             elif register not in self._unknown_registers:
@@ -287,11 +229,7 @@ class MakeSkyBlueIoTrix(BaseDevice):
                 )
                 self._unknown_registers.add(register)
 
-        for name in changed_entities:
-            entity = self._entities.get(name)
-            if entity is not None:
-                entity.schedule_update_ha_state()
-                _LOGGER.debug("Updated entity %s due to data change", name)
+        self._publish_changes(changed_entities)
 
         self._reset_notify_clear_timer()
 
@@ -300,8 +238,15 @@ class MakeSkyBlueIoTrix(BaseDevice):
         _LOGGER.debug("Handling command: cmd=%s, value=%s", cmd, value)
         data: Any = None
 
+        # Bit fields are written through their packed register
+        if self.is_field(cmd):
+            write = self.encode_field_write(cmd, value)
+            if write is None:
+                return
+            data = self.parser.pack_data(self.slave_id, *write)
+
         # Validate register 2 (inverter_ac_voltage) commands
-        if cmd == 0x300002:
+        elif cmd == 0x300002:
             if (
                 self._inverter_ac_voltage_initial is not None
                 and self._inverter_ac_voltage_initial >= 2
@@ -313,13 +258,8 @@ class MakeSkyBlueIoTrix(BaseDevice):
                         self._inverter_ac_voltage_initial,
                     )
                     return
-            enum_mapping = self.parser.protocol_data["registers"][0x300002]["enum"]
-            valid_value = False
-            for key in enum_mapping:
-                if int(key, 16) == value:
-                    valid_value = True
-                    break
-            if not valid_value:
+            enum_mapping = self.parser.protocol_data["registers"][0x300002]["enum_map"]
+            if value not in enum_mapping:
                 _LOGGER.error("Invalid inverter_ac_voltage value: %s", value)
                 return
             data = self.parser.pack_data(self.slave_id, cmd, value)
@@ -347,8 +287,8 @@ class MakeSkyBlueIoTrix(BaseDevice):
 
         if data is not None:
             _LOGGER.debug("Publishing to topic %s: %s", self.cmd_topic, data)
-            await self.mqtt_manager.publish(self.cmd_topic, data)
-            if not isinstance(value, str):
+            await self.publish_command(data)
+            if not isinstance(value, str) and not self.is_field(cmd):
                 self._data_dict[cmd] = (
                     value if isinstance(value, int) else int(value / scale)
                 )
@@ -77,10 +77,7 @@ class MakeSkyBlueMppt(BaseDevice):
 
             if sensor_type == "sensor":
                 if "enum" in details:
-                    enum_mapping = {
-                        int(key, 16) if key.startswith("0x") else int(key): value
-                        for key, value in details["enum"].items()
-                    }
+                    enum_mapping = details["enum_map"]
                     device_info["sensor"].append(
                         {
                             "name": name,
@@ -126,12 +123,8 @@ class MakeSkyBlueMppt(BaseDevice):
                         {
                             "name": name,
                             "options": options,
-                            "enum_mapping": {
-                                int(key, 16)
-                                if key.startswith("0x")
-                                else int(key): value
-                                for key, value in details["enum"].items()
-                            },
+                            "enum_mapping": details["enum_map"],
+                            "reverse_mapping": details["enum_reverse"],
                             "device": self,
                             "register": register,
                         }
@@ -154,19 +147,21 @@ class MakeSkyBlueMppt(BaseDevice):
         changed_entities = set()
 
         parsed_data = self.parser.parse_data(payload)
-        _LOGGER.debug("Parsed data keys: %s", list(parsed_data.keys()))
+        if self._trace:
+            self._logger.debug("Parsed data keys: %s", list(parsed_data))
 
         for register, value in parsed_data.items():
             name = self._register_to_name.get(register)
             if name:
                 if self._data_dict.get(name) != value:
                     self._data_dict[name] = value
-                    _LOGGER.debug(
-                        "Updated register %s (%s): %s",
-                        register,
-                        name,
-                        value,
-                    )
+                    if self._trace:
+                        self._logger.debug(
+                            "Updated register %s (%s): %s",
+                            register,
+                            name,
+                            value,
+                        )
                     if name in self._entities:
                         changed_entities.add(name)
             elif register not in self._unknown_registers:
@@ -177,11 +172,7 @@ class MakeSkyBlueMppt(BaseDevice):
                 )
                 self._unknown_registers.add(register)
 
-        for name in changed_entities:
-            entity = self._entities.get(name)
-            if entity is not None:
-                entity.schedule_update_ha_state()
-                _LOGGER.debug("Updated entity %s due to data change", name)
+        self._publish_changes(changed_entities)
 
         # Reset notify clear timer
         self._reset_notify_clear_timer()
@@ -205,7 +196,7 @@ class MakeSkyBlueMppt(BaseDevice):
             return
 
         _LOGGER.debug("Publishing to topic %s: %s", self.cmd_topic, data)
-        await self.mqtt_manager.publish(self.cmd_topic, data)
+        await self.publish_command(data)
 
         # Update data dictionary and entity state
         entity_name = self._register_to_name.get(cmd)
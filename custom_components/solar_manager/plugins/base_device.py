@@ -12,16 +12,61 @@ from abc import ABC, abstractmethod
 from datetime import timedelta
 import json
 import logging
+from pathlib import Path
+import time
 from typing import Optional
 
+from custom_components.solar_manager.const import DOMAIN, EVENT_FAULT
 from custom_components.solar_manager.mqtt_helper import mqtt_global
+from custom_components.solar_manager.protocol_helper.bitmask import (
+    DEFAULT_CLASS,
+    BitmaskTracker,
+)
+from custom_components.solar_manager.protocol_helper.codec import (
+    decode_fields,
+    encode_field,
+)
+from custom_components.solar_manager.telemetry_helper.metrics import DeviceMetrics
+from custom_components.solar_manager.telemetry_helper.pruning import (
+    SAMPLE_INTERVAL,
+    RegisterPruner,
+)
+from custom_components.solar_manager.telemetry_helper.ring_store import (
+    TimeSeriesStore,
+)
+from custom_components.solar_manager.telemetry_helper.rolling_stats import (
+    RollingStatistics,
+)
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.event import async_track_time_interval
 
 _LOGGER = logging.getLogger(__name__)
 
 # Clear diagnostics and data after 120 seconds of no updates
 CLEAR_INTERVAL = timedelta(seconds=120)
+# Per-device loggers live below the integration logger so that enabling
+# debug logging for the integration also traces every device
+DEVICE_LOGGER = f"custom_components.{DOMAIN}.device"
+# Refresh performance metric sensors once a minute, not per frame
+METRICS_INTERVAL = timedelta(seconds=60)
+
+# Diagnostic sensors backed by DeviceMetrics: name -> (unit, icon)
+METRIC_SENSORS = {
+    "frames_received": (None, "mdi:counter"),
+    "bytes_received": ("B", "mdi:download-network-outline"),
+    "duplicate_frames": (None, "mdi:content-duplicate"),
+    "parse_time": ("ms", "mdi:timer-outline"),
+    "dispatch_time": ("ms", "mdi:timer-sand"),
+    "entities_per_frame": (None, "mdi:format-list-numbered"),
+    "command_poll_delay": ("ms", "mdi:swap-horizontal"),
+}
+# Extra metric sensors for protocols whose frames carry a trailer
+TRAILER_SENSORS = {
+    "lost_frames": (None, "mdi:package-variant-remove"),
+    "transport_lag": ("ms", "mdi:timer-alert-outline"),
+    "state_latency": ("ms", "mdi:clock-fast"),
+}
 
 
 class BaseDevice(ABC):
@@ -49,6 +94,7 @@ class BaseDevice(ABC):
         self.hass = hass
         self.protocol_file = protocol_file
         self.sn = sn
+        self.device_id = sn  # Home Assistant device, unique per entity owner
         self.model = model
         self.parser = None
         self.protocol_data = None
@@ -67,8 +113,25 @@ class BaseDevice(ABC):
             {} if enable_diagnostics else {}
         )  # Store diagnostic entities
         self._entities = {}  # Store regular entities
+        self._statistics = RollingStatistics()  # Rolling min/max/mean per name
+        self._timeseries: TimeSeriesStore | None = None  # High-resolution samples
+        self.site = None  # Site aggregator following this device
+        self.site_names: dict[str, str] = {}  # Entity name: site quantity
+        self.bitmasks = BitmaskTracker({})  # Binary sensors of alarm words
+        self.pruned: set[str] = set()  # Entities not created, they never had data
+        self._pruner: RegisterPruner | None = None  # Set while observing
+        self._prune_task = None
+        self.metrics = DeviceMetrics()  # Notify path performance counters
+        self._frame_updates = 0  # Entities updated by the current frame
+        self._metrics_task = None
         self._diagnostics_clear_task = None
         self._notify_clear_task = None
+        self._seen_online = False  # Reported to the SSDP broadcaster
+        self._connected = False  # Owns the MQTT subscriptions of its topics
+        self._logger = logging.getLogger(f"{DEVICE_LOGGER}.{sn}")
+        self._trace = False  # Current frame is traced
+        self._trace_every = 1  # Trace one frame in N
+        self._trace_count = 0
 
     def _build_topic(self, *parts: str) -> str:
         """Build an MQTT topic with sn and optional device-specific segment."""
@@ -80,6 +143,70 @@ class BaseDevice(ABC):
     async def async_init(self) -> None:
         """Set up the device asynchronously."""
         await self.load_protocol()
+        await self._setup_timeseries()
+        await self._async_connect()
+
+        if self._enable_diagnostics:
+            self._reset_diagnostics_clear_timer()
+            self._metrics_task = async_track_time_interval(
+                self.hass, self._refresh_metrics, METRICS_INTERVAL
+            )
+        self._reset_notify_clear_timer()
+        if self._pruner is not None:
+            self._prune_task = async_track_time_interval(
+                self.hass, self._sample_pruning, SAMPLE_INTERVAL
+            )
+
+    async def async_load_pruning(self, enabled: bool) -> None:
+        """Load the learned silent entities, or start learning them.
+
+        Called before unpack_device_info; when disabled the learned result is
+        forgotten so that all entities are created again.
+        """
+        pruner = RegisterPruner(self.hass, self.device_id)
+        if not enabled:
+            await pruner.async_reset()
+            return
+        silent = await pruner.async_load()
+        if silent is None:
+            self._pruner = pruner
+        else:
+            self.pruned = silent
+
+    async def _sample_pruning(self, now=None) -> None:
+        """Collect the populated names and remove silent entities when done."""
+        if not self._pruner.sample(self._data_dict, self._seen_online):
+            return
+        self._prune_task()
+        self._prune_task = None
+        silent = self.prunable_names(self._pruner.seen)
+        self._pruner.finish(silent)
+        self._pruner = None
+        self.pruned = silent
+        registry = er.async_get(self.hass)
+        for name in silent:
+            entity = self._entities.pop(name, None)
+            if entity is not None and entity.registry_entry is not None:
+                registry.async_remove(entity.entity_id)
+
+    def prunable_names(self, seen: set[str]) -> set[str]:
+        """Return the register sensors that were never populated.
+
+        Only plain register sensors are candidates: zero is a valid state of
+        settings, enums and alarm words, and computed entities such as the
+        clock drift or energy totals may get their first value late.
+        """
+        return {
+            details["name"]
+            for details in self.protocol_data.get("registers", {}).values()
+            if details.get("sensor_type", "sensor") == "sensor"
+            and not details.keys() & {"enum", "bitmask"}
+            and details.get("name") in self._entities
+            and details["name"] not in seen
+        }
+
+    async def _async_connect(self) -> None:
+        """Subscribe to the device topics, configure it and start the heartbeat."""
         if self._enable_diagnostics:
             await self.mqtt_manager.register_callback(
                 self._build_topic("diagnostics"),
@@ -87,25 +214,162 @@ class BaseDevice(ABC):
             )
         await self.mqtt_manager.register_callback(
             self._build_topic("notify"),
-            self.handle_notify,
+            self._handle_notify_frame,
         )
         await self.mqtt_manager.register_callback(
             self._build_topic("online"),
             self.handle_online,
         )
+        self._connected = True
         await self.send_config()
-
-        if self._enable_diagnostics:
-            self._reset_diagnostics_clear_timer()
-        self._reset_notify_clear_timer()
-
         self._start_heartbeat()
 
     async def handle_online(self, topic: str, payload: bytes) -> None:
         """Handle device online message."""
         _LOGGER.info("Device %s is online, sending configuration", self.sn)
+        self._set_seen_online(True)
         await self.send_config()
 
+    def _set_seen_online(self, online: bool) -> None:
+        """Tell the SSDP broadcaster whether this device reached the broker."""
+        self._seen_online = online
+        broadcaster = self.hass.data.get(DOMAIN, {}).get("broadcaster")
+        if broadcaster is None:
+            return
+        if online:
+            broadcaster.async_device_online(self.sn)
+        else:
+            broadcaster.async_device_offline(self.sn)
+
+    async def _handle_notify_frame(self, topic: str, payload: bytes) -> None:
+        """Drop corrupted frames, count duplicates, then decode and time the rest."""
+        received_ns = time.monotonic_ns()
+        frame = self.parser.validate_frame(payload)
+        if frame is None:
+            entity = self._diagnostic_entities.get("corrupt_frames")
+            if entity is not None:
+                entity.schedule_update_ha_state()
+            return
+        self.metrics.count_duplicate(frame, received_ns)
+        frame, trailer = self.parser.split_trailer(frame)
+        if self.parser.offload is not None:
+            await self.parser.prefetch(frame)
+        self._frame_updates = 0
+        self._trace = self._sample_trace()
+        if self._trace:
+            self._logger.debug("Frame on %s: %s", topic, frame.hex(" "))
+        await self.handle_notify(topic, frame)
+        if not self._seen_online:
+            self._set_seen_online(True)
+        if self._statistics:
+            self._statistics.sample(self._data_dict)
+        if self._timeseries is not None:
+            self._timeseries.sample(self._data_dict)
+        self.metrics.frame_processed(
+            len(payload),
+            received_ns,
+            self.parser.parse_ns,
+            self._frame_updates,
+            trailer,
+            self.parser.frame_block(frame),
+        )
+
+    def _sample_trace(self) -> bool:
+        """Return True if the frame being handled should be traced.
+
+        Plugins guard per-frame debug logging with ``self._trace`` so that log
+        arguments are not even built unless the device logger is at DEBUG,
+        and then only for one frame in ``_trace_every``.
+        """
+        if not self._logger.isEnabledFor(logging.DEBUG):
+            return False
+        self._trace_count += 1
+        if self._trace_count < self._trace_every:
+            return False
+        self._trace_count = 0
+        return True
+
+    def set_debug(self, enabled: bool, sample: int = 1) -> None:
+        """Enable or disable debug tracing of this device, one frame in sample."""
+        self._logger.setLevel(logging.DEBUG if enabled else logging.NOTSET)
+        self._trace_every = max(int(sample), 1)
+        self._trace_count = 0
+        _LOGGER.info(
+            "Debug tracing for %s %s (1 in %d frames)",
+            self.sn,
+            "enabled" if enabled else "disabled",
+            self._trace_every,
+        )
+
+    def _publish_changes(self, names: set[str]) -> None:
+        """Push a state update for each changed entity name."""
+        if self.bitmasks.masks:
+            flipped, faults = self.bitmasks.update(self._data_dict)
+            if flipped:
+                names = names | flipped
+            for name, active in faults:
+                self._fire_fault(name, active)
+        for name in names:
+            entity = self._entities.get(name)
+            if entity is not None:
+                entity.schedule_update_ha_state()
+                self._frame_updates += 1
+        if self.site is not None:
+            self.site.update(self, names)
+
+    def _fire_fault(self, name: str, active: bool) -> None:
+        """Report a fault bit that was raised or cleared as an event."""
+        register, bit = self.bitmasks.sources[name]
+        self.hass.bus.async_fire(
+            EVENT_FAULT,
+            {
+                "device_id": self.device_id,
+                "serial": self.sn,
+                "model": self.model,
+                "fault": name,
+                "register": register,
+                "bit": bit,
+                "active": active,
+            },
+        )
+        self._logger.info("Fault %s %s", name, "raised" if active else "cleared")
+
+    async def publish_command(self, data: bytes) -> None:
+        """Publish a command frame and time it until the next poll."""
+        self.metrics.command_sent(data)
+        await self.mqtt_manager.publish(self.cmd_topic, data)
+
+    async def _refresh_metrics(self, now=None) -> None:
+        """Push current performance metrics to their diagnostic sensors."""
+        for name in (*METRIC_SENSORS, *TRAILER_SENSORS):
+            entity = self._diagnostic_entities.get(name)
+            if entity is not None:
+                entity.schedule_update_ha_state()
+
+    async def _setup_timeseries(self) -> None:
+        """Open the time series store for registers declaring "timeseries"."""
+        if self._timeseries is not None:
+            return
+        names = [
+            details["name"]
+            for details in self.protocol_data.get("registers", {}).values()
+            if details.get("timeseries") and details.get("name")
+        ]
+        if not names:
+            return
+        path = Path(
+            self.hass.config.path(
+                DOMAIN, "timeseries", f"{self.sn}_{self.slave_id}.bin"
+            )
+        )
+        store = TimeSeriesStore(path, names)
+        try:
+            await self.hass.async_add_executor_job(store.open)
+        except (OSError, ValueError) as e:
+            _LOGGER.error("Failed to open time series store for %s: %s", self.sn, e)
+            return
+        self._timeseries = store
+
     @abstractmethod
     async def send_config(self) -> None:
         """Send device-specific configuration to the device."""
@@ -143,6 +407,14 @@ class BaseDevice(ABC):
         """Load the protocol data asynchronously."""
         if self.parser is not None:
             self.protocol_data = await self.parser.load_protocol()
+            registers = self.protocol_data.get("registers", {})
+            self._statistics.configure(registers)
+            self.site_names = {
+                details["name"]: details["site"]
+                for details in registers.values()
+                if details.get("site") and details.get("name")
+            }
+            self.bitmasks = BitmaskTracker(registers)
 
     def _reset_diagnostics_clear_timer(self) -> None:
         """Reset the diagnostics clear timer if enabled."""
@@ -178,11 +450,16 @@ class BaseDevice(ABC):
     async def _clear_notify(self, now=None) -> None:
         """Clear notify data after timeout."""
         self._data_dict.clear()
+        self.bitmasks.reset()
         _LOGGER.debug("Cleared notify data for %s", self.sn)
+        if self._seen_online:
+            self._set_seen_online(False)
         for name, entity in self._entities.items():
             if entity is not None:
                 entity.schedule_update_ha_state()
                 _LOGGER.debug("Directly updated entity %s for %s", name, self.sn)
+        if self.site is not None:
+            self.site.update(self, self.site_names)
 
     async def handle_diagnostics(self, topic: str, payload: str) -> None:
         """Handle diagnostics JSON data from MQTT if enabled."""
@@ -223,12 +500,91 @@ class BaseDevice(ABC):
 
     def get_diagnostics(self) -> dict[str, any]:
         """Return diagnostics information if enabled."""
-        return self._diagnostics.copy() if self._enable_diagnostics else {}
+        if not self._enable_diagnostics:
+            return {}
+        diagnostics = self._diagnostics.copy()
+        if self.parser is not None:
+            diagnostics["corrupt_frames"] = self.parser.corrupt_frames
+        diagnostics.update(self.metrics.sensor_values())
+        return diagnostics
+
+    def get_diagnostic_attributes(self, name: str) -> dict[str, any] | None:
+        """Return percentile attributes of a histogram-backed metric sensor."""
+        histogram = self.metrics.histogram(name)
+        if histogram is None or not histogram.count:
+            return None
+        if name == "entities_per_frame":
+            return {
+                "p50": histogram.quantile(0.5),
+                "p95": histogram.quantile(0.95),
+                "max": histogram.maximum,
+            }
+        return {
+            "p50": round(histogram.quantile(0.5) / 1_000_000, 3),
+            "p95": round(histogram.quantile(0.95) / 1_000_000, 3),
+            "max": round(histogram.maximum / 1_000_000, 3),
+        }
 
     def get_dict(self, name: str) -> any:
         """Return data for the given name from data_dict."""
         return self._data_dict.get(name)
 
+    def get_entity_value(self, name: str) -> any:
+        """Return the value shown by the entity of the given name."""
+        entity = self._entities.get(name)
+        return None if entity is None else entity.native_value
+
+    def is_field(self, register: int) -> bool:
+        """Return True if register is a bit field of a packed register."""
+        details = (self.protocol_data or {}).get("registers", {}).get(register)
+        return details is not None and "field_of" in details
+
+    def encode_field_write(self, register: int, value: any) -> tuple[int, int] | None:
+        """Return (packed register, raw value) to write a bit field.
+
+        The other fields of the packed register keep their last reported bits,
+        so nothing is written before the register has been reported once. The
+        fields are updated right away from the written value.
+        """
+        registers = self.protocol_data["registers"]
+        field = registers[register]
+        packed = registers[field["field_of"]]
+        raw = self._data_dict.get(packed["name"])
+        if raw is None:
+            _LOGGER.warning("Cannot set %s before it was reported", field["name"])
+            return None
+        try:
+            raw = encode_field(field, value, raw)
+        except ValueError as e:
+            _LOGGER.error("Invalid value for %s: %s", field["name"], e)
+            return None
+        values = {field["field_of"]: raw}
+        decode_fields(raw, packed["field_plan"], values)
+        changed = set()
+        for key, field_value in values.items():
+            name = registers[key]["name"]
+            if self._data_dict.get(name) != field_value:
+                self._data_dict[name] = field_value
+                changed.add(name)
+        self._publish_changes(changed)
+        return field["field_of"], raw
+
+    def get_bit(self, name: str) -> bool | None:
+        """Return the state of the binary sensor of an alarm word bit."""
+        register, bit = self.bitmasks.sources[name]
+        value = self._data_dict.get(register)
+        if not isinstance(value, int):
+            return None
+        return bool(value >> bit & 1)
+
+    def get_timeseries(self) -> TimeSeriesStore | None:
+        """Return the time series store of the device, if any."""
+        return self._timeseries
+
+    def get_statistics(self, name: str) -> dict[str, tuple[float, float, float]]:
+        """Return rolling (min, max, mean) per window for the given name."""
+        return self._statistics.get(name)
+
     async def perform_action(self, action_name: str) -> None:
         """Perform an action based on the action name."""
         if action_name in {"restart", "reconfig"}:
@@ -267,6 +623,22 @@ class BaseDevice(ABC):
             "button": [],
         }
 
+        binary_sensors = []
+        for details in (self.protocol_data or {}).get("registers", {}).values():
+            device_class = details.get("bitmask_class", DEFAULT_CLASS)
+            binary_sensors.extend(
+                {
+                    "name": sensor,
+                    "device_class": device_class,
+                    # Sensors of a class get the on/off icons of their class
+                    "icon": None if device_class else details.get("icon"),
+                    "device": self,
+                }
+                for sensor in details.get("bitmask", {}).values()
+            )
+        if binary_sensors:
+            device_info["binary_sensor"] = binary_sensors
+
         if self._enable_diagnostics:
             device_info["sensor"].extend(
                 [
@@ -279,6 +651,23 @@ class BaseDevice(ABC):
                     },
                 ]
             )
+            if self.protocol_data and self.protocol_data.get("inbound_crc"):
+                device_info["sensor"].append(
+                    {
+                        "name": "corrupt_frames",
+                        "diagnostic": True,
+                        "icon": "mdi:alert-circle-check-outline",
+                    }
+                )
+            device_info["sensor"].extend(
+                {"name": name, "diagnostic": True, "unit": unit, "icon": icon}
+                for name, (unit, icon) in METRIC_SENSORS.items()
+            )
+            if self.protocol_data and self.protocol_data.get("frame_trailer"):
+                device_info["sensor"].extend(
+                    {"name": name, "diagnostic": True, "unit": unit, "icon": icon}
+                    for name, (unit, icon) in TRAILER_SENSORS.items()
+                )
             device_info["switch"].append(
                 {"name": "LED", "diagnostic": True, "icon": "mdi:led-on"}
             )
@@ -332,10 +721,16 @@ class BaseDevice(ABC):
 
     def cleanup(self) -> None:
         """Cleanup device resources."""
-        if self._enable_diagnostics:
-            self.mqtt_manager.unregister_callback(self._build_topic("diagnostics"))
-        self.mqtt_manager.unregister_callback(self._build_topic("notify"))
-        self.mqtt_manager.unregister_callback(self._build_topic("online"))
+        if self.site is not None:
+            self.site.detach(self)
+        if self._connected:
+            if self._enable_diagnostics:
+                self.mqtt_manager.unregister_callback(
+                    self._build_topic("diagnostics")
+                )
+            self.mqtt_manager.unregister_callback(self._build_topic("notify"))
+            self.mqtt_manager.unregister_callback(self._build_topic("online"))
+            self._connected = False
 
         self._diagnostic_entities.clear()
         self._entities.clear()
@@ -345,9 +740,19 @@ class BaseDevice(ABC):
         if self._heartbeat_task:
             self._heartbeat_task()
             self._heartbeat_task = None
+        if self._metrics_task:
+            self._metrics_task()
+            self._metrics_task = None
         if self._notify_clear_task:
             self._notify_clear_task()
             self._notify_clear_task = None
+        if self._prune_task:
+            self._prune_task()
+            self._prune_task = None
+        if self._timeseries is not None:
+            # Flushing the map is blocking I/O
+            self.hass.async_add_executor_job(self._timeseries.close)
+            self._timeseries = None
         self.parser = None
         self.mqtt_manager = None
         self.protocol_data = None
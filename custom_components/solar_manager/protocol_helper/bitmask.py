@@ -0,0 +1,76 @@
+"""Bit tracking of alarm and status words for Solar Manager.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+
+Registers declare a binary sensor per bit with "bitmask", e.g.
+"bitmask": {"0": "cell_overvoltage_alarm"}, and its device class with
+"bitmask_class" (default "problem"). On every change the tracker takes
+old ^ new and visits only the bits that flipped, so a stable alarm word
+costs one comparison per frame. Nothing here imports Home Assistant.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+DEFAULT_CLASS = "problem"
+# Bits of these classes are faults, their transitions are reported as events
+FAULT_CLASSES = frozenset({"problem", "safety"})
+
+
+class BitmaskTracker:
+    """Follow the declared bits of the bitmask registers of one device."""
+
+    def __init__(self, registers: dict[int, Any]) -> None:
+        """Initialize the tracker with the registers of a protocol."""
+        # Register name: ({bit: sensor name}, fault)
+        self.masks: dict[str, tuple[dict[int, str], bool]] = {}
+        self.sources: dict[str, tuple[str, int]] = {}  # Sensor: (register, bit)
+        self._values: dict[str, int | None] = {}
+        for details in registers.values():
+            bits = details.get("bitmask")
+            name = details.get("name")
+            if not bits or not name:
+                continue
+            sensors = {int(bit): sensor for bit, sensor in bits.items()}
+            fault = details.get("bitmask_class", DEFAULT_CLASS) in FAULT_CLASSES
+            self.masks[name] = (sensors, fault)
+            for bit, sensor in sensors.items():
+                self.sources[sensor] = (name, bit)
+
+    def update(self, data: dict[str, Any]) -> tuple[set[str], list[tuple[str, bool]]]:
+        """Compare the words in data with the last ones.
+
+        Returns the sensors whose state changed and the (sensor, active)
+        transitions of fault bits. The first word after a reset refreshes all
+        sensors of the register without reporting transitions.
+        """
+        changed: set[str] = set()
+        faults: list[tuple[str, bool]] = []
+        for name, (sensors, fault) in self.masks.items():
+            value = data.get(name)
+            if not isinstance(value, int):
+                value = None
+            old = self._values.get(name)
+            if value == old:
+                continue
+            self._values[name] = value
+            if old is None or value is None:
+                changed.update(sensors.values())
+                continue
+            flipped = old ^ value
+            while flipped:
+                low = flipped & -flipped
+                flipped ^= low
+                sensor = sensors.get(low.bit_length() - 1)
+                if sensor is not None:
+                    changed.add(sensor)
+                    if fault:
+                        faults.append((sensor, bool(value & low)))
+        return changed, faults
+
+    def reset(self) -> None:
+        """Forget the last words, e.g. after the data of a device was cleared."""
+        self._values.clear()
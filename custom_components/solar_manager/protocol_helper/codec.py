@@ -0,0 +1,426 @@
+"""Home Assistant independent protocol engine for Solar Manager.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+
+Loads protocol files, validates and decodes TLD notify frames and encodes
+write commands. Only the standard
+library and crcmod are imported here, so the engine also runs outside
+Home Assistant (see cli.py); the protocol helpers are thin adapters on top.
+"""
+
+from __future__ import annotations
+
+from datetime import time
+import json
+import logging
+from pathlib import Path
+import re
+import struct
+from typing import Any
+
+import crcmod.predefined
+
+_LOGGER = logging.getLogger(__name__)
+
+# CRC16/Modbus with its lookup table built once and shared by every codec
+crc16_modbus = crcmod.predefined.mkPredefinedCrcFun("modbus")
+
+# Optional notify trailer: sequence number and device uptime in milliseconds
+FRAME_TRAILER = struct.Struct(">HI")
+
+TYPE_FORMATS = {
+    "COIL": (None, None),  # Coil, handled as bits
+    "DISCRETE_INPUT": (None, None),  # Discrete Input, handled as bits
+    "UINT8": ("B", 1),  # Unsigned 8-bit integer, 1 byte (New)
+    "INT8": ("b", 1),  # Signed 8-bit integer, 1 byte (New)
+    "UINT16": ("H", 2),  # Unsigned 16-bit integer, 2 bytes
+    "INT16": ("h", 2),  # Signed 16-bit integer, 2 bytes
+    "UINT32": ("I", 4),  # Unsigned 32-bit integer, 4 bytes
+    "INT32": ("i", 4),  # Signed 32-bit integer, 4 bytes
+    "FLOAT": ("f", 4),  # 32-bit float, 4 bytes
+    "UINT64": ("Q", 8),  # Unsigned 64-bit integer, 8 bytes
+    "INT64": ("q", 8),  # Signed 64-bit integer, 8 bytes
+    "FLOAT64": ("d", 8),  # 64-bit float, 8 bytes
+    "BCD16": ("H", 2),  # 4 BCD digits, 2 bytes
+    "BCD32": ("I", 4),  # 8 BCD digits, 4 bytes
+    "STRING": (None, None),  # String, handled separately
+}
+BCD_TYPES = frozenset({"BCD16", "BCD32"})
+
+
+# Keys of bit fields are their register key plus the field number shifted
+# above every register key, so they never match an address of a frame
+FIELD_KEY_SHIFT = 32
+
+
+def enum_key(key: str) -> int:
+    """Return the value of an enum key written in hex ("0x..") or decimal."""
+    return int(key, 16) if key.startswith("0x") else int(key)
+
+
+def compile_fields(registers: dict[int, Any]) -> None:
+    """Add the bit fields declared by registers as registers of their own.
+
+    A packed register lists its fields under "fields", each with a name, the
+    "shift" and "mask" of its bits and optional "min"/"max" limits. Fields of
+    decimal digits give "digits" instead of "mask", their shift counts digits,
+    e.g. HHMM is "shift": [2, 0], "digits": [2, 2]. Fields made of several
+    groups give lists for shift, mask or digits, min and max and a "format"
+    joining the groups: a format string like "V{0}.{1}.{2}", or "time" for a
+    datetime.time of hour, minute and optionally second. Every other key of a
+    field (sensor_type, scale, unit, ...) describes its entity like a register
+    does. The packed register gets the decode plan "field_plan".
+    """
+    for key, details in list(registers.items()):
+        plan = []
+        for number, spec in enumerate(details.get("fields", ()), 1):
+            decimal = "digits" in spec
+            shifts, sizes = spec.get("shift", 0), spec["digits" if decimal else "mask"]
+            if isinstance(sizes, list):
+                count = len(sizes)
+                lows = spec.get("min", [None] * count)
+                highs = spec.get("max", [None] * count)
+            else:
+                shifts, sizes = [shifts], [sizes]
+                lows = [spec.get("min", spec.get("min_value"))]
+                highs = [spec.get("max", spec.get("max_value"))]
+            # Each group is raw // unit % modulus
+            if decimal:
+                units = [10**shift for shift in shifts]
+                moduli = [10**size for size in sizes]
+            else:
+                units = [1 << shift for shift in shifts]
+                moduli = [mask + 1 for mask in sizes]
+            parts = tuple(zip(units, moduli, lows, highs, strict=True))
+            field_key = key + (number << FIELD_KEY_SHIFT)
+            registers[field_key] = {
+                "sensor_type": "sensor",
+                "write_command": details.get("write_command", 6),
+                **spec,
+                "field_of": key,
+                "parts": parts,
+            }
+            template = spec.get("format")
+            if template == "time":
+                build = time
+            else:
+                build = template.format if template else None
+            plan.append((field_key, parts, build))
+        if plan:
+            details["field_plan"] = tuple(plan)
+
+
+def swap_words(data: bytes) -> bytes:
+    """Reverse the order of the 16-bit words of a multi-word value."""
+    return b"".join(data[i : i + 2] for i in range(len(data) - 2, -1, -2))
+
+
+def bcd_decode(value: int) -> int | None:
+    """Return the number held by BCD digits, None for a non-decimal digit."""
+    digits = f"{value:x}"
+    return int(digits) if digits.isdigit() else None
+
+
+def bcd_encode(value: int) -> int:
+    """Return a non-negative number as BCD digits."""
+    return int(str(value), 16)
+
+
+def compile_decoders(protocol_data: dict[str, Any]) -> None:
+    """Compile the decode plan "decoder" of every numeric register.
+
+    The plan is (unpack, size, swap, bcd): the precompiled struct unpacker in
+    the byte order of the protocol, the size in bytes, whether the 16-bit
+    words are in reverse order ("word_order": "little", low word first) and
+    whether the value is BCD coded.
+    """
+    endian_prefix = ">" if protocol_data.get("endianness", "BE") == "BE" else "<"
+    for details in protocol_data["registers"].values():
+        data_type = details.get("type")
+        fmt, size = TYPE_FORMATS.get(data_type, (None, None))
+        if fmt is None:
+            continue
+        details["decoder"] = (
+            struct.Struct(f"{endian_prefix}{fmt}").unpack,
+            size,
+            size > 2 and details.get("word_order") == "little",
+            data_type in BCD_TYPES,
+        )
+
+
+def decode_fields(raw: int, plan: tuple, parsed_data: dict[int, Any]) -> None:
+    """Extract the fields of a packed register value into parsed_data."""
+    for field_key, parts, build in plan:
+        values = []
+        for unit, modulus, low, high in parts:
+            value = raw // unit % modulus
+            if (low is not None and value < low) or (high is not None and value > high):
+                _LOGGER.debug("Field %s out of range: %s", hex(field_key), value)
+                break
+            values.append(value)
+        else:
+            try:
+                parsed_data[field_key] = build(*values) if build else values[0]
+            except ValueError:
+                _LOGGER.debug("Invalid field %s: %s", hex(field_key), values)
+
+
+def encode_field(field: dict[str, Any], value: Any, raw: int) -> int:
+    """Return the packed register value raw with one field set to value.
+
+    The value is a raw number for single fields, a datetime.time for time
+    fields, or a string holding one number per group (e.g. "06:30"). The
+    other fields keep their bits or digits. Raises ValueError if the value
+    does not fit the field.
+    """
+    parts = field["parts"]
+    if isinstance(value, time):
+        values = [value.hour, value.minute, value.second][: len(parts)]
+    elif isinstance(value, str):
+        values = [int(group) for group in re.findall(r"\d+", value)]
+    elif isinstance(value, (list, tuple)):
+        values = [int(group) for group in value]
+    else:
+        values = [int(round(value))]
+    if len(values) != len(parts):
+        raise ValueError(f"{field['name']} needs {len(parts)} values: {value!r}")
+    for (unit, modulus, low, high), group in zip(parts, values, strict=True):
+        if not 0 <= group < modulus or (
+            (low is not None and group < low) or (high is not None and group > high)
+        ):
+            raise ValueError(f"{field['name']} out of range: {value!r}")
+        raw += (group - raw // unit % modulus) * unit
+    return raw
+
+
+def load_protocol_data(text: str) -> dict[str, Any]:
+    """Parse a protocol file and convert register keys from hex strings.
+
+    Enums are compiled once here: "enum_map" maps raw values to labels and
+    "enum_reverse" labels back to raw values, shared by entities and plugins.
+    Bit fields of packed registers are added as registers of their own, see
+    compile_fields, and numeric registers get their decode plan, see
+    compile_decoders.
+    """
+    protocol_data = json.loads(text)
+    if "registers" in protocol_data:
+        protocol_data["registers"] = {
+            int(key, 16): value for key, value in protocol_data["registers"].items()
+        }
+        for details in protocol_data["registers"].values():
+            if "enum" in details:
+                details["enum_map"] = {
+                    enum_key(key): label for key, label in details["enum"].items()
+                }
+                details["enum_reverse"] = {
+                    label: value for value, label in details["enum_map"].items()
+                }
+        compile_fields(protocol_data["registers"])
+        compile_decoders(protocol_data)
+    return protocol_data
+
+
+def load_protocol_file(path: str | Path) -> dict[str, Any]:
+    """Read and parse a protocol file (blocking)."""
+    return load_protocol_data(Path(path).read_text(encoding="utf-8"))
+
+
+class ProtocolCodec:
+    """Validate, decode and encode frames of one protocol."""
+
+    def __init__(self, protocol_data: dict[str, Any]) -> None:
+        """Initialize the codec with loaded protocol data."""
+        self.protocol_data = protocol_data
+        self.crc16 = crc16_modbus
+        self.corrupt_frames = 0
+
+    def validate_frame(self, data: bytes) -> bytes | None:
+        """Check the trailing CRC of an inbound frame and strip it.
+
+        Validation is opt-in with ``"inbound_crc": true`` in the protocol file;
+        no shipped protocol sets it, the current firmware sends no CRC.
+        The CRC is appended in Modbus RTU order (low byte first), so a valid
+        frame including its CRC always yields a remainder of zero.
+        Returns the frame without CRC, or None if the frame is corrupted.
+        """
+        if not self.protocol_data.get("inbound_crc"):
+            return data
+        if len(data) < 3 or self.crc16(data) != 0:
+            self.corrupt_frames += 1
+            _LOGGER.debug(
+                "Dropped corrupted frame (%d bytes), %d corrupted so far",
+                len(data),
+                self.corrupt_frames,
+            )
+            return None
+        return data[:-2]
+
+    def split_trailer(self, data: bytes) -> tuple[bytes, tuple[int, int] | None]:
+        """Split the optional (sequence, device ms) trailer off a notify frame.
+
+        The trailer is enabled with ``"frame_trailer": true`` in the protocol
+        file and sits between the register data and the CRC.
+        """
+        if not self.protocol_data.get("frame_trailer"):
+            return data, None
+        if len(data) < 6 + FRAME_TRAILER.size:
+            return data, None
+        return data[: -FRAME_TRAILER.size], FRAME_TRAILER.unpack_from(
+            data, len(data) - FRAME_TRAILER.size
+        )
+
+    def frame_block(self, data: bytes) -> tuple[int, int, int] | None:
+        """Return (slave id, first address, end address) of a notify frame.
+
+        Addresses are those of write commands, so a write to address a is
+        reported by the frames with first <= a < end.
+        """
+        if len(data) < 6:
+            return None
+        big_endian = self.protocol_data.get("endianness", "BE") == "BE"
+        slave_id, read_command, start, length = struct.unpack(
+            ">BBHH" if big_endian else "<BBHH", data[:6]
+        )
+        byte_addressing = self.protocol_data.get("addressing") == "byte"
+        if byte_addressing and read_command not in (1, 2):
+            length *= 2
+        return slave_id, start, start + length
+
+    def parse(self, data: bytes) -> dict[int, Any]:
+        """Parse TLD format Modbus data: [slave_id:1][read_command:1][start_address:2][length:2][data].
+
+        Returns a dictionary with format {register_address: value}.
+        """
+        try:
+            if len(data) < 6:
+                _LOGGER.error("Payload too short: %d bytes", len(data))
+                return {}
+
+            endianness = self.protocol_data.get("endianness", "BE")
+            addressing_mode = self.protocol_data.get("addressing", "register")
+
+            endian_prefix = ">" if endianness == "BE" else "<"
+
+            slave_id, read_command, start_address, length = struct.unpack(
+                f"{endian_prefix}BBHH", data[:6]
+            )
+            data_bytes = data[6:]
+            read_command = read_command << 20
+
+            parsed_data = {}
+
+            if read_command in (1 << 20, 2 << 20):
+                expected_bytes = (length + 7) // 8
+                if len(data_bytes) < expected_bytes:
+                    return {}
+                for i in range(length):
+                    reg_addr = read_command + start_address + i
+                    reg_info = self.protocol_data["registers"].get(reg_addr)
+                    if reg_info:
+                        byte_idx = i // 8
+                        bit_idx = i % 8
+                        val = (data_bytes[byte_idx] >> bit_idx) & 0x01
+                        parsed_data[reg_addr] = val
+
+            else:
+                total_bytes = len(data_bytes)
+                byte_offset = 0
+
+                while byte_offset < total_bytes:
+                    if addressing_mode == "byte":
+                        current_key = read_command + start_address + byte_offset
+                    else:
+                        current_key = read_command + start_address + (byte_offset // 2)
+
+                    register_info = self.protocol_data["registers"].get(current_key)
+
+                    if not register_info:
+                        byte_offset += 1
+                        continue
+
+                    data_type = register_info.get("type")
+                    if data_type == "STRING":
+                        str_len = register_info.get("length", 0)
+                        if byte_offset + str_len > total_bytes:
+                            break
+
+                        val_bytes = data_bytes[byte_offset : byte_offset + str_len]
+                        val = (
+                            val_bytes.decode("ascii", errors="replace")
+                            .strip("\x00").strip("\x08")
+                            .strip()
+                        )
+                        parsed_data[current_key] = val
+                        byte_offset += str_len
+
+                    else:
+                        decoder = register_info.get("decoder")
+                        if decoder is None:
+                            byte_offset += 1
+                            continue
+                        unpack, type_size, swap, bcd = decoder
+
+                        if byte_offset + type_size > total_bytes:
+                            break
+
+                        raw = data_bytes[byte_offset : byte_offset + type_size]
+                        val = unpack(swap_words(raw) if swap else raw)[0]
+                        byte_offset += type_size
+                        if bcd:
+                            val = bcd_decode(val)
+                            if val is None:
+                                continue
+
+                        parsed_data[current_key] = val
+                        plan = register_info.get("field_plan")
+                        if plan is not None:
+                            decode_fields(val, plan, parsed_data)
+
+        except struct.error as e:
+            _LOGGER.error("Failed to parse TLD payload: %s", e)
+            return {}
+
+        return parsed_data
+
+    def pack(
+        self, slave_id: int, address: int, value: Any, write_command: int = 6
+    ) -> bytes:
+        """Pack data for write commands."""
+        address = address & 0xFFFF
+        packed_data = b""
+
+        if write_command == 6:
+            packed_data = (
+                struct.pack(">B", slave_id)
+                + struct.pack(">B", write_command)
+                + struct.pack(">H", address)
+                + struct.pack(">H", int(value) & 0xFFFF)
+            )
+        elif write_command == 16:
+            if not isinstance(value, (list, tuple)):
+                return b""
+            num_regs = len(value)
+            data_bytes = b""
+            for val in value:
+                data_bytes += struct.pack(">H", int(val) & 0xFFFF)
+
+            packed_data = (
+                struct.pack(">B", slave_id)
+                + struct.pack(">B", write_command)
+                + struct.pack(">H", address)
+                + struct.pack(">H", num_regs)
+                + data_bytes
+            )
+
+        elif write_command == 5:
+            coil_val = 0xFF00 if value else 0x0000
+            packed_data = (
+                struct.pack(">B", slave_id)
+                + struct.pack(">B", write_command)
+                + struct.pack(">H", address)
+                + struct.pack(">H", coil_val)
+            )
+
+        return packed_data
@@ -0,0 +1,52 @@
+"""Entry point of the decode worker processes of Solar Manager.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+
+Workers put this directory on their path and import this module and the codec
+as top-level modules, so they never enter the integration package, whose
+__init__ imports Home Assistant. This module must only import the codec and
+the standard library; it is not imported by the integration itself.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from codec import ProtocolCodec, load_protocol_file
+
+# Worker process state: codec per protocol file and last values per block
+_codecs: dict[str, ProtocolCodec] = {}
+_last_values: dict[tuple[int, bytes], dict[int, Any]] = {}
+
+
+def decode_batch(
+    batch: list[tuple[int, str, bytes, bool]],
+) -> list[tuple[dict[int, Any], int]]:
+    """Decode (device key, protocol file, frame, full) items in a worker.
+
+    Returns (changed registers, decode ns) per frame; all registers of the
+    frame if full is set, e.g. for the first frame of a block.
+    """
+    results = []
+    for key, protocol_file, frame, full in batch:
+        start = time.perf_counter_ns()
+        codec = _codecs.get(protocol_file)
+        if codec is None:
+            codec = _codecs[protocol_file] = ProtocolCodec(
+                load_protocol_file(protocol_file)
+            )
+        parsed_data = codec.parse(frame)
+        block = (key, frame[:6])
+        last = _last_values.get(block)
+        _last_values[block] = parsed_data
+        if not full and last is not None:
+            parsed_data = {
+                register: value
+                for register, value in parsed_data.items()
+                if register not in last or last[register] != value
+            }
+        results.append((parsed_data, time.perf_counter_ns() - start))
+    return results
@@ -0,0 +1,181 @@
+"""Process pool decoding of notify frames for Solar Manager.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+
+Frames queued on the event loop during one loop iteration are sent as one
+batch to a worker process, which decodes them with the protocol engine and
+returns only the registers that changed since the previous frame of the same
+block. Each worker is a single-process pool and a device always uses the same
+worker, so the worker keeps the previous values and the order of frames per
+device is preserved. Workers run decode_worker, which only loads the protocol
+codec and never the integration package or Home Assistant.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+import importlib
+import itertools
+import logging
+import multiprocessing
+from operator import methodcaller
+import os
+from pathlib import Path
+import site
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# Leave one core to the event loop, more workers rarely pay off
+DECODE_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+# Frames sent to a worker in one batch at most
+MAX_BATCH = 256
+
+# Workers add this directory to their path and import the decode module from it
+WORKER_PATH = str(Path(__file__).parent)
+WORKER_MODULE = "decode_worker"
+
+
+class _DecodeWorker:
+    """Placeholder for the decode module, unpickled as that module in a worker.
+
+    Jobs are sent as methodcaller("decode_batch", batch)(_DecodeWorker()), so
+    neither this module nor its package is imported by a worker.
+    """
+
+    def __reduce__(self) -> tuple[Any, tuple[str]]:
+        """Unpickle as the decode module, imported by its name."""
+        return importlib.import_module, (WORKER_MODULE,)
+
+
+class DecodeOffload:
+    """Batches frames to a set of single-process decode workers."""
+
+    def __init__(self, workers: int = DECODE_WORKERS) -> None:
+        """Initialize the offload without starting any process."""
+        self._context = multiprocessing.get_context("spawn")
+        self._shards: list[ProcessPoolExecutor | None] = [None] * workers
+        self._pending: list[list[tuple[tuple, asyncio.Future]]] = [
+            [] for _ in range(workers)
+        ]
+        self._keys = itertools.count()
+        self.users: set[str] = set()  # Serials with offloading enabled
+        self.batches = 0
+        self.frames = 0
+        self.failures = 0
+        self._import_failed = False
+
+    def _executor(self, shard: int) -> ProcessPoolExecutor:
+        """Return the pool of a shard, creating it after a failure."""
+        executor = self._shards[shard]
+        if executor is None:
+            executor = self._shards[shard] = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=self._context,
+                initializer=site.addsitedir,
+                initargs=(WORKER_PATH,),
+            )
+        return executor
+
+    def start(self) -> None:
+        """Start the worker processes and wait until they run (blocking)."""
+        for shard in range(len(self._shards)):
+            self._executor(shard).submit(int).result()
+
+    def shutdown(self) -> None:
+        """Stop the worker processes without waiting for them."""
+        for executor in self._shards:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._shards = [None] * len(self._shards)
+
+    def new_key(self) -> int:
+        """Return a key identifying a device for the lifetime of the workers."""
+        return next(self._keys)
+
+    async def decode(
+        self, key: int, protocol_file: str, frame: bytes, full: bool
+    ) -> tuple[dict[int, Any], int]:
+        """Decode a frame in the worker of the device.
+
+        Returns the changed registers (all if full) and the decode time.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        shard = key % len(self._shards)
+        pending = self._pending[shard]
+        pending.append(((key, protocol_file, frame, full), future))
+        if len(pending) == 1:
+            # Collect the frames of this loop iteration into one batch
+            loop.call_soon(self._flush, shard)
+        elif len(pending) >= MAX_BATCH:
+            self._flush(shard)
+        return await future
+
+    def _flush(self, shard: int) -> None:
+        """Send the pending frames of a shard to its worker."""
+        items = self._pending[shard]
+        if not items:
+            return
+        self._pending[shard] = []
+        futures = [future for _, future in items]
+        try:
+            job = asyncio.get_running_loop().run_in_executor(
+                self._executor(shard),
+                methodcaller("decode_batch", [item for item, _ in items]),
+                _DecodeWorker(),
+            )
+        except RuntimeError as e:  # Pool shut down
+            self._fail(shard, futures, e)
+            return
+        self.batches += 1
+        self.frames += len(items)
+        job.add_done_callback(partial(self._resolve, shard, futures))
+
+    def _resolve(
+        self, shard: int, futures: list[asyncio.Future], job: asyncio.Future
+    ) -> None:
+        """Hand the results of a batch to the waiting frames."""
+        if job.cancelled():
+            self._fail(shard, futures, asyncio.CancelledError())
+            return
+        if (error := job.exception()) is not None:
+            self._fail(shard, futures, error)
+            return
+        for future, result in zip(futures, job.result(), strict=True):
+            if not future.done():
+                future.set_result(result)
+
+    def _fail(
+        self, shard: int, futures: list[asyncio.Future], error: BaseException
+    ) -> None:
+        """Fail the frames of a batch; a broken worker is replaced."""
+        self.failures += 1
+        if isinstance(error, ImportError) and not self._import_failed:
+            # Frames are decoded inline from now on, say once why
+            self._import_failed = True
+            _LOGGER.error("Decode worker %d cannot load the codec: %s", shard, error)
+        elif isinstance(error, BrokenProcessPool):
+            _LOGGER.warning("Decode worker %d stopped, restarting it", shard)
+            self._shards[shard] = None
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the offload counters as plain data."""
+        return {
+            "workers": len(self._shards),
+            "users": len(self.users),
+            "batches": self.batches,
+            "frames": self.frames,
+            "failures": self.failures,
+            "frames_per_batch": (
+                round(self.frames / self.batches, 2) if self.batches else None
+            ),
+        }
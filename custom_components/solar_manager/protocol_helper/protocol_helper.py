@@ -7,39 +7,121 @@ Attribution-NonCommercial-NoDerivatives 4.0 International.
 
 from abc import ABC, abstractmethod
 from collections.abc import Callable
-import json
+import logging
 from typing import Any
 
 import aiofiles
-import crcmod.predefined
 
 from homeassistant.core import HomeAssistant
 
+from .codec import ProtocolCodec, crc16_modbus, load_protocol_data
+from .offload import DecodeOffload
+
+_LOGGER = logging.getLogger(__name__)
+
+# Protocol data per file, parsed and compiled once and shared read-only by
+# every device of the same protocol
+_PROTOCOLS: dict[str, dict[str, Any]] = {}
+
 
 class ProtocolHelper(ABC):
-    """Base class to handle protocol files and Modbus communication."""
+    """Base class to handle protocol files and Modbus communication.
+
+    Frame handling lives in the Home Assistant independent ProtocolCodec;
+    this class adapts it to Home Assistant (async file loading, callbacks).
+    """
 
     def __init__(self, hass: HomeAssistant, protocol_file: str) -> None:
         """Initialize the helper with the given protocol file."""
         self._hass = hass
         self.protocol_file = protocol_file
         self.protocol_data: dict[str, Any] | None = None
-        self.crc16 = crcmod.predefined.mkPredefinedCrcFun("modbus")
+        self.codec: ProtocolCodec | None = None
+        self.crc16 = crc16_modbus
+        self.parse_ns = 0  # Decode time of the last frame
+        self.offload: DecodeOffload | None = None
+        self._offload_key = 0
+        self._decoded: dict[bytes, dict[int, Any]] = {}  # Offloaded values per block
+        self._prefetched: tuple[bytes, dict[int, Any]] | None = None
         self.callback = None
         self._update_callbacks: dict[str, Callable[[Any], None]] = {}
 
+    @property
+    def corrupt_frames(self) -> int:
+        """Return the number of inbound frames dropped for a bad CRC."""
+        return self.codec.corrupt_frames if self.codec is not None else 0
+
     async def load_protocol(self) -> dict[str, Any]:
         """Load the protocol data from the file asynchronously and convert register keys to integers."""
-        async with aiofiles.open(self.protocol_file) as file:
-            data = await file.read()
-            self.protocol_data = json.loads(data)
-            # Convert register keys from hex strings to integers
-            if "registers" in self.protocol_data:
-                registers = self.protocol_data["registers"]
-                self.protocol_data["registers"] = {
-                    int(key, 16): value for key, value in registers.items()
-                }
-            return self.protocol_data
+        protocol_data = _PROTOCOLS.get(str(self.protocol_file))
+        if protocol_data is None:
+            async with aiofiles.open(self.protocol_file) as file:
+                protocol_data = load_protocol_data(await file.read())
+            _PROTOCOLS[str(self.protocol_file)] = protocol_data
+        self.protocol_data = protocol_data
+        if self.codec is None:
+            self.codec = ProtocolCodec(self.protocol_data)
+        else:
+            self.codec.protocol_data = self.protocol_data
+        return self.protocol_data
+
+    def validate_frame(self, data: bytes) -> bytes | None:
+        """Check the trailing CRC of an inbound frame and strip it.
+
+        Returns the frame without CRC, or None if the frame is corrupted.
+        """
+        if self.codec is None:
+            return data
+        return self.codec.validate_frame(data)
+
+    def split_trailer(self, data: bytes) -> tuple[bytes, tuple[int, int] | None]:
+        """Split the optional (sequence, device ms) trailer off a notify frame."""
+        if self.codec is None:
+            return data, None
+        return self.codec.split_trailer(data)
+
+    def frame_block(self, data: bytes) -> tuple[int, int, int] | None:
+        """Return (slave id, first address, end address) of a notify frame."""
+        if self.codec is None:
+            return None
+        return self.codec.frame_block(data)
+
+    def set_offload(self, offload: DecodeOffload | None) -> None:
+        """Decode notify frames in the worker processes of offload, or inline."""
+        self.offload = offload
+        self._offload_key = offload.new_key() if offload is not None else 0
+        self._decoded.clear()
+        self._prefetched = None
+
+    async def prefetch(self, data: bytes) -> None:
+        """Decode a frame in a worker process ahead of parse_data.
+
+        Workers return the registers that changed since the previous frame of
+        the same block; they are merged here so that parse_data still returns
+        every register of the frame. On failure the frame is decoded inline.
+        """
+        header = data[:6]
+        decoded = self._decoded.get(header)
+        try:
+            changes, self.parse_ns = await self.offload.decode(
+                self._offload_key, str(self.protocol_file), data, decoded is None
+            )
+        except Exception as e:  # noqa: BLE001
+            _LOGGER.debug("Offloaded decode failed, decoding inline: %r", e)
+            # Worker and loop may disagree now, start over with full frames
+            self._decoded.clear()
+            return
+        if decoded is None:
+            decoded = self._decoded[header] = {}
+        decoded.update(changes)
+        self._prefetched = (data, decoded)
+
+    def take_prefetched(self, data: bytes) -> dict[int, Any] | None:
+        """Return the values prefetched for this frame, if any."""
+        prefetched, self._prefetched = self._prefetched, None
+        if prefetched is not None and prefetched[0] is data:
+            return prefetched[1]
+        return None
 
     def set_update_callback(
         self, register: str, callback: Callable[[Any], None]
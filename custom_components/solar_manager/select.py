@@ -30,6 +30,7 @@ class SolarManagerSelect(SelectEntity):
         device_id: str,
         enum_mapping: dict[int, str],
         icon: str | None = None,
+        reverse_mapping: dict[str, int] | None = None,
     ) -> None:
         """Initialize the select."""
         self._device = device
@@ -43,7 +44,9 @@ class SolarManagerSelect(SelectEntity):
         self._attr_has_entity_name = True
         self._attr_icon = icon
         self._enum_mapping = enum_mapping
-        self._reverse_mapping = {v: k for k, v in enum_mapping.items()}
+        self._reverse_mapping = reverse_mapping or {
+            v: k for k, v in enum_mapping.items()
+        }
         self._device.register_entity(name, self)
 
     @property
@@ -92,7 +95,8 @@ async def async_setup_entry(
     serial = entry.data[CONF_SERIAL]
     model = entry.data[CONF_MODEL]
     for item in hass.data[DOMAIN][serial].get(Platform.SELECT, []):
-        unique_id = f"{item['name']}_{model}_{serial}"
+        device_id = item["device"].device_id
+        unique_id = f"{item['name']}_{model}_{device_id}"
         select = SolarManagerSelect(
             name=item["name"],
             model=model,
@@ -100,9 +104,10 @@ async def async_setup_entry(
             register=item["register"],
             options=item["options"],
             unique_id=unique_id,
-            device_id=serial,
+            device_id=device_id,
             enum_mapping=item["enum_mapping"],
             icon=item.get("icon"),
+            reverse_mapping=item.get("reverse_mapping"),
         )
         selects.append(select)
     async_add_entities(selects)
@@ -27,7 +27,9 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import CONF_MODEL, CONF_SERIAL, DOMAIN
+from .const import CONF_MODEL, CONF_SERIAL, DOMAIN, SITE_MODEL
+from .site_helper.aggregator import SITE_QUANTITIES
+from .telemetry_helper.rolling_stats import WINDOWS
 
 unit_mapping = {
     "AMPERE": UnitOfElectricCurrent.AMPERE,
@@ -70,6 +72,11 @@ state_class_mapping = {
 class SolarManagerSensor(SensorEntity):
     """Representation of a Solar Manager sensor."""
 
+    # Rolling statistics move with almost every frame, only the state is recorded
+    _unrecorded_attributes = frozenset(
+        f"{stat}_{window}" for stat in ("min", "max", "mean") for window in WINDOWS
+    )
+
     def __init__(
         self,
         name: str,
@@ -118,6 +125,20 @@ class SolarManagerSensor(SensorEntity):
             return None
         return value
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return rolling statistics of the sensor, if tracked."""
+        statistics = self._device.get_statistics(self._name)
+        if not statistics:
+            return None
+        attributes = {}
+        for window, values in statistics.items():
+            for stat, value in zip(("min", "max", "mean"), values):
+                attributes[f"{stat}_{window}"] = round(
+                    (value - self._offset) * self._scale_factor, 3
+                )
+        return attributes
+
     @property
     def available(self) -> bool:
         """Return if the sensor is available."""
@@ -178,6 +199,81 @@ class SolarManagerEnumSensor(SolarManagerSensor):
             return None
 
 
+class SolarManagerArraySensor(SolarManagerSensor):
+    """Representation of the cells of a pack as one sensor.
+
+    The state is the average of the present cells and the cell values are an
+    attribute, which is not recorded to keep the database small.
+    """
+
+    _unrecorded_attributes = frozenset({"cells"})
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        device: Any,
+        unique_id: str,
+        device_id: str,
+        cell_names: list[str],
+        unit: str | None = None,
+        scale_factor: float = 1.0,
+        display_precision: int | None = None,
+        icon: str | None = None,
+        device_class: str | None = None,
+    ) -> None:
+        """Initialize the array sensor."""
+        super().__init__(
+            name,
+            model,
+            device,
+            unique_id,
+            device_id,
+            unit,
+            scale_factor,
+            display_precision,
+            icon,
+            device_class=device_class,
+            state_class="measurement",
+        )
+        self._cell_names = cell_names
+
+    def _cells(self) -> list[float | None]:
+        """Return one value per cell, None for absent cells that read zero.
+
+        Positions match the cell numbers; absent cells after the last present
+        one, i.e. beyond the cell count of the pack, are left out.
+        """
+        get = self._device.get_dict
+        precision = self._attr_suggested_display_precision or 3
+        cells = [
+            round(value * self._scale_factor, precision)
+            if isinstance(value := get(name), (int, float)) and value
+            else None
+            for name in self._cell_names
+        ]
+        while cells and cells[-1] is None:
+            cells.pop()
+        return cells
+
+    @property
+    def native_value(self):
+        """Return the average of the present cells."""
+        present = [cell for cell in self._cells() if cell is not None]
+        if not present:
+            return None
+        return round(sum(present) / len(present), 3)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the minimum and maximum of the present cells and all cells."""
+        cells = self._cells()
+        present = [cell for cell in cells if cell is not None]
+        if not present:
+            return None
+        return {"min": min(present), "max": max(present), "cells": cells}
+
+
 class SolarManagerDiagnosticSensor(SensorEntity):
     """Representation of a Solar Manager diagnostic sensor."""
 
@@ -206,6 +302,23 @@ class SolarManagerDiagnosticSensor(SensorEntity):
         if self._sensor_name == "rssi":
             self._attr_device_class = SensorDeviceClass.SIGNAL_STRENGTH
             self._attr_state_class = SensorStateClass.MEASUREMENT
+        elif self._sensor_name in (
+            "corrupt_frames",
+            "frames_received",
+            "bytes_received",
+            "duplicate_frames",
+            "lost_frames",
+        ):
+            self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+        elif self._sensor_name in (
+            "parse_time",
+            "dispatch_time",
+            "entities_per_frame",
+            "command_poll_delay",
+            "transport_lag",
+            "state_latency",
+        ):
+            self._attr_state_class = SensorStateClass.MEASUREMENT
         self._device.register_diagnostic_entity(name, self)
 
     @property
@@ -214,6 +327,11 @@ class SolarManagerDiagnosticSensor(SensorEntity):
         diagnostics = self._device.get_diagnostics()
         return diagnostics.get(self._sensor_name)
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return histogram percentiles of performance metric sensors."""
+        return self._device.get_diagnostic_attributes(self._sensor_name)
+
     @property
     def available(self) -> bool:
         """Return if the sensor is available."""
@@ -231,6 +349,52 @@ class SolarManagerDiagnosticSensor(SensorEntity):
         }
 
 
+class SolarManagerSiteSensor(SensorEntity):
+    """Representation of a total of the site device."""
+
+    def __init__(
+        self,
+        quantity: str,
+        site: Any,
+        unique_id: str,
+        device_id: str,
+    ) -> None:
+        """Initialize the site sensor."""
+        unit, device_class, icon = SITE_QUANTITIES[quantity]
+        self._site = site
+        self._quantity = quantity
+        self._attr_unique_id = unique_id
+        self._device_id = device_id
+        self._attr_translation_key = f"site_{quantity}"
+        self._attr_has_entity_name = True
+        self._attr_native_unit_of_measurement = unit_mapping.get(unit, unit)
+        self._attr_icon = icon
+        self._attr_device_class = device_class_mapping.get(device_class)
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._site.register_entity(quantity, self)
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        return self._site.value(self._quantity)
+
+    @property
+    def available(self) -> bool:
+        """Return if the sensor is available."""
+        return self.native_value is not None
+
+    @property
+    def device_info(self):
+        """Return device information about this entity."""
+        return {
+            "identifiers": {(DOMAIN, self._device_id)},
+            "name": f"{SITE_MODEL} {self._device_id}",
+            "manufacturer": "@maybetaken",
+            "model": SITE_MODEL,
+            "sw_version": "1.0",
+        }
+
+
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
@@ -238,17 +402,41 @@ async def async_setup_entry(
     sensors = []
     serial = entry.data[CONF_SERIAL]
     model = entry.data[CONF_MODEL]
+    if model == SITE_MODEL:
+        site = hass.data[DOMAIN]["site"]
+        async_add_entities(
+            SolarManagerSiteSensor(
+                quantity, site, f"{quantity}_{SITE_MODEL}_{serial}", serial
+            )
+            for quantity in SITE_QUANTITIES
+        )
+        return
     for device in hass.data[DOMAIN][serial].get(Platform.SENSOR, []):
-        unique_id = f"{device['name']}_{model}_{serial}"
+        device_id = device["device"].device_id
+        unique_id = f"{device['name']}_{model}_{device_id}"
         if device.get("diagnostic"):
             sensor = SolarManagerDiagnosticSensor(
                 name=device["name"],
                 model=model,
                 device=device["device"],
                 unique_id=unique_id,
-                device_id=serial,
+                device_id=device_id,
+                unit=device.get("unit"),
+                icon=device.get("icon"),
+            )
+        elif "array" in device:
+            sensor = SolarManagerArraySensor(
+                name=device["name"],
+                model=model,
+                device=device["device"],
+                unique_id=unique_id,
+                device_id=device_id,
+                cell_names=device["array"],
                 unit=device.get("unit"),
+                scale_factor=device.get("scale", 1.0),
+                display_precision=device.get("display_precision"),
                 icon=device.get("icon"),
+                device_class=device.get("device_class"),
             )
         elif "enum_mapping" in device:
             sensor = SolarManagerEnumSensor(
@@ -256,7 +444,7 @@ async def async_setup_entry(
                 model=model,
                 device=device["device"],
                 unique_id=unique_id,
-                device_id=serial,
+                device_id=device_id,
                 enum_mapping=device["enum_mapping"],
                 unit=device.get("unit"),
                 scale_factor=device.get("scale", 1.0),
@@ -268,7 +456,7 @@ async def async_setup_entry(
                 model=model,
                 device=device["device"],
                 unique_id=unique_id,
-                device_id=serial,
+                device_id=device_id,
                 unit=device.get("unit"),
                 scale_factor=device.get("scale", 1.0),
                 display_precision=device.get("display_precision", 0),
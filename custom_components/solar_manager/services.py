@@ -0,0 +1,368 @@
+"""Services for Solar Manager integration.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import persistent_notification
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import entity_registry as er
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import _LOGGER, CONF_SERIAL, DOMAIN
+from .mqtt_helper.mqtt_global import get_mqtt_manager
+from .telemetry_helper.export import (
+    AGGREGATE_COLUMNS,
+    RAW_COLUMNS,
+    available_format,
+    export_rows,
+)
+from .telemetry_helper.profiler import HotPathProfiler
+from .telemetry_helper.ring_store import TIERS
+
+SERVICE_QUERY_TIMESERIES = "query_timeseries"
+SERVICE_EXPORT_TELEMETRY = "export_telemetry"
+SERVICE_SET_DEBUG = "set_debug"
+SERVICE_PROFILE = "profile"
+
+# Recorder history is read one day per entity at a time to bound memory
+RECORDER_WINDOW = timedelta(days=1)
+
+QUERY_TIMESERIES_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_SERIAL): cv.string,
+        vol.Optional("name"): cv.string,
+        vol.Optional("tier", default="raw"): vol.In([label for label, _, _ in TIERS]),
+        vol.Optional("start"): cv.datetime,
+        vol.Optional("end"): cv.datetime,
+        vol.Optional("limit", default=1000): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=100000)
+        ),
+    }
+)
+
+
+EXPORT_TELEMETRY_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_SERIAL): cv.string,
+        vol.Optional("source", default="buffer"): vol.In(["buffer", "recorder"]),
+        vol.Optional("name"): cv.string,
+        vol.Optional("tier", default="raw"): vol.In([label for label, _, _ in TIERS]),
+        vol.Optional("start"): cv.datetime,
+        vol.Optional("end"): cv.datetime,
+        vol.Optional("format", default="auto"): vol.In(["auto", "npz", "arrow"]),
+    }
+)
+
+
+SET_DEBUG_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_SERIAL): cv.string,
+        vol.Required("enabled"): cv.boolean,
+        vol.Optional("sample", default=1): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=10000)
+        ),
+    }
+)
+
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_SERIAL): cv.string,
+        vol.Optional("duration", default=60): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=3600)
+        ),
+    }
+)
+
+
+def _get_devices(hass: HomeAssistant, serial: str) -> list[Any]:
+    """Return the devices configured for a serial number."""
+    serial_data = hass.data.get(DOMAIN, {}).get(serial)
+    if not serial_data:
+        raise ServiceValidationError(f"No Solar Manager device with serial {serial}")
+    return serial_data.get("devices", [])
+
+
+def _get_all_devices(hass: HomeAssistant, serial: str | None) -> list[Any]:
+    """Return the devices of a serial number, or of every serial if None."""
+    if serial is not None:
+        return _get_devices(hass, serial)
+    return [
+        device
+        for serial_data in hass.data.get(DOMAIN, {}).values()
+        if isinstance(serial_data, dict)
+        for device in serial_data.get("devices", [])
+    ]
+
+
+def _as_timestamp(value: datetime | None) -> float | None:
+    """Convert a service datetime (naive means local time) to a timestamp."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt_util.get_default_time_zone())
+    return value.timestamp()
+
+
+async def _async_query_timeseries(call: ServiceCall) -> ServiceResponse:
+    """Return samples from the time series store of a device."""
+    hass = call.hass
+    serial = call.data[CONF_SERIAL]
+    tier = call.data["tier"]
+    stores = [
+        device.get_timeseries()
+        for device in _get_devices(hass, serial)
+        if device.get_timeseries() is not None
+    ]
+    if not stores:
+        raise ServiceValidationError(f"Device {serial} does not record time series")
+    # Copied on the loop, where samples are appended, then filtered in a thread
+    snapshots = [store.snapshot(tier) for store in stores]
+
+    def _query() -> list[tuple]:
+        rows: list[tuple] = []
+        for snapshot in snapshots:
+            if snapshot is None:
+                continue
+            records = snapshot.query(
+                call.data.get("name"),
+                _as_timestamp(call.data.get("start")),
+                _as_timestamp(call.data.get("end")),
+            )
+            rows.extend(islice(records, call.data["limit"] - len(rows)))
+        return rows
+
+    rows = await hass.async_add_executor_job(_query)
+    columns = (
+        ["timestamp", "name", "value"]
+        if tier == "raw"
+        else ["timestamp", "name", "min", "max", "mean"]
+    )
+    return {
+        "serial": serial,
+        "tier": tier,
+        "columns": columns,
+        "rows": [list(row) for row in rows],
+    }
+
+
+def _recorder_rows(
+    hass: HomeAssistant, entity_ids: list[str], start: datetime, end: datetime
+) -> Iterator[tuple]:
+    """Yield (timestamp, name index, value) rows from the recorder."""
+    from homeassistant.components.recorder import history  # noqa: PLC0415
+
+    for index, entity_id in enumerate(entity_ids):
+        window_start = start
+        while window_start < end:
+            window_end = min(window_start + RECORDER_WINDOW, end)
+            states = history.state_changes_during_period(
+                hass,
+                window_start,
+                window_end,
+                entity_id,
+                no_attributes=True,
+                include_start_time_state=False,
+            )
+            for state in states.get(entity_id, []):
+                try:
+                    value = float(state.state)
+                except ValueError:
+                    continue
+                yield (state.last_updated_timestamp, index, value)
+            window_start = window_end
+
+
+def _get_entity_ids(hass: HomeAssistant, serial: str, name: str | None) -> list[str]:
+    """Return the sensor entity ids of a serial, optionally for one name."""
+    registry = er.async_get(hass)
+    entity_ids = []
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry.data.get(CONF_SERIAL) != serial:
+            continue
+        for entity in er.async_entries_for_config_entry(registry, entry.entry_id):
+            if entity.domain != "sensor" or entity.entity_category is not None:
+                continue
+            if name is not None and entity.translation_key != name:
+                continue
+            entity_ids.append(entity.entity_id)
+    return entity_ids
+
+
+async def _async_export_telemetry(call: ServiceCall) -> ServiceResponse:
+    """Export device telemetry to a columnar file in the config directory."""
+    hass = call.hass
+    serial = call.data[CONF_SERIAL]
+    source = call.data["source"]
+    tier = call.data["tier"]
+    name = call.data.get("name")
+    try:
+        export_format = await hass.async_add_executor_job(
+            available_format, call.data["format"]
+        )
+    except ImportError as e:
+        raise ServiceValidationError(
+            f"Export format {call.data['format']} is not available: {e}"
+        ) from e
+
+    timestamp = dt_util.now().strftime("%Y%m%d%H%M%S")
+    suffix = "arrow" if export_format == "arrow" else "npz"
+    path = Path(
+        hass.config.path(
+            DOMAIN, "exports", f"{serial}_{source}_{tier}_{timestamp}.{suffix}"
+        )
+    )
+
+    if source == "buffer":
+        stores = [
+            device.get_timeseries()
+            for device in _get_devices(hass, serial)
+            if device.get_timeseries() is not None
+        ]
+        if not stores:
+            raise ServiceValidationError(
+                f"Device {serial} does not record time series"
+            )
+        start = _as_timestamp(call.data.get("start"))
+        end = _as_timestamp(call.data.get("end"))
+        names = [name for store in stores for name in store.names]
+        # Copied on the loop, a reload or wrap cannot change them while writing
+        snapshots = [store.snapshot(tier) for store in stores]
+
+        def _buffer_rows() -> Iterator[tuple]:
+            offset = 0
+            for store, snapshot in zip(stores, snapshots, strict=True):
+                if snapshot is not None:
+                    for timestamp, index, *values in snapshot.iter_records(
+                        name, start, end
+                    ):
+                        yield (timestamp, index + offset, *values)
+                offset += len(store.names)
+
+        columns = RAW_COLUMNS if tier == "raw" else AGGREGATE_COLUMNS
+        rows = await hass.async_add_executor_job(
+            export_rows, path, export_format, columns, names, _buffer_rows()
+        )
+    else:
+        from homeassistant.components.recorder import get_instance  # noqa: PLC0415
+
+        names = _get_entity_ids(hass, serial, name)
+        if not names:
+            raise ServiceValidationError(f"No recorded sensors for device {serial}")
+        end = _as_timestamp(call.data.get("end")) or dt_util.utcnow().timestamp()
+        start = _as_timestamp(call.data.get("start")) or (
+            end - RECORDER_WINDOW.total_seconds()
+        )
+        rows = await get_instance(hass).async_add_executor_job(
+            export_rows,
+            path,
+            export_format,
+            {**RAW_COLUMNS, "value": "float64"},
+            names,
+            _recorder_rows(
+                hass,
+                names,
+                dt_util.utc_from_timestamp(start),
+                dt_util.utc_from_timestamp(end),
+            ),
+        )
+
+    _LOGGER.info("Exported %d %s rows of %s to %s", rows, source, serial, path)
+    return {"path": str(path), "format": export_format, "rows": rows}
+
+
+async def _async_set_debug(call: ServiceCall) -> None:
+    """Toggle sampled debug tracing of the notify path per device."""
+    for device in _get_all_devices(call.hass, call.data.get(CONF_SERIAL)):
+        device.set_debug(call.data["enabled"], call.data["sample"])
+
+
+async def _async_profile(call: ServiceCall) -> ServiceResponse:
+    """Start profiling the MQTT callbacks of one or all devices.
+
+    The call returns right away with the path of the stats file, which is
+    written when the duration is over and announced with a notification.
+    """
+    hass = call.hass
+    serial = call.data.get(CONF_SERIAL)
+    if serial is not None:
+        _get_devices(hass, serial)
+    manager = get_mqtt_manager(hass)
+    if manager.profiler is not None:
+        raise ServiceValidationError("A profile is already running")
+
+    duration = call.data["duration"]
+    timestamp = dt_util.now().strftime("%Y%m%d%H%M%S")
+    path = Path(
+        hass.config.path(DOMAIN, "profiles", f"{serial or 'all'}_{timestamp}.prof")
+    )
+    profiler = HotPathProfiler({serial} if serial is not None else None)
+    manager.profiler = profiler
+    _LOGGER.info("Profiling %s for %d seconds", serial or "all devices", duration)
+
+    async def _async_finish(now: datetime) -> None:
+        manager.profiler = None
+        await hass.async_add_executor_job(profiler.dump, path)
+        _LOGGER.info("Wrote profile of %d callbacks to %s", profiler.calls, path)
+        persistent_notification.async_create(
+            hass,
+            f"Profile of {profiler.calls} callbacks written to {path}",
+            title="Solar Manager profile",
+            notification_id=f"{DOMAIN}_profile",
+        )
+
+    async_call_later(hass, duration, _async_finish)
+    return {"path": str(path), "duration": duration}
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Solar Manager services."""
+    if hass.services.has_service(DOMAIN, SERVICE_QUERY_TIMESERIES):
+        return
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_TIMESERIES,
+        _async_query_timeseries,
+        schema=QUERY_TIMESERIES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_TELEMETRY,
+        _async_export_telemetry,
+        schema=EXPORT_TELEMETRY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_DEBUG,
+        _async_set_debug,
+        schema=SET_DEBUG_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        _async_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
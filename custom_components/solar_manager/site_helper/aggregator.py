@@ -0,0 +1,177 @@
+"""Incremental site totals over all Solar Manager devices.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+
+Protocol registers declare the site quantity they contribute to, e.g.
+"site": "pv_power". Every changed input adjusts a running sum by the
+difference to its previous value, so an update costs the same whether the
+site has two devices or two hundred, and the site sensors are refreshed at a
+fixed interval instead of on every input change.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.event import async_track_time_interval
+
+_LOGGER = logging.getLogger(__name__)
+
+# Site quantities as (unit, device class, icon) of their sensor
+SITE_QUANTITIES: dict[str, tuple[str, str, str]] = {
+    "pv_power": ("WATT", "power", "mdi:solar-power"),
+    "battery_power": ("WATT", "power", "mdi:battery-charging"),
+    "load_power": ("WATT", "power", "mdi:home-lightning-bolt"),
+    "grid_power": ("WATT", "power", "mdi:transmission-tower"),
+    "battery_soc": ("PERCENTAGE", "battery", "mdi:battery"),
+    "battery_capacity": ("AMPERE_HOUR", "None", "mdi:battery-high"),
+}
+
+# Quantities that are the sum of their inputs, battery_soc is weighted
+SUMMED = ("pv_power", "battery_power", "load_power", "grid_power", "battery_capacity")
+
+DEFAULT_INTERVAL = 5  # Seconds between site sensor updates
+
+
+class SiteAggregator:
+    """Running totals of the site quantities of all attached devices."""
+
+    def __init__(self, hass: HomeAssistant, interval: float = DEFAULT_INTERVAL) -> None:
+        """Initialize the aggregator, sensors are refreshed every interval."""
+        self.hass = hass
+        self._interval = timedelta(seconds=interval)
+        self._sums = dict.fromkeys(SUMMED, 0.0)
+        self._counts = dict.fromkeys(SUMMED, 0)
+        self._inputs: dict[tuple[Any, str], float] = {}  # (device, name): value
+        # Per battery [soc, capacity]; soc is weighted by the capacity
+        self._batteries: dict[Any, list[float | None]] = {}
+        self._soc_weighted = 0.0  # Sum of soc * capacity
+        self._soc_capacity = 0.0  # Sum of capacity of batteries with both
+        self._soc_batteries = 0
+        self._devices: set = set()
+        self._changed: set[str] = set()
+        self._entities: dict[str, Any] = {}
+        self._timer = None
+
+    def start(self) -> None:
+        """Start refreshing the site sensors."""
+        self._timer = async_track_time_interval(
+            self.hass, self._async_publish, self._interval
+        )
+
+    def stop(self) -> None:
+        """Stop refreshing and detach all devices."""
+        if self._timer is not None:
+            self._timer()
+            self._timer = None
+        for device in list(self._devices):
+            self.detach(device)
+
+    def attach(self, device: Any) -> None:
+        """Start following the site registers of a device."""
+        if device in self._devices or not device.site_names:
+            return
+        self._devices.add(device)
+        device.site = self
+        self.update(device, device.site_names)
+        _LOGGER.debug(
+            "Site follows %s of %s", ", ".join(device.site_names), device.device_id
+        )
+
+    def detach(self, device: Any) -> None:
+        """Remove the contributions of a device."""
+        if device not in self._devices:
+            return
+        for name, quantity in device.site_names.items():
+            self._apply(device, name, quantity, None)
+        self._devices.discard(device)
+        device.site = None
+
+    def update(self, device: Any, names) -> None:
+        """Apply the changed entity names of a device, O(1) per site input."""
+        site_names = device.site_names
+        for name in names:
+            quantity = site_names.get(name)
+            if quantity is not None:
+                self._apply(device, name, quantity, device.get_entity_value(name))
+
+    def _apply(self, device: Any, name: str, quantity: str, value: Any) -> None:
+        """Replace the previous value of one input by its new value."""
+        if not isinstance(value, (int, float)):
+            value = None
+        if quantity in self._sums:
+            key = (device, name)
+            old = self._inputs.pop(key, None)
+            if old == value:
+                if value is not None:
+                    self._inputs[key] = value
+                return
+            if old is not None:
+                self._sums[quantity] -= old
+                self._counts[quantity] -= 1
+            if value is not None:
+                self._sums[quantity] += value
+                self._counts[quantity] += 1
+                self._inputs[key] = value
+            if not self._counts[quantity]:
+                self._sums[quantity] = 0.0  # Drop accumulated rounding errors
+            self._changed.add(quantity)
+        if quantity in ("battery_soc", "battery_capacity"):
+            self._apply_battery(device, quantity, value)
+
+    def _apply_battery(self, device: Any, quantity: str, value: float | None) -> None:
+        """Update the capacity weighted state of charge."""
+        battery = self._batteries.setdefault(device, [None, None])
+        soc, capacity = battery
+        if soc is not None and capacity is not None:
+            self._soc_weighted -= soc * capacity
+            self._soc_capacity -= capacity
+            self._soc_batteries -= 1
+        battery[0 if quantity == "battery_soc" else 1] = value
+        soc, capacity = battery
+        if soc is not None and capacity is not None:
+            self._soc_weighted += soc * capacity
+            self._soc_capacity += capacity
+            self._soc_batteries += 1
+        elif soc is None and capacity is None:
+            del self._batteries[device]
+        if not self._soc_batteries:
+            self._soc_weighted = self._soc_capacity = 0.0
+        self._changed.add("battery_soc")
+
+    def value(self, quantity: str) -> float | None:
+        """Return the current value of a site quantity."""
+        if quantity == "battery_soc":
+            if not self._soc_batteries or self._soc_capacity <= 0:
+                return None
+            return round(self._soc_weighted / self._soc_capacity, 1)
+        if not self._counts.get(quantity):
+            return None
+        return round(self._sums[quantity], 1)
+
+    def register_entity(self, quantity: str, entity: Any) -> None:
+        """Register the sensor of a site quantity."""
+        self._entities[quantity] = entity
+
+    async def _async_publish(self, now=None) -> None:
+        """Push the quantities changed since the last interval to their sensors."""
+        changed, self._changed = self._changed, set()
+        for quantity in changed:
+            entity = self._entities.get(quantity)
+            if entity is not None:
+                entity.schedule_update_ha_state()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the aggregator state as plain data."""
+        return {
+            "interval": self._interval.total_seconds(),
+            "devices": sorted(device.device_id for device in self._devices),
+            "inputs": len(self._inputs),
+            "batteries": self._soc_batteries,
+            "values": {quantity: self.value(quantity) for quantity in SITE_QUANTITIES},
+        }
@@ -0,0 +1,77 @@
+"""Summary values of a bank of JK BMS packs.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# Summary sensors as (unit, device class, icon, display precision)
+BANK_SENSORS: dict[str, tuple[str, str, str, int]] = {
+    "bank_cell_voltage_min": ("VOLT", "voltage", "mdi:battery-arrow-down", 3),
+    "bank_cell_voltage_max": ("VOLT", "voltage", "mdi:battery-arrow-up", 3),
+    "bank_cell_delta_max": ("VOLT", "voltage", "mdi:battery-alert-variant", 3),
+    "bank_weakest_pack": (None, "None", "mdi:battery-alert", 0),
+    "bank_temperature_spread": ("CELSIUS", "None", "mdi:thermometer-lines", 1),
+    "bank_capacity_full": ("AMPERE_HOUR", "None", "mdi:battery-high", 1),
+    "bank_capacity_remaining": ("AMPERE_HOUR", "None", "mdi:battery-medium", 1),
+}
+
+
+class BankAnalytics:
+    """Bank-wide cell, temperature and capacity summary of JK BMS packs.
+
+    Each pack hands over its raw cell voltages and temperatures as arrays, and
+    all summaries are computed in one pass over the packs with the built-in
+    min/max/sum on those arrays.
+    """
+
+    def __init__(self, packs: dict[int, Any]) -> None:
+        """Initialize with the packs of the bank by slave id."""
+        self._packs = packs
+        self.updates = 0
+
+    def compute(self) -> dict[str, float | int | None]:
+        """Return the summary values, None where no pack reported data."""
+        cell_min = cell_max = delta_max = weakest = None
+        temp_min = temp_max = None
+        capacity_full = capacity_remaining = None
+        for slave_id, pack in sorted(self._packs.items()):
+            cells = pack.cell_voltages()
+            if cells:
+                low, high = min(cells), max(cells)
+                if cell_min is None or low < cell_min:
+                    cell_min, weakest = low, slave_id
+                if cell_max is None or high > cell_max:
+                    cell_max = high
+                delta = round(high - low, 3)
+                if delta_max is None or delta > delta_max:
+                    delta_max = delta
+            temperatures = pack.temperatures()
+            if temperatures:
+                low, high = min(temperatures), max(temperatures)
+                temp_min = low if temp_min is None else min(temp_min, low)
+                temp_max = high if temp_max is None else max(temp_max, high)
+            full, remaining = pack.capacities()
+            if full is not None:
+                capacity_full = (capacity_full or 0.0) + full
+            if remaining is not None:
+                capacity_remaining = (capacity_remaining or 0.0) + remaining
+        self.updates += 1
+        return {
+            "bank_cell_voltage_min": cell_min,
+            "bank_cell_voltage_max": cell_max,
+            "bank_cell_delta_max": delta_max,
+            "bank_weakest_pack": weakest,
+            "bank_temperature_spread": (
+                round(temp_max - temp_min, 1) if temp_min is not None else None
+            ),
+            "bank_capacity_full": capacity_full,
+            "bank_capacity_remaining": capacity_remaining,
+        }
@@ -2,116 +2,364 @@
 
 import asyncio
 from collections.abc import Callable
-from datetime import datetime, timedelta
+from contextlib import suppress
+from datetime import timedelta
+from ipaddress import IPv4Address, IPv4Interface, IPv4Network
 import logging
 import socket
 
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.event import async_track_time_interval
+import ifaddr
+
+from homeassistant.components import mqtt, network
+from homeassistant.core import HassJob, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
 
 _LOGGER = logging.getLogger(__name__)
 
-# Cache duration: 20 minutes
-IP_CACHE_DURATION = timedelta(minutes=20)
+SSDP_ADDR = "239.255.255.250"
+SSDP_PORT = 1900
+# M-SEARCH search target answered by the responder
+SEARCH_TARGET = "maybetaken"
+
+# Announcements burst quickly, then back off exponentially
+BURST_COUNT = 3
+BURST_INTERVAL = 2.0
+BACKOFF_FACTOR = 2.0
+MAX_INTERVAL = 900.0
+# The addresses of the host are read again at this interval to notice changes
+NETWORK_CHECK_INTERVAL = timedelta(minutes=5)
+
+
+class SSDPResponder(asyncio.DatagramProtocol):
+    """Answer M-SEARCH queries for the Solar Manager broker."""
+
+    def __init__(self, broadcaster: "SSDPBroadcaster") -> None:
+        """Initialize the responder."""
+        self._broadcaster = broadcaster
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        """Reply to M-SEARCH requests looking for Solar Manager."""
+        if not data.startswith(b"M-SEARCH"):
+            return
+        for line in data.decode(errors="ignore").splitlines()[1:]:
+            key, _, value = line.partition(":")
+            if key.strip().upper() == "ST" and SEARCH_TARGET in value.lower():
+                self._broadcaster.hass.async_create_task(
+                    self._broadcaster.respond(addr)
+                )
+                return
+
+    def error_received(self, exc: Exception) -> None:
+        """Log socket errors."""
+        _LOGGER.debug("SSDP responder error: %s", exc)
 
 
 class SSDPBroadcaster:
-    """Class to handle SSDP broadcasting for Solar Manager."""
+    """Class to handle SSDP broadcasting for Solar Manager.
+
+    Announcements are sent on every enabled network adapter. They burst on
+    start and whenever the network or a device changes, then back off
+    exponentially up to max_interval. The addresses are read again every few
+    minutes, a change counts as a network change. Once every expected serial
+    has been seen online announcing stops; M-SEARCH queries are still answered.
+    """
 
-    def __init__(self, hass: HomeAssistant, interval: float = 5.0) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        interval: float = 5.0,
+        max_interval: float = MAX_INTERVAL,
+    ) -> None:
         """Initialize the SSDP broadcaster."""
         self.hass = hass
         self.interval = interval
+        self.max_interval = max_interval
         self._timer_remove: Callable[[], None] | None = None
-        self._transport = None
-        self._sock = None
-        self._local_ip: str | None = None
-        self._last_ip_fetch: datetime | None = None
-
-    async def get_local_ip(self) -> str:
-        """Asynchronously get the local IP address, using cache if available."""
-        now = datetime.now()
-        # Use cached IP if available and not expired
-        if (
-            self._local_ip is not None
-            and self._last_ip_fetch is not None
-            and now - self._last_ip_fetch < IP_CACHE_DURATION
-        ):
-            _LOGGER.debug("Using cached local IP address: %s", self._local_ip)
-            return self._local_ip
-
-        # Fetch new IP
+        self._transports: dict[str, asyncio.DatagramTransport] = {}
+        self._responder = None
+        self._local_ips: dict[str, IPv4Network] | None = None
+        self._announced_ips: list[str] | None = None
+        self._unsub_connection: Callable[[], None] | None = None
+        self._unsub_network_check: Callable[[], None] | None = None
+        self._burst_left = BURST_COUNT
+        self._delay = interval
+        self._expected: set[str] = set()
+        self._online: set[str] = set()
+        self._job = HassJob(self.broadcast_once, cancel_on_shutdown=True)
+        self._started = False
+
+    async def async_get_local_ips(self) -> list[str]:
+        """Return the IPv4 addresses of the enabled network adapters.
+
+        The list is cached until the network is considered changed.
+        """
+        if self._local_ips is None:
+            self._local_ips = await self._async_read_local_ips()
+            _LOGGER.debug("Local IP addresses: %s", list(self._local_ips))
+        return list(self._local_ips)
+
+    async def _async_read_local_ips(self) -> dict[str, IPv4Network]:
+        """Read the current addresses of the adapters enabled in HA.
+
+        The network integration only reads the adapters on start, so their
+        current addresses are read from the host.
+        """
+        enabled = {
+            adapter["name"]
+            for adapter in await network.async_get_adapters(self.hass)
+            if adapter["enabled"]
+        }
+        local_ips = {}
+        for adapter in await self.hass.async_add_executor_job(ifaddr.get_adapters):
+            if adapter.nice_name not in enabled:
+                continue
+            for ip in adapter.ips:
+                if not ip.is_IPv4:
+                    continue
+                interface = IPv4Interface(f"{ip.ip}/{ip.network_prefix}")
+                if not interface.ip.is_loopback:
+                    local_ips[str(interface.ip)] = interface.network
+        if not local_ips:
+            source_ip = await network.async_get_source_ip(self.hass)
+            local_ips[source_ip] = IPv4Network(source_ip)
+        return local_ips
+
+    async def _async_check_network(self, now=None) -> None:
+        """Burst announcements again if the addresses of the host changed."""
+        if self._local_ips is None:
+            return
+        local_ips = await self._async_read_local_ips()
+        if local_ips != self._local_ips:
+            _LOGGER.info("Local IP addresses changed to %s", list(local_ips))
+            self._local_ips = local_ips
+            self.async_restart()
+
+    async def get_local_ip(self, peer: str | None = None) -> str:
+        """Return the local IP on the same subnet as peer, or the first one."""
+        local_ips = await self.async_get_local_ips()
+        if peer is not None:
+            with suppress(ValueError):
+                address = IPv4Address(peer)
+                for local_ip, subnet in self._local_ips.items():
+                    if address in subnet:
+                        return local_ip
+        return local_ips[0]
+
+    async def _ensure_transport(self, ip_address: str):
+        """Create the sending transport of an interface on first use."""
+        transport = self._transports.get(ip_address)
+        if transport is not None:
+            return transport
+
+        # Create a UDP socket sending multicast through this interface
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
         try:
-            # Create a UDP socket to determine local IP
-            loop = asyncio.get_running_loop()
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            sock.setsockopt(
+                socket.IPPROTO_IP,
+                socket.IP_MULTICAST_IF,
+                socket.inet_aton(ip_address),
+            )
+            sock.bind((ip_address, 0))
             sock.setblocking(False)
 
-            # Connect to an external address to get local IP
-            await loop.run_in_executor(None, lambda: sock.connect(("8.8.8.8", 80)))
-            local_ip = sock.getsockname()[0]
+            # Create asyncio UDP transport
+            loop = asyncio.get_running_loop()
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: asyncio.DatagramProtocol(), sock=sock
+            )
+        except OSError:
             sock.close()
-            self._local_ip = local_ip
-            self._last_ip_fetch = now
-            _LOGGER.debug("Local IP address retrieved: %s", local_ip)
-        except Exception as e:
-            _LOGGER.error("Failed to get local IP address: %s", e)
-            self._local_ip = "0.0.0.0"
-            self._last_ip_fetch = now
-        return self._local_ip
+            raise
+        self._transports[ip_address] = transport
+        return transport
 
-    async def send_ssdp_broadcast(self, ip_address: str):
+    def _close_transports(self, keep: list[str] | None = None) -> None:
+        """Close the sending transports of interfaces not in keep."""
+        for ip_address in list(self._transports):
+            if keep is None or ip_address not in keep:
+                self._transports.pop(ip_address).close()
+
+    async def send_ssdp_broadcast(
+        self, ip_address: str, target: tuple[str, int] = (SSDP_ADDR, SSDP_PORT)
+    ):
         """Send an SSDP broadcast message."""
         try:
-            # Create UDP socket
-            if not self._sock:
-                self._sock = socket.socket(
-                    socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP
-                )
-                self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-                self._sock.setblocking(False)
-
-            # Create asyncio UDP transport
-            if not self._transport:
-                loop = asyncio.get_running_loop()
-                self._transport, _ = await loop.create_datagram_endpoint(
-                    lambda: asyncio.DatagramProtocol(), sock=self._sock
-                )
+            transport = await self._ensure_transport(ip_address)
 
             # Prepare and send SSDP message
             ssdp_message = f"maybetaken: mqtt://{ip_address}".encode()
-            self._transport.sendto(ssdp_message, ("239.255.255.250", 1900))
+            transport.sendto(ssdp_message, target)
         except Exception as e:
-            _LOGGER.error("Failed to send SSDP broadcast: %s", e)
+            _LOGGER.error("Failed to send SSDP broadcast via %s: %s", ip_address, e)
+
+    async def respond(self, addr: tuple[str, int]) -> None:
+        """Answer an M-SEARCH query with a unicast announcement."""
+        ip_address = await self.get_local_ip(addr[0])
+        _LOGGER.debug("Answering M-SEARCH from %s with %s", addr[0], ip_address)
+        await self.send_ssdp_broadcast(ip_address, addr)
 
     async def broadcast_once(self, now=None) -> None:
-        """Send a single SSDP broadcast."""
-        ip_address = await self.get_local_ip()
-        await self.send_ssdp_broadcast(ip_address)
+        """Send a single SSDP broadcast and schedule the next one."""
+        self._timer_remove = None
+        local_ips = await self.async_get_local_ips()
+        if local_ips != self._announced_ips:
+            # New addresses: devices need to learn them quickly
+            self._close_transports(keep=local_ips)
+            if self._announced_ips is not None and self._responder:
+                # Rejoin the multicast group on the current interfaces
+                self._responder.close()
+                self._responder = None
+                await self._start_responder()
+            self._announced_ips = local_ips
+            self._reset_backoff()
+        if self._all_online():
+            _LOGGER.debug("All devices online, SSDP announcements paused")
+            return
 
-    async def start(self):
-        """Start the SSDP broadcasting timer."""
-        if self._timer_remove is None:
-            self._timer_remove = async_track_time_interval(
-                self.hass, self.broadcast_once, timedelta(seconds=self.interval)
-            )
-            _LOGGER.info(
-                "SSDP broadcaster started with interval %.2f seconds", self.interval
+        # Announce on every interface so multi-homed hosts reach all devices
+        for ip_address in local_ips:
+            await self.send_ssdp_broadcast(ip_address)
+
+        if self._burst_left > 0:
+            self._burst_left -= 1
+            delay = BURST_INTERVAL
+        else:
+            delay = self._delay
+            self._delay = min(self._delay * BACKOFF_FACTOR, self.max_interval)
+        self._schedule(delay)
+
+    def _all_online(self) -> bool:
+        """Return True when every expected serial has been seen online."""
+        return bool(self._expected) and self._expected <= self._online
+
+    def _reset_backoff(self) -> None:
+        """Restart the burst and the backoff sequence."""
+        self._burst_left = BURST_COUNT
+        self._delay = self.interval
+
+    def _schedule(self, delay: float) -> None:
+        """Schedule the next announcement."""
+        if self._timer_remove:
+            self._timer_remove()
+        self._timer_remove = async_call_later(self.hass, delay, self._job)
+
+    @callback
+    def async_restart(self) -> None:
+        """Burst announcements again, e.g. after a network change."""
+        if not self._started:
+            return
+        self._reset_backoff()
+        self._schedule(0)
+
+    @callback
+    def async_network_changed(self) -> None:
+        """Drop the cached addresses and burst announcements again."""
+        self._local_ips = None
+        self.async_restart()
+
+    @callback
+    def _async_mqtt_connection_changed(self, connected: bool) -> None:
+        """Treat a broker reconnect as a possible network change."""
+        if connected:
+            self.async_network_changed()
+
+    @callback
+    def async_expect(self, serial: str) -> None:
+        """Register a configured serial that must come online."""
+        self._expected.add(serial)
+        if serial not in self._online and self._timer_remove is None:
+            self.async_restart()
+
+    @callback
+    def async_forget(self, serial: str) -> None:
+        """Remove a serial that is no longer configured."""
+        self._expected.discard(serial)
+        self._online.discard(serial)
+
+    @callback
+    def async_device_online(self, serial: str) -> None:
+        """Record a device as online."""
+        self._online.add(serial)
+
+    @callback
+    def async_device_offline(self, serial: str) -> None:
+        """Record a device as offline and resume announcing."""
+        if serial not in self._online:
+            return
+        self._online.discard(serial)
+        # The device may have lost us because our address changed
+        self.async_network_changed()
+
+    async def _start_responder(self) -> None:
+        """Listen for M-SEARCH queries on the SSDP multicast group."""
+        sock = None
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if hasattr(socket, "SO_REUSEPORT"):
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            sock.bind(("", SSDP_PORT))
+            # Join the group on every interface so all subnets are answered
+            for ip_address in await self.async_get_local_ips():
+                try:
+                    sock.setsockopt(
+                        socket.IPPROTO_IP,
+                        socket.IP_ADD_MEMBERSHIP,
+                        socket.inet_aton(SSDP_ADDR) + socket.inet_aton(ip_address),
+                    )
+                except OSError as e:
+                    _LOGGER.debug("Cannot join SSDP group on %s: %s", ip_address, e)
+            sock.setblocking(False)
+            loop = asyncio.get_running_loop()
+            self._responder, _ = await loop.create_datagram_endpoint(
+                lambda: SSDPResponder(self), sock=sock
             )
+        except OSError as e:
+            if sock is not None:
+                sock.close()
+            _LOGGER.warning("SSDP M-SEARCH responder unavailable: %s", e)
+
+    async def start(self):
+        """Start the SSDP announcements and the M-SEARCH responder."""
+        if self._started:
+            return
+        self._started = True
+        await self._start_responder()
+        self._unsub_connection = mqtt.async_subscribe_connection_status(
+            self.hass, self._async_mqtt_connection_changed
+        )
+        self._unsub_network_check = async_track_time_interval(
+            self.hass, self._async_check_network, NETWORK_CHECK_INTERVAL
+        )
+        self.async_restart()
+        _LOGGER.info(
+            "SSDP broadcaster started, backing off from %.2f to %.2f seconds",
+            self.interval,
+            self.max_interval,
+        )
 
     async def stop(self):
         """Stop the SSDP broadcasting timer and clean up."""
+        self._started = False
         if self._timer_remove:
             self._timer_remove()
             self._timer_remove = None
 
-        if self._transport:
-            self._transport.close()
-            self._transport = None
+        if self._unsub_connection:
+            self._unsub_connection()
+            self._unsub_connection = None
+
+        if self._unsub_network_check:
+            self._unsub_network_check()
+            self._unsub_network_check = None
+
+        if self._responder:
+            self._responder.close()
+            self._responder = None
 
-        if self._sock:
-            self._sock.close()
-            self._sock = None
+        self._close_transports()
+        self._announced_ips = None
 
     async def async_cleanup(self):
         """Clean up resources."""
@@ -146,14 +146,15 @@ async def async_setup_entry(
     serial = entry.data[CONF_SERIAL]
     model = entry.data[CONF_MODEL]
     for item in hass.data[DOMAIN][serial].get(Platform.SWITCH, []):
-        unique_id = f"{item['name']}_{model}_{serial}"
+        device_id = item["device"].device_id
+        unique_id = f"{item['name']}_{model}_{device_id}"
         if item.get("diagnostic"):
             switch = SolarManagerDiagnosticSwitch(
                 name=item["name"],
                 model=model,
                 device=item["device"],
                 unique_id=unique_id,
-                device_id=serial,
+                device_id=device_id,
                 icon=item.get("icon"),
             )
         else:
@@ -163,7 +164,7 @@ async def async_setup_entry(
                 device=item["device"],
                 register=item["register"],
                 unique_id=unique_id,
-                device_id=serial,
+                device_id=device_id,
                 icon=item.get("icon"),
             )
         switches.append(switch)
@@ -0,0 +1,174 @@
+"""Columnar export of device telemetry.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+import logging
+from pathlib import Path
+import shutil
+import tempfile
+from typing import Any
+import zipfile
+
+_LOGGER = logging.getLogger(__name__)
+
+# Rows buffered in memory before they are written out
+CHUNK_SIZE = 65536
+
+RAW_COLUMNS: dict[str, str] = {
+    "timestamp": "float64",
+    "name": "uint16",
+    "value": "float32",
+}
+AGGREGATE_COLUMNS: dict[str, str] = {
+    "timestamp": "float64",
+    "name": "uint16",
+    "min": "float32",
+    "max": "float32",
+    "mean": "float32",
+}
+
+
+def available_format(requested: str = "auto") -> str:
+    """Return the export format to use, honouring installed libraries."""
+    if requested in ("auto", "arrow"):
+        try:
+            import pyarrow  # noqa: F401, PLC0415
+        except ImportError:
+            if requested == "arrow":
+                raise
+        else:
+            return "arrow"
+    import numpy  # noqa: F401, PLC0415
+
+    return "npz"
+
+
+def chunked(rows: Iterable[tuple], size: int = CHUNK_SIZE) -> Iterator[list[tuple]]:
+    """Group rows into lists of at most ``size`` rows."""
+    chunk: list[tuple] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _NpzWriter:
+    """Stream columns into an .npz archive through temporary column files."""
+
+    def __init__(self, path: Path, columns: dict[str, str], names: list[str]) -> None:
+        import numpy as np  # noqa: PLC0415
+
+        self._np = np
+        self._path = path
+        self._names = names
+        self._dtypes = {column: np.dtype(dtype) for column, dtype in columns.items()}
+        self._tmpdir = tempfile.TemporaryDirectory(dir=path.parent)
+        self._files = {
+            column: open(Path(self._tmpdir.name) / column, "wb")  # noqa: SIM115
+            for column in columns
+        }
+        self.rows = 0
+
+    def write(self, chunk: list[tuple]) -> None:
+        for position, (column, dtype) in enumerate(self._dtypes.items()):
+            values = self._np.fromiter(
+                (row[position] for row in chunk), dtype, len(chunk)
+            )
+            self._files[column].write(values.tobytes())
+        self.rows += len(chunk)
+
+    def close(self) -> None:
+        np = self._np
+        with zipfile.ZipFile(self._path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for column, dtype in self._dtypes.items():
+                self._files[column].close()
+                with (
+                    archive.open(f"{column}.npy", "w", force_zip64=True) as member,
+                    open(Path(self._tmpdir.name) / column, "rb") as source,
+                ):
+                    np.lib.format.write_array_header_2_0(
+                        member,
+                        {
+                            "descr": np.lib.format.dtype_to_descr(dtype),
+                            "fortran_order": False,
+                            "shape": (self.rows,),
+                        },
+                    )
+                    shutil.copyfileobj(source, member)
+            with archive.open("names.npy", "w") as member:
+                np.lib.format.write_array(member, np.array(self._names, dtype=str))
+        self._tmpdir.cleanup()
+
+
+class _ArrowWriter:
+    """Stream record batches into an Arrow IPC stream file."""
+
+    def __init__(self, path: Path, columns: dict[str, str], names: list[str]) -> None:
+        import pyarrow as pa  # noqa: PLC0415
+
+        self._pa = pa
+        self._columns = columns
+        self._names = pa.array(names, pa.string())
+        fields = [
+            pa.field(column, pa.dictionary(pa.uint16(), pa.string()))
+            if column == "name"
+            else pa.field(column, getattr(pa, dtype)())
+            for column, dtype in columns.items()
+        ]
+        self._schema = pa.schema(fields)
+        self._sink = pa.OSFile(str(path), "wb")
+        self._writer = pa.ipc.new_stream(self._sink, self._schema)
+        self.rows = 0
+
+    def write(self, chunk: list[tuple]) -> None:
+        pa = self._pa
+        arrays = []
+        for position, (column, dtype) in enumerate(self._columns.items()):
+            values = [row[position] for row in chunk]
+            if column == "name":
+                arrays.append(
+                    pa.DictionaryArray.from_arrays(
+                        pa.array(values, pa.uint16()), self._names
+                    )
+                )
+            else:
+                arrays.append(pa.array(values, getattr(pa, dtype)()))
+        self._writer.write_batch(pa.record_batch(arrays, schema=self._schema))
+        self.rows += len(chunk)
+
+    def close(self) -> None:
+        self._writer.close()
+        self._sink.close()
+
+
+def export_rows(
+    path: Path,
+    export_format: str,
+    columns: dict[str, str],
+    names: list[str],
+    rows: Iterable[tuple],
+) -> int:
+    """Write rows to a columnar file chunk by chunk and return the row count.
+
+    The ``name`` column holds indexes into ``names``, which is stored alongside
+    the data ("names" array in .npz, dictionary in Arrow).
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    writer_class = _ArrowWriter if export_format == "arrow" else _NpzWriter
+    writer: Any = writer_class(path, columns, names)
+    try:
+        for chunk in chunked(rows):
+            writer.write(chunk)
+    finally:
+        writer.close()
+    _LOGGER.info("Exported %d rows to %s", writer.rows, path)
+    return writer.rows
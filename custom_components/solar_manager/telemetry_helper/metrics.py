@@ -0,0 +1,282 @@
+"""Per-device performance counters and histograms for Solar Manager.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+import time
+from typing import Any
+
+# Bucket upper bounds in nanoseconds for decode and dispatch times
+TIME_BUCKETS_NS = (
+    25_000,
+    50_000,
+    100_000,
+    250_000,
+    500_000,
+    1_000_000,
+    2_500_000,
+    5_000_000,
+    10_000_000,
+    50_000_000,
+)
+# Bucket upper bounds in nanoseconds for the delay from a command to its poll
+LATENCY_BUCKETS_NS = (
+    50_000_000,
+    100_000_000,
+    250_000_000,
+    500_000_000,
+    1_000_000_000,
+    2_500_000_000,
+    5_000_000_000,
+    10_000_000_000,
+    30_000_000_000,
+)
+# Bucket upper bounds in nanoseconds for transport and state latency
+TRANSPORT_BUCKETS_NS = (
+    5_000_000,
+    10_000_000,
+    25_000_000,
+    50_000_000,
+    100_000_000,
+    250_000_000,
+    500_000_000,
+    1_000_000_000,
+    5_000_000_000,
+)
+# Bucket upper bounds for entities updated per frame
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Identical frames within this window are counted as redeliveries
+DUPLICATE_WINDOW_NS = 1_000_000_000
+# Commands without a frame of their block within this window are not timed
+COMMAND_TIMEOUT_NS = 30_000_000_000
+# Sequence jumps larger than this are a device restart, not lost frames
+MAX_SEQUENCE_GAP = 1000
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum and maximum."""
+
+    __slots__ = ("bounds", "buckets", "count", "maximum", "total")
+
+    def __init__(self, bounds: tuple[int, ...]) -> None:
+        """Initialize an empty histogram with the given bucket bounds."""
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.maximum = 0
+
+    def observe(self, value: int) -> None:
+        """Add a value."""
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean value, or None if nothing was observed."""
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> int | None:
+        """Return the upper bound of the bucket holding the q-quantile."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.maximum)
+        return self.maximum
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram as plain data."""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": self.maximum,
+            "buckets": {
+                **{f"le_{bound}": c for bound, c in zip(self.bounds, self.buckets)},
+                "inf": self.buckets[-1],
+            },
+        }
+
+
+class DeviceMetrics:
+    """Counters and histograms describing the notify path of one device.
+
+    Everything is plain integer arithmetic on monotonic nanosecond clocks so
+    the metrics can stay enabled in production.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self.frames = 0
+        self.bytes = 0
+        self.duplicate_frames = 0
+        self.parse_ns = Histogram(TIME_BUCKETS_NS)
+        self.dispatch_ns = Histogram(TIME_BUCKETS_NS)
+        self.entities_updated = Histogram(COUNT_BUCKETS)
+        self.command_poll_ns = Histogram(LATENCY_BUCKETS_NS)
+        self.lost_frames = 0
+        self.transport_lag_ns = Histogram(TRANSPORT_BUCKETS_NS)
+        self.state_latency_ns = Histogram(TRANSPORT_BUCKETS_NS)
+        # Pending command as (slave id, address, sent ns)
+        self._command: tuple[int, int, int] | None = None
+        self._last_sequence: int | None = None
+        self._last_device_ms = 0
+        self._min_offset_ns: int | None = None
+        self._last_frames: dict[bytes, tuple[bytes, int]] = {}
+
+    def count_duplicate(self, frame: bytes, now_ns: int) -> None:
+        """Count frame if it repeats the previous frame of its block.
+
+        Duplicates are only counted, they are still handled like any frame.
+        """
+        header = frame[:6]
+        last = self._last_frames.get(header)
+        self._last_frames[header] = (frame, now_ns)
+        if last is not None and last[0] == frame:
+            if now_ns - last[1] < DUPLICATE_WINDOW_NS:
+                self.duplicate_frames += 1
+
+    def command_sent(self, data: bytes) -> None:
+        """Start timing a write command unless one is already pending.
+
+        The module does not acknowledge writes, so the command is timed until
+        the written register is next polled, see frame_processed. Commands are
+        [slave][write command][address:2]..., see ProtocolCodec.pack; anything
+        else is not timed.
+        """
+        if self._command is not None or not isinstance(data, (bytes, bytearray)):
+            return
+        if len(data) >= 4:
+            address = int.from_bytes(data[2:4], "big")
+            self._command = (data[0], address, time.monotonic_ns())
+
+    def frame_processed(
+        self,
+        size: int,
+        received_ns: int,
+        parse_ns: int,
+        updates: int,
+        trailer: tuple[int, int] | None = None,
+        block: tuple[int, int, int] | None = None,
+    ) -> None:
+        """Record a decoded frame.
+
+        Dispatch time is the handling time of the frame minus its decode time.
+        The first frame of the block holding the written address, given as
+        (slave id, first address, end address), ends the timing of a command.
+        This is the delay until the next poll of the written register, mostly
+        set by the poll interval, not the reply time of the write itself.
+        """
+        done_ns = time.monotonic_ns()
+        if trailer is not None:
+            self._trace_frame(trailer, received_ns, done_ns)
+        self.frames += 1
+        self.bytes += size
+        self.parse_ns.observe(parse_ns)
+        self.dispatch_ns.observe(max(done_ns - received_ns - parse_ns, 0))
+        self.entities_updated.observe(updates)
+        if self._command is not None:
+            slave_id, address, sent_ns = self._command
+            delay = received_ns - sent_ns
+            if delay > COMMAND_TIMEOUT_NS:
+                self._command = None
+            elif (
+                block is not None
+                and block[0] == slave_id
+                and block[1] <= address < block[2]
+            ):
+                self.command_poll_ns.observe(delay)
+                self._command = None
+
+    def _trace_frame(
+        self, trailer: tuple[int, int], received_ns: int, done_ns: int
+    ) -> None:
+        """Track sequence gaps and latency from a (sequence, device ms) trailer.
+
+        Device and host clocks are not synchronised, so the transport lag is
+        the clock offset of this frame above the smallest offset seen since
+        the device started, i.e. the delay beyond the fastest delivery.
+        """
+        sequence, device_ms = trailer
+        if device_ms < self._last_device_ms:
+            # Device restarted: its uptime clock and sequence start over
+            self._last_sequence = None
+            self._min_offset_ns = None
+        self._last_device_ms = device_ms
+
+        if self._last_sequence is not None:
+            gap = (sequence - self._last_sequence - 1) & 0xFFFF
+            if gap <= MAX_SEQUENCE_GAP:
+                self.lost_frames += gap
+        self._last_sequence = sequence
+
+        offset_ns = received_ns - device_ms * 1_000_000
+        if self._min_offset_ns is None or offset_ns < self._min_offset_ns:
+            self._min_offset_ns = offset_ns
+        lag_ns = offset_ns - self._min_offset_ns
+        self.transport_lag_ns.observe(lag_ns)
+        self.state_latency_ns.observe(lag_ns + max(done_ns - received_ns, 0))
+
+    def sensor_values(self) -> dict[str, Any]:
+        """Return the values shown by the diagnostic metric sensors."""
+        return {
+            "frames_received": self.frames,
+            "bytes_received": self.bytes,
+            "duplicate_frames": self.duplicate_frames,
+            "parse_time": _ns_to_ms(self.parse_ns.mean),
+            "dispatch_time": _ns_to_ms(self.dispatch_ns.mean),
+            "entities_per_frame": (
+                None
+                if self.entities_updated.mean is None
+                else round(self.entities_updated.mean, 2)
+            ),
+            "command_poll_delay": _ns_to_ms(self.command_poll_ns.mean),
+            "lost_frames": self.lost_frames,
+            "transport_lag": _ns_to_ms(self.transport_lag_ns.mean),
+            "state_latency": _ns_to_ms(self.state_latency_ns.mean),
+        }
+
+    def histogram(self, name: str) -> Histogram | None:
+        """Return the histogram behind a metric sensor, if any."""
+        return {
+            "parse_time": self.parse_ns,
+            "dispatch_time": self.dispatch_ns,
+            "entities_per_frame": self.entities_updated,
+            "command_poll_delay": self.command_poll_ns,
+            "transport_lag": self.transport_lag_ns,
+            "state_latency": self.state_latency_ns,
+        }.get(name)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all metrics as plain data."""
+        return {
+            "frames_received": self.frames,
+            "bytes_received": self.bytes,
+            "duplicate_frames": self.duplicate_frames,
+            "parse_ns": self.parse_ns.as_dict(),
+            "dispatch_ns": self.dispatch_ns.as_dict(),
+            "entities_updated": self.entities_updated.as_dict(),
+            "command_poll_ns": self.command_poll_ns.as_dict(),
+            "lost_frames": self.lost_frames,
+            "transport_lag_ns": self.transport_lag_ns.as_dict(),
+            "state_latency_ns": self.state_latency_ns.as_dict(),
+        }
+
+
+def _ns_to_ms(value: float | None) -> float | None:
+    """Convert nanoseconds to milliseconds rounded for display."""
+    return None if value is None else round(value / 1_000_000, 3)
@@ -0,0 +1,82 @@
+"""On-demand profiler for the Solar Manager MQTT hot path.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable, Generator
+import cProfile
+from pathlib import Path
+from typing import Any
+
+
+class _Suspend:
+    """Hand what a coroutine yielded to the event loop, outside the profile."""
+
+    __slots__ = ("_yielded",)
+
+    def __init__(self, yielded: Any) -> None:
+        """Initialize with the object the profiled coroutine yielded."""
+        self._yielded = yielded
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        """Yield the object to the task and return what it resumes with."""
+        return (yield self._yielded)
+
+
+class HotPathProfiler:
+    """cProfile restricted to MQTT callbacks of the selected serials.
+
+    The profiler is only enabled while a matching callback runs: the callback
+    coroutine is stepped by hand and the profiler is disabled whenever it
+    suspends, so the stats cover frame validation, parse_data and
+    handle_notify of those devices but not other work of the event loop.
+    """
+
+    def __init__(self, serials: set[str] | None = None) -> None:
+        """Initialize a profiler for the given serials, or all if None."""
+        self._serials = serials
+        self._profile = cProfile.Profile()
+        self._depth = 0
+        self.calls = 0
+
+    def matches(self, topic: str) -> bool:
+        """Return True if callbacks of this topic are profiled."""
+        return self._serials is None or topic.split("/", 1)[0] in self._serials
+
+    async def run(self, callback: Callable[..., Awaitable[None]], *args) -> None:
+        """Run a callback with the profiler enabled while it is running."""
+        self.calls += 1
+        coro = callback(*args)
+        value: Any = None
+        error: BaseException | None = None
+        while True:
+            try:
+                yielded = self._step(coro, value, error)
+            except StopIteration:
+                return
+            try:
+                value, error = await _Suspend(yielded), None
+            except BaseException as e:  # noqa: BLE001
+                # Cancellation and errors of the awaited future go to the callback
+                value, error = None, e
+
+    def _step(self, coro: Any, value: Any, error: BaseException | None) -> Any:
+        """Run the coroutine up to its next suspension with the profiler on."""
+        self._depth += 1
+        if self._depth == 1:
+            self._profile.enable()
+        try:
+            return coro.throw(error) if error is not None else coro.send(value)
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                self._profile.disable()
+
+    def dump(self, path: Path) -> None:
+        """Write the collected stats to path (blocking)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._profile.dump_stats(path)
@@ -0,0 +1,121 @@
+"""Learning which entities of a Solar Manager device never receive data.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+
+Protocol files describe every register a model may have, but a given
+firmware or battery only populates part of them. Segment reads return the
+registers it leaves empty as well, usually as zero, so a register counts as
+populated once it reads a value other than zero or changes. During an
+observation window the populated names are collected; the silent ones are
+stored and their entities are not created on later starts.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from datetime import timedelta
+import logging
+from typing import Any
+
+from custom_components.solar_manager.const import DOMAIN
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.pruning"
+SAVE_DELAY = 10
+
+# The data of a device is sampled at this interval while it is observed
+SAMPLE_INTERVAL = timedelta(seconds=30)
+# Samples taken while the device was online before the result is final,
+# 2880 samples of 30 s make an observation window of a day, so that values
+# which only move with daylight or load are seen
+MIN_SAMPLES = 2880
+
+
+class PruningStore:
+    """Shared persistent storage of the learned silent names of all devices."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the pruning store."""
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._data: dict[str, Any] | None = None
+
+    async def async_load(self) -> None:
+        """Load the stored results once."""
+        if self._data is None:
+            self._data = await self._store.async_load() or {}
+
+    def get(self, key: str) -> list[str] | None:
+        """Return the silent names of a device, None if not learned yet."""
+        return self._data.get(key)
+
+    def set(self, key: str, names: list[str] | None) -> None:
+        """Store or forget the silent names of a device."""
+        if names is None:
+            if self._data.pop(key, None) is None:
+                return
+        else:
+            self._data[key] = names
+        self._store.async_delay_save(lambda: self._data, SAVE_DELAY)
+
+
+async def async_get_pruning_store(hass: HomeAssistant) -> PruningStore:
+    """Return the shared pruning store, loading it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if "pruning_store" not in domain_data:
+        domain_data["pruning_store"] = PruningStore(hass)
+    store = domain_data["pruning_store"]
+    await store.async_load()
+    return store
+
+
+class RegisterPruner:
+    """Observe the populated names of one device until the result is final."""
+
+    def __init__(self, hass: HomeAssistant, key: str) -> None:
+        """Initialize the pruner with the storage key of the device."""
+        self.hass = hass
+        self._key = key
+        self._store: PruningStore | None = None
+        self.seen: set[str] = set()
+        self._first: dict[str, Any] = {}
+        self.samples = 0
+
+    async def async_load(self) -> set[str] | None:
+        """Return the learned silent names, None if still to be observed."""
+        self._store = await async_get_pruning_store(self.hass)
+        names = self._store.get(self._key)
+        return None if names is None else set(names)
+
+    async def async_reset(self) -> None:
+        """Forget the learned result, all entities are created again."""
+        self._store = await async_get_pruning_store(self.hass)
+        self._store.set(self._key, None)
+
+    def sample(self, data: Mapping[str, Any], online: bool) -> bool:
+        """Add the names populated in data; return True once final."""
+        first = self._first
+        for name, value in data.items():
+            if value is None or name in self.seen:
+                continue
+            if value != first.setdefault(name, value) or value not in (0, ""):
+                self.seen.add(name)
+        if online:
+            self.samples += 1
+        return self.samples >= MIN_SAMPLES
+
+    def finish(self, silent: set[str]) -> None:
+        """Store the silent names of the device."""
+        self._store.set(self._key, sorted(silent))
+        _LOGGER.info(
+            "Learned %d silent entities of %s: %s",
+            len(silent),
+            self._key,
+            ", ".join(sorted(silent)) or "none",
+        )
@@ -0,0 +1,289 @@
+"""Memory-mapped ring buffer store for high-resolution device samples.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+import json
+import logging
+import math
+import mmap
+from pathlib import Path
+import struct
+import time
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+MAGIC = b"SMTS"
+VERSION = 1
+
+# Downsampling tiers: (label, step in seconds, retention in seconds)
+TIERS: tuple[tuple[str, int, int], ...] = (
+    ("raw", 1, 3600),
+    ("1m", 60, 2 * 86400),
+    ("15m", 900, 90 * 86400),
+)
+
+HEADER = struct.Struct("<4sHHI")  # magic, version, tier count, name table length
+TIER_HEADER = struct.Struct("<III")  # capacity, head, count
+NAME_TABLE_SIZE = 8192
+RAW_RECORD = struct.Struct("<dHxxf")  # timestamp, name index, value
+AGG_RECORD = struct.Struct("<dHxxfff")  # timestamp, name index, min, max, mean
+
+
+class _Tier:
+    """Location and write position of one tier inside the mapped file."""
+
+    __slots__ = ("capacity", "count", "head", "header_offset", "offset", "record")
+
+    def __init__(
+        self, header_offset: int, offset: int, capacity: int, record: struct.Struct
+    ) -> None:
+        self.header_offset = header_offset
+        self.offset = offset
+        self.capacity = capacity
+        self.record = record
+        self.head = 0
+        self.count = 0
+
+
+class TimeSeriesStore:
+    """Per-device fixed-record ring buffers with 1 s, 1 min and 15 min tiers.
+
+    Raw samples are taken at most once per second and folded into per-minute
+    and per-quarter-hour min/max/mean records in memory. Every sample costs a
+    fixed number of record writes into a memory-mapped file whose size only
+    depends on the number of tracked names, so disk usage is bounded.
+    """
+
+    def __init__(self, path: Path, names: list[str]) -> None:
+        """Initialize the store for the given tracked names."""
+        self.path = path
+        self.names = names
+        self._index = {name: index for index, name in enumerate(names)}
+        self._file = None
+        self._map: mmap.mmap | None = None
+        self._tiers: dict[str, _Tier] = {}
+        self._last_second: int | None = None
+        # Open aggregates per aggregated tier: [bucket id, mins, maxs, sums, counts]
+        self._aggregates: dict[str, list[Any]] = {}
+
+    def _layout(self) -> int:
+        """Compute tier positions and return the total file size."""
+        offset = HEADER.size + TIER_HEADER.size * len(TIERS) + NAME_TABLE_SIZE
+        self._tiers = {}
+        for position, (label, step, retention) in enumerate(TIERS):
+            record = RAW_RECORD if label == "raw" else AGG_RECORD
+            capacity = len(self.names) * (retention // step)
+            header_offset = HEADER.size + TIER_HEADER.size * position
+            self._tiers[label] = _Tier(header_offset, offset, capacity, record)
+            offset += capacity * record.size
+        return offset
+
+    def open(self) -> None:
+        """Create or reuse the backing file and map it (blocking I/O)."""
+        size = self._layout()
+        name_table = json.dumps(self.names).encode()
+        if len(name_table) > NAME_TABLE_SIZE:
+            raise ValueError(f"Too many names for time series store {self.path}")
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        reuse = self.path.exists() and self.path.stat().st_size == size
+        self._file = open(self.path, "r+b" if reuse else "w+b")  # noqa: SIM115
+        if not reuse:
+            self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+        magic, version, tiers, table_len = HEADER.unpack_from(self._map, 0)
+        table_start = HEADER.size + TIER_HEADER.size * len(TIERS)
+        stored_names = bytes(self._map[table_start : table_start + table_len])
+        if (
+            magic != MAGIC
+            or version != VERSION
+            or tiers != len(TIERS)
+            or stored_names != name_table
+        ):
+            _LOGGER.info("Initializing time series store %s", self.path)
+            HEADER.pack_into(self._map, 0, MAGIC, VERSION, len(TIERS), len(name_table))
+            self._map[table_start : table_start + len(name_table)] = name_table
+            for tier in self._tiers.values():
+                TIER_HEADER.pack_into(self._map, tier.header_offset, tier.capacity, 0, 0)
+        else:
+            for tier in self._tiers.values():
+                _, tier.head, tier.count = TIER_HEADER.unpack_from(
+                    self._map, tier.header_offset
+                )
+
+        count = len(self.names)
+        for label, _, _ in TIERS[1:]:
+            self._aggregates[label] = [
+                None,
+                [math.inf] * count,
+                [-math.inf] * count,
+                [0.0] * count,
+                [0] * count,
+            ]
+
+    def close(self) -> None:
+        """Flush and unmap the backing file (blocking I/O)."""
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _append(self, tier: _Tier, *values: Any) -> None:
+        """Write one record at the head of a tier ring."""
+        tier.record.pack_into(
+            self._map, tier.offset + tier.head * tier.record.size, *values
+        )
+        tier.head = (tier.head + 1) % tier.capacity
+        if tier.count < tier.capacity:
+            tier.count += 1
+        TIER_HEADER.pack_into(
+            self._map, tier.header_offset, tier.capacity, tier.head, tier.count
+        )
+
+    def _fold(self, position: int, bucket: int, index: int, values: tuple) -> None:
+        """Fold (min, max, sum, count) into the open aggregate of a tier."""
+        aggregate = self._aggregates[TIERS[position][0]]
+        if aggregate[0] != bucket:
+            self._close_bucket(position)
+            aggregate[0] = bucket
+        low, high, total, count = values
+        _, mins, maxs, sums, counts = aggregate
+        if low < mins[index]:
+            mins[index] = low
+        if high > maxs[index]:
+            maxs[index] = high
+        sums[index] += total
+        counts[index] += count
+
+    def _close_bucket(self, position: int) -> None:
+        """Write the open aggregate of a tier and pass it to the next tier."""
+        label, step, _ = TIERS[position]
+        aggregate = self._aggregates[label]
+        bucket, mins, maxs, sums, counts = aggregate
+        if bucket is None:
+            return
+        tier = self._tiers[label]
+        timestamp = float(bucket * step)
+        for index, count in enumerate(counts):
+            if not count:
+                continue
+            self._append(
+                tier, timestamp, index, mins[index], maxs[index], sums[index] / count
+            )
+            if position + 1 < len(TIERS):
+                next_step = TIERS[position + 1][1]
+                self._fold(
+                    position + 1,
+                    bucket * step // next_step,
+                    index,
+                    (mins[index], maxs[index], sums[index], count),
+                )
+            mins[index] = math.inf
+            maxs[index] = -math.inf
+            sums[index] = 0.0
+            counts[index] = 0
+        aggregate[0] = None
+
+    def sample(self, data: dict[str, Any]) -> None:
+        """Record the current value of every tracked name, once per second."""
+        if self._map is None:
+            return
+        now = time.time()
+        second = int(now)
+        if second == self._last_second:
+            return
+        self._last_second = second
+
+        raw = self._tiers["raw"]
+        minute = second // TIERS[1][1]
+        for name, index in self._index.items():
+            value = data.get(name)
+            if not isinstance(value, (int, float)):
+                continue
+            self._append(raw, float(second), index, value)
+            self._fold(1, minute, index, (value, value, value, 1))
+
+    def snapshot(self, tier: str = "raw") -> RingSnapshot | None:
+        """Copy the records of a tier, oldest first.
+
+        Records are appended on the event loop, so the copy is taken there and
+        can then be read in an executor while sampling goes on.
+        """
+        if self._map is None or tier not in self._tiers:
+            return None
+        ring = self._tiers[tier]
+        size = ring.record.size
+        first = (ring.head - ring.count) % ring.capacity if ring.capacity else 0
+        end = first + ring.count
+        start = ring.offset + first * size
+        if end <= ring.capacity:
+            data = self._map[start : ring.offset + end * size]
+        else:
+            data = self._map[start : ring.offset + ring.capacity * size] + self._map[
+                ring.offset : ring.offset + (end - ring.capacity) * size
+            ]
+        return RingSnapshot(self.names, self._index, ring.record, ring.count, data)
+
+
+class RingSnapshot:
+    """Records of one tier copied out of the store, safe to read in a thread."""
+
+    __slots__ = ("_index", "count", "data", "names", "record")
+
+    def __init__(
+        self,
+        names: list[str],
+        index: dict[str, int],
+        record: struct.Struct,
+        count: int,
+        data: bytes,
+    ) -> None:
+        self.names = names
+        self._index = index
+        self.record = record
+        self.count = count
+        self.data = data
+
+    def iter_records(
+        self,
+        name: str | None = None,
+        start: float | None = None,
+        end: float | None = None,
+    ) -> Iterator[tuple]:
+        """Yield records from oldest to newest.
+
+        Raw records are (timestamp, name index, value); aggregated records are
+        (timestamp, name index, min, max, mean).
+        """
+        wanted = self._index.get(name) if name is not None else None
+        if name is not None and wanted is None:
+            return
+        for record in self.record.iter_unpack(self.data):
+            if wanted is not None and record[1] != wanted:
+                continue
+            if start is not None and record[0] < start:
+                continue
+            if end is not None and record[0] > end:
+                continue
+            yield record
+
+    def query(
+        self,
+        name: str | None = None,
+        start: float | None = None,
+        end: float | None = None,
+    ) -> Iterator[tuple]:
+        """Yield records like iter_records, with names resolved."""
+        for timestamp, index, *values in self.iter_records(name, start, end):
+            yield (timestamp, self.names[index], *values)
@@ -0,0 +1,151 @@
+"""Streaming rolling statistics for Solar Manager registers.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# Window labels accepted in the "statistics" list of a protocol register
+WINDOWS: dict[str, float] = {
+    "1m": 60.0,
+    "15m": 900.0,
+    "1h": 3600.0,
+}
+
+# Number of ring buffer buckets per window, bounds memory and query cost
+BUCKETS = 60
+
+
+class RollingWindow:
+    """Min/max/mean over a sliding time window kept in a ring of buckets.
+
+    Each bucket covers 1/BUCKETS of the window and holds the aggregate of the
+    samples that fell into it, so adding a sample is O(1) and a query combines
+    a fixed number of buckets regardless of the sample rate. Samples carry the
+    seconds their value was held, the mean is weighted by time and not by the
+    number of samples.
+    """
+
+    __slots__ = ("_ids", "_maxs", "_mins", "_sums", "_weights", "_width")
+
+    def __init__(self, window: float) -> None:
+        """Initialize the window with its length in seconds."""
+        self._width = window / BUCKETS
+        self._ids = [-1] * BUCKETS
+        self._mins = [math.inf] * BUCKETS
+        self._maxs = [-math.inf] * BUCKETS
+        self._sums = [0.0] * BUCKETS
+        self._weights = [0.0] * BUCKETS
+
+    def add(self, value: float, now: float, weight: float = 0.0) -> None:
+        """Add a sample held for weight seconds until the given monotonic time."""
+        bucket_id = int(now // self._width)
+        index = bucket_id % BUCKETS
+        if self._ids[index] != bucket_id:
+            self._ids[index] = bucket_id
+            self._mins[index] = value
+            self._maxs[index] = value
+            self._sums[index] = value * weight
+            self._weights[index] = weight
+            return
+        if value < self._mins[index]:
+            self._mins[index] = value
+        if value > self._maxs[index]:
+            self._maxs[index] = value
+        self._sums[index] += value * weight
+        self._weights[index] += weight
+
+    def stats(self, now: float) -> tuple[float, float, float] | None:
+        """Return (min, max, mean) of the window, or None without samples."""
+        oldest = int(now // self._width) - BUCKETS + 1
+        low, high, total, weight = math.inf, -math.inf, 0.0, 0.0
+        for index in range(BUCKETS):
+            if self._ids[index] < oldest:
+                continue
+            low = min(low, self._mins[index])
+            high = max(high, self._maxs[index])
+            total += self._sums[index]
+            weight += self._weights[index]
+        if low > high:
+            return None
+        # Without weight the window holds only the first value after a gap
+        return low, high, total / weight if weight else low
+
+
+class RollingStatistics:
+    """Rolling windows for the registers that opted in via the protocol file."""
+
+    def __init__(self) -> None:
+        """Initialize an empty set of tracked values."""
+        self._windows: dict[str, dict[str, RollingWindow]] = {}
+        self._last: dict[str, tuple[float, float]] = {}  # Name: (value, time)
+
+    def configure(self, registers: dict[int, dict[str, Any]]) -> None:
+        """Track every register declaring a "statistics" list of windows."""
+        self._windows = {}
+        self._last = {}
+        for register, details in registers.items():
+            labels = details.get("statistics")
+            name = details.get("name")
+            if not labels or not name:
+                continue
+            windows = {}
+            for label in labels:
+                if label not in WINDOWS:
+                    _LOGGER.warning(
+                        "Unknown statistics window %s for register %s", label, register
+                    )
+                    continue
+                windows[label] = RollingWindow(WINDOWS[label])
+            if windows:
+                self._windows[name] = windows
+
+    def __bool__(self) -> bool:
+        """Return True if any value is tracked."""
+        return bool(self._windows)
+
+    def sample(self, data: dict[str, Any]) -> None:
+        """Sample the current value of every tracked name.
+
+        The previous value is added with the time it was held, so sampling
+        more often does not shift the mean towards any value. A name without
+        value ends its interval without adding it.
+        """
+        now = time.monotonic()
+        for name, windows in self._windows.items():
+            value = data.get(name)
+            last = self._last.get(name)
+            if not isinstance(value, (int, float)):
+                self._last.pop(name, None)
+                continue
+            self._last[name] = (value, now)
+            if last is None:
+                for window in windows.values():
+                    window.add(value, now)
+            else:
+                # The last value was held until now, the new one starts here
+                for window in windows.values():
+                    window.add(last[0], now, now - last[1])
+                    window.add(value, now)
+
+    def get(self, name: str) -> dict[str, tuple[float, float, float]]:
+        """Return {window label: (min, max, mean)} for a tracked name."""
+        windows = self._windows.get(name)
+        if not windows:
+            return {}
+        now = time.monotonic()
+        result = {}
+        for label, window in windows.items():
+            stats = window.stats(now)
+            if stats is not None:
+                result[label] = stats
+        return result
@@ -5,6 +5,7 @@ licensed under Creative Commons
 Attribution-NonCommercial-NoDerivatives 4.0 International.
 """
 
+from datetime import time
 from typing import Any
 
 from homeassistant.components.time import TimeEntity
@@ -12,7 +13,6 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.util import dt as dt_util
 
 from .const import _LOGGER, CONF_MODEL, CONF_SERIAL, DOMAIN
 
@@ -47,33 +47,15 @@ class SolarManagerTime(TimeEntity):
         _LOGGER.debug("Created time entity: name=%s, unique_id=%s", name, unique_id)
 
     @property
-    def native_value(self):
-        """Return the state of the time entity."""
-        time_str = self._device.get_dict(self._name)
-        _LOGGER.debug("Native value for %s: %s", self._name, time_str)
-        if time_str is None:
-            return None
-        try:
-            time_obj = dt_util.parse_time(time_str)
-            if time_obj is None:
-                _LOGGER.warning("Invalid time for %s: %s", self._name, time_str)
-                return None
-
-        except (ValueError, TypeError, AttributeError) as e:
-            _LOGGER.error(
-                "Failed to parse time for %s: %s, time_str=%s", self._name, e, time_str
-            )
-            return None
-        return time_obj
+    def native_value(self) -> time | None:
+        """Return the time decoded by the device."""
+        value = self._device.get_dict(self._name)
+        return value if isinstance(value, time) else None
 
-    async def async_set_value(self, value):
+    async def async_set_value(self, value: time) -> None:
         """Set a new time value."""
         try:
-            hour = value.hour
-            minute = value.minute
-            # Send hour and minute as a combined value (no interval_days packing)
-            packed_value = (hour << 8) | minute
-            await self._device.parser.write_data(self._register, packed_value)
+            await self._device.parser.write_data(self._register, value)
             self.async_write_ha_state()
         except ValueError as e:
             _LOGGER.error("Invalid time value for %s: %s", self._name, e)
@@ -81,14 +63,7 @@ class SolarManagerTime(TimeEntity):
     @property
     def available(self) -> bool:
         """Return if the entity is available."""
-        time_str = self._device.get_dict(self._name)
-        if time_str is None:
-            _LOGGER.debug("Entity %s unavailable: value is None", self._name)
-            return False
-        valid = bool(time_str)
-        if not valid:
-            _LOGGER.debug("Entity %s unavailable: no time set", self._name)
-        return valid
+        return self.native_value is not None
 
     @property
     def device_info(self):
@@ -116,14 +91,15 @@ async def async_setup_entry(
         if not name or not isinstance(name, str) or not name.strip():
             _LOGGER.error("Skipping entity with invalid name: %s, item=%s", name, item)
             continue
-        unique_id = f"{name}_{model}_{serial}"
+        device_id = item["device"].device_id
+        unique_id = f"{name}_{model}_{device_id}"
         entity = SolarManagerTime(
             name=name,
             model=model,
             device=item["device"],
             register=item.get("register"),
             unique_id=unique_id,
-            device_id=serial,
+            device_id=device_id,
             icon=item.get("icon"),
         )
         entities.append(entity)
@@ -0,0 +1,267 @@
+"""Command line entry point of the Solar Manager fleet simulator.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+
+Emulates a fleet of devices publishing notify frames to a broker, for load
+testing a Home Assistant host together with the per-device metrics of the
+integration. Statistics are printed as one JSON line per interval.
+
+    python -m simulator --devices "JK BMS=10,Megarevo=5" --rate 2
+    python -m simulator --devices DDSU666=200 --broker 192.168.1.10:1883
+    python -m simulator --devices PZEMV04=50 --list
+    python -m simulator --check
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import random
+import sys
+import time
+
+from .broker import MQTTBroker
+from .device import MODELS, SimulatedDevice, load_protocol
+from .transport import PahoTransport
+
+# Event loop lag is sampled with a timer of this period
+LAG_PERIOD = 0.1
+
+
+def parse_devices(spec: str) -> dict[str, int]:
+    """Parse "MODEL=COUNT,..." with model names or codes, case insensitive."""
+    names = {name.lower(): name for name in MODELS}
+    names.update({config["code"].lower(): name for name, config in MODELS.items()})
+    fleet: dict[str, int] = {}
+    for item in spec.split(","):
+        name, _, count = item.partition("=")
+        model = names.get(name.strip().lower())
+        if model is None:
+            raise argparse.ArgumentTypeError(
+                f"unknown model {name.strip()!r}, choose from {', '.join(MODELS)}"
+            )
+        fleet[model] = fleet.get(model, 0) + int(count or 1)
+    return fleet
+
+
+def build_fleet(
+    transport, fleet: dict[str, int], prefix: str, loss: float
+) -> list[SimulatedDevice]:
+    """Create the devices of a fleet with serials like SIMJK0001."""
+    devices = []
+    for model, count in fleet.items():
+        protocol_data = load_protocol(MODELS[model]["protocol"])
+        code = MODELS[model]["code"]
+        devices.extend(
+            SimulatedDevice(
+                transport, f"{prefix}{code}{index:04d}", model, protocol_data, loss
+            )
+            for index in range(1, count + 1)
+        )
+    return devices
+
+
+class RecordingTransport:
+    """Transport keeping the published messages instead of sending them."""
+
+    def __init__(self) -> None:
+        """Initialize an empty recording."""
+        self.messages: list[tuple[str, bytes]] = []
+        self.dropped = 0
+
+    def publish(self, topic: str, payload: bytes) -> None:
+        """Record a message."""
+        self.messages.append((topic, payload))
+
+    def subscribe(self, topic: str, callback) -> None:
+        """Ignore subscriptions, nothing is ever received."""
+
+
+def check(prefix: str) -> int:
+    """Decode a poll cycle of every model with the decoder CLI.
+
+    Prints one JSON line per model and returns the number of models whose
+    frames could not be decoded and printed.
+    """
+    # cli.py sits in the package directory put on sys.path by .device
+    from cli import FrameDecoder, run  # noqa: PLC0415
+
+    failures = 0
+    for model, config in MODELS.items():
+        transport = RecordingTransport()
+        protocol_data = load_protocol(config["protocol"])
+        device = SimulatedDevice(
+            transport, f"{prefix}{config['code']}0001", model, protocol_data
+        )
+        device.start()
+        device.poll()
+        output = io.StringIO()
+        record = {"model": model, "frames": device.frames}
+        try:
+            run(transport.messages, FrameDecoder(protocol_data, False), output)
+        except Exception as e:  # noqa: BLE001
+            record["error"] = f"{type(e).__name__}: {e}"
+            failures += 1
+        else:
+            record["records"] = len(output.getvalue().splitlines())
+        print(json.dumps(record), flush=True)
+    return failures
+
+
+class LagMonitor:
+    """Largest delay of the simulator event loop since the last reading.
+
+    A growing lag means the simulator itself is saturated and the measured
+    rates are no longer what was asked for.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the monitor."""
+        self._max_lag = 0.0
+
+    async def run(self) -> None:
+        """Sample the loop lag until cancelled."""
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(LAG_PERIOD)
+            self._max_lag = max(self._max_lag, time.monotonic() - start - LAG_PERIOD)
+
+    def read(self) -> float:
+        """Return and reset the largest lag in milliseconds."""
+        lag, self._max_lag = self._max_lag, 0.0
+        return round(lag * 1000, 1)
+
+
+async def report(
+    devices: list[SimulatedDevice], transport, interval: float, lag: LagMonitor
+) -> None:
+    """Print fleet statistics every interval seconds."""
+    last_frames = last_bytes = last_out = 0
+    last_time = time.monotonic()
+    while True:
+        await asyncio.sleep(interval)
+        now = time.monotonic()
+        elapsed = now - last_time
+        frames = sum(device.frames for device in devices)
+        sent = sum(device.bytes for device in devices)
+        record = {
+            "time": round(time.time(), 3),
+            "devices": len(devices),
+            "frames_per_s": round((frames - last_frames) / elapsed, 1),
+            "kbytes_per_s": round((sent - last_bytes) / elapsed / 1024, 1),
+            "frames": frames,
+            "lost_frames": sum(device.lost_frames for device in devices),
+            "commands": sum(device.commands for device in devices),
+            "configs": sum(device.configs for device in devices),
+            "heartbeats": sum(device.heartbeats for device in devices),
+            "loop_lag_ms": lag.read(),
+            "dropped": transport.dropped,
+        }
+        if isinstance(transport, MQTTBroker):
+            record["clients"] = transport.clients
+            record["messages_out_per_s"] = round(
+                (transport.messages_out - last_out) / elapsed, 1
+            )
+            last_out = transport.messages_out
+        print(json.dumps(record), flush=True)
+        last_frames, last_bytes, last_time = frames, sent, now
+
+
+async def simulate(args: argparse.Namespace) -> None:
+    """Run the fleet until the duration has passed or it is interrupted."""
+    if args.broker:
+        host, _, port = args.broker.partition(":")
+        transport = PahoTransport(
+            host, int(port or 1883), args.username, args.password
+        )
+    else:
+        host, _, port = args.listen.rpartition(":")
+        transport = MQTTBroker(host or "0.0.0.0", int(port))
+    await transport.start()
+
+    devices = build_fleet(transport, args.devices, args.prefix, args.loss)
+    lag = LagMonitor()
+    tasks = [
+        asyncio.create_task(lag.run()),
+        asyncio.create_task(report(devices, transport, args.stats, lag)),
+    ]
+    for device in devices:
+        device.start()
+        tasks.append(asyncio.create_task(device.run(args.rate)))
+    try:
+        await asyncio.sleep(args.duration or float("inf"))
+    finally:
+        for task in tasks:
+            task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await asyncio.gather(*tasks)
+        await transport.stop()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the fleet simulator."""
+    parser = argparse.ArgumentParser(
+        prog="python -m simulator", description=__doc__.split("\n", 1)[0]
+    )
+    parser.add_argument(
+        "--devices",
+        type=parse_devices,
+        help='fleet as "MODEL=COUNT,...", e.g. "JK BMS=10,Megarevo=5"',
+    )
+    parser.add_argument(
+        "--rate", type=float, default=1.0, help="poll cycles per second per device"
+    )
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--broker", help="external MQTT broker as host[:port]")
+    target.add_argument(
+        "--listen",
+        default="0.0.0.0:1883",
+        help="address of the built-in broker as [host:]port (default %(default)s)",
+    )
+    parser.add_argument("--username", help="MQTT username for --broker")
+    parser.add_argument("--password", help="MQTT password for --broker")
+    parser.add_argument("--prefix", default="SIM", help="serial number prefix")
+    parser.add_argument(
+        "--loss", type=float, default=0.0, help="fraction of frames to drop"
+    )
+    parser.add_argument(
+        "--stats", type=float, default=10.0, help="seconds between statistics"
+    )
+    parser.add_argument("--duration", type=float, help="stop after seconds")
+    parser.add_argument("--seed", type=int, help="random seed for repeatable runs")
+    parser.add_argument(
+        "--list", action="store_true", help="print model and serial per device"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="decode one poll cycle of every model with the decoder CLI and exit",
+    )
+    parser.add_argument("--verbose", action="store_true", help="log debug messages")
+    args = parser.parse_args(argv)
+    if args.check:
+        return 1 if check(args.prefix) else 0
+    if args.devices is None:
+        parser.error("--devices is required")
+    if args.rate <= 0:
+        parser.error("--rate must be positive")
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    random.seed(args.seed)
+
+    if args.list:
+        for device in build_fleet(None, args.devices, args.prefix, 0):
+            print(f"{device.model}\t{device.serial}")
+        return 0
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(simulate(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""In-process MQTT broker stand-in for the Solar Manager fleet simulator.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+
+A minimal MQTT 3.1.1 server: CONNECT, PUBLISH (QoS 0-2 in, QoS 0 out),
+SUBSCRIBE, UNSUBSCRIBE, PINGREQ and DISCONNECT, with retained messages.
+There is no authentication, persistence or will message. Home Assistant can
+connect to it like to any broker, and the simulated devices publish to it
+directly without a network round trip, so the broker itself is never the
+bottleneck being measured.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import struct
+
+from .transport import MessageCallback, SubscriptionIndex, topic_matches
+
+_LOGGER = logging.getLogger(__name__)
+
+CONNECT = 1
+PUBLISH = 3
+PUBACK = 4
+PUBREC = 5
+PUBREL = 6
+PUBCOMP = 7
+SUBSCRIBE = 8
+SUBACK = 9
+UNSUBSCRIBE = 10
+UNSUBACK = 11
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+
+# Messages to a client are dropped while its send buffer is above this size
+MAX_CLIENT_BUFFER = 16 * 1024 * 1024
+
+
+def _encode_length(length: int) -> bytes:
+    """Encode the remaining length of a packet."""
+    encoded = bytearray()
+    while True:
+        byte, length = length % 128, length // 128
+        encoded.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(encoded)
+
+
+def _packet(header: int, body: bytes) -> bytes:
+    """Build a packet from its first byte and body."""
+    return bytes((header,)) + _encode_length(len(body)) + body
+
+
+def _read_string(data: bytes, offset: int) -> tuple[str, int]:
+    """Read a length-prefixed UTF-8 string and return it with the next offset."""
+    (length,) = struct.unpack_from(">H", data, offset)
+    offset += 2
+    return data[offset : offset + length].decode("utf-8"), offset + length
+
+
+def _publish_packet(topic: str, payload: bytes, retain: bool = False) -> bytes:
+    """Build a QoS 0 PUBLISH packet."""
+    encoded_topic = topic.encode("utf-8")
+    return _packet(
+        PUBLISH << 4 | retain,
+        struct.pack(">H", len(encoded_topic)) + encoded_topic + payload,
+    )
+
+
+class _LocalSubscriber:
+    """A subscription of an in-process client."""
+
+    __slots__ = ("callback",)
+
+    def __init__(self, callback: MessageCallback) -> None:
+        """Initialize the subscriber."""
+        self.callback = callback
+
+    def deliver(self, topic: str, payload: bytes, retain: bool = False) -> None:
+        """Deliver a message."""
+        self.callback(topic, payload)
+
+
+class _ClientSession:
+    """A client connected over TCP."""
+
+    def __init__(
+        self, broker: MQTTBroker, writer: asyncio.StreamWriter, client_id: str
+    ) -> None:
+        """Initialize the session."""
+        self.broker = broker
+        self.writer = writer
+        self.client_id = client_id
+        self.filters: set[str] = set()
+
+    def deliver(self, topic: str, payload: bytes, retain: bool = False) -> None:
+        """Send a message unless the client cannot keep up."""
+        if self.writer.is_closing():
+            return
+        if self.writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+            self.broker.dropped += 1
+            return
+        self.writer.write(_publish_packet(topic, payload, retain))
+        self.broker.messages_out += 1
+
+    def close(self) -> None:
+        """Remove the subscriptions and close the connection."""
+        for topic_filter in self.filters:
+            self.broker.index.remove(topic_filter, self)
+        self.filters.clear()
+        self.writer.close()
+
+
+class MQTTBroker:
+    """MQTT broker stand-in with in-process publish and subscribe."""
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 1883) -> None:
+        """Initialize the broker."""
+        self._host = host
+        self._port = port
+        self._server: asyncio.Server | None = None
+        self._sessions: dict[str, _ClientSession] = {}
+        self._retained: dict[str, bytes] = {}
+        self.index = SubscriptionIndex()
+        self.messages_in = 0
+        self.messages_out = 0
+        self.dropped = 0
+
+    @property
+    def clients(self) -> int:
+        """Return the number of connected TCP clients."""
+        return len(self._sessions)
+
+    async def start(self) -> None:
+        """Start listening for TCP clients."""
+        self._server = await asyncio.start_server(
+            self._handle_client, self._host, self._port
+        )
+        _LOGGER.info("MQTT broker listening on %s:%d", self._host, self._port)
+
+    async def stop(self) -> None:
+        """Disconnect all clients and stop listening."""
+        for session in list(self._sessions.values()):
+            session.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def subscribe(self, topic_filter: str, callback: MessageCallback) -> None:
+        """Call callback for every message matching topic_filter."""
+        subscriber = _LocalSubscriber(callback)
+        self.index.add(topic_filter, subscriber)
+        self._send_retained(topic_filter, subscriber)
+
+    def publish(self, topic: str, payload: bytes | str, retain: bool = False) -> None:
+        """Route a message to all matching subscribers."""
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        self.messages_in += 1
+        if retain:
+            if payload:
+                self._retained[topic] = payload
+            else:
+                self._retained.pop(topic, None)
+        for subscriber in self.index.match(topic):
+            subscriber.deliver(topic, payload)
+
+    def _send_retained(self, topic_filter: str, subscriber) -> None:
+        """Deliver the retained messages matching a new subscription."""
+        for topic, payload in self._retained.items():
+            if topic_matches(topic_filter, topic):
+                subscriber.deliver(topic, payload, True)
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve one TCP client until it disconnects."""
+        session = None
+        try:
+            header, body = await asyncio.wait_for(_read_packet(reader), 10)
+            if header >> 4 != CONNECT:
+                return
+            session, keepalive = self._connect(body, writer)
+            if session is None:
+                return
+            # Clients must send something within 1.5 keepalive periods
+            timeout = keepalive * 1.5 if keepalive else None
+            while True:
+                header, body = await asyncio.wait_for(_read_packet(reader), timeout)
+                if not self._handle_packet(session, header, body):
+                    return
+        except (
+            asyncio.IncompleteReadError,
+            TimeoutError,
+            ConnectionError,
+            UnicodeDecodeError,
+            ValueError,
+            struct.error,
+        ) as e:
+            _LOGGER.debug("Client connection closed: %r", e)
+        finally:
+            if session is not None:
+                if self._sessions.get(session.client_id) is session:
+                    del self._sessions[session.client_id]
+                session.close()
+            else:
+                writer.close()
+
+    def _connect(
+        self, body: bytes, writer: asyncio.StreamWriter
+    ) -> tuple[_ClientSession | None, int]:
+        """Accept a CONNECT packet and return the new session and keepalive."""
+        protocol, offset = _read_string(body, 0)
+        level, _flags, keepalive = struct.unpack_from(">BBH", body, offset)
+        if protocol not in ("MQTT", "MQIsdp") or level not in (3, 4):
+            # Unacceptable protocol version, e.g. MQTT 5
+            writer.write(_packet(0x20, b"\x00\x01"))
+            return None, 0
+        client_id, _ = _read_string(body, offset + 4)
+        client_id = client_id or f"anonymous-{id(writer)}"
+        previous = self._sessions.pop(client_id, None)
+        if previous is not None:
+            previous.close()
+        session = self._sessions[client_id] = _ClientSession(self, writer, client_id)
+        writer.write(_packet(0x20, b"\x00\x00"))
+        _LOGGER.info("Client %s connected", client_id)
+        return session, keepalive
+
+    def _handle_packet(self, session: _ClientSession, header: int, body: bytes) -> bool:
+        """Handle a packet of a connected client, return False to disconnect."""
+        packet_type = header >> 4
+        writer = session.writer
+        if packet_type == PUBLISH:
+            qos = (header >> 1) & 0x03
+            topic, offset = _read_string(body, 0)
+            if qos:
+                packet_id = body[offset : offset + 2]
+                offset += 2
+                ack = PUBACK if qos == 1 else PUBREC
+                writer.write(_packet(ack << 4, packet_id))
+            self.publish(topic, body[offset:], bool(header & 0x01))
+        elif packet_type == PUBREL:
+            writer.write(_packet(PUBCOMP << 4, body[:2]))
+        elif packet_type == SUBSCRIBE:
+            offset = 2
+            granted = bytearray()
+            topic_filters = []
+            while offset < len(body):
+                topic_filter, offset = _read_string(body, offset)
+                offset += 1  # Requested QoS, messages are always sent with QoS 0
+                topic_filters.append(topic_filter)
+                granted.append(0)
+            writer.write(_packet(SUBACK << 4, body[:2] + bytes(granted)))
+            for topic_filter in topic_filters:
+                if topic_filter not in session.filters:
+                    session.filters.add(topic_filter)
+                    self.index.add(topic_filter, session)
+                self._send_retained(topic_filter, session)
+        elif packet_type == UNSUBSCRIBE:
+            offset = 2
+            while offset < len(body):
+                topic_filter, offset = _read_string(body, offset)
+                if topic_filter in session.filters:
+                    session.filters.discard(topic_filter)
+                    self.index.remove(topic_filter, session)
+            writer.write(_packet(UNSUBACK << 4, body[:2]))
+        elif packet_type == PINGREQ:
+            writer.write(_packet(PINGRESP << 4, b""))
+        elif packet_type == DISCONNECT:
+            return False
+        return True
+
+
+async def _read_packet(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    """Read one packet and return its first byte and body."""
+    header = (await reader.readexactly(1))[0]
+    length = 0
+    for shift in range(0, 28, 7):
+        byte = (await reader.readexactly(1))[0]
+        length |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            break
+    else:
+        raise ValueError("Malformed remaining length")
+    return header, await reader.readexactly(length)
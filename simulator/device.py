@@ -0,0 +1,462 @@
+"""Simulated Solar Manager devices.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+
+A simulated device keeps a register image per read command, built from the
+same protocol files the integration decodes with, and publishes every
+segment of its configuration as a TLD notify frame once per poll cycle.
+Measurements wander around a typical value for their unit, energy counters
+keep increasing and settings hold their value until a command writes them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from pathlib import Path
+import random
+import struct
+import sys
+import time
+from typing import Any
+
+PACKAGE_DIR = (
+    Path(__file__).resolve().parent.parent / "custom_components" / "solar_manager"
+)
+# Import the protocol engine without the Home Assistant package, as cli.py does
+sys.path.append(str(PACKAGE_DIR))
+from protocol_helper.codec import (  # noqa: E402
+    BCD_TYPES,
+    FRAME_TRAILER,
+    TYPE_FORMATS,
+    bcd_encode,
+    crc16_modbus,
+    load_protocol_file,
+    swap_words,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+PROTOCOL_DIR = PACKAGE_DIR / "device_protocol"
+
+# Simulated models as named in the config flow, with the serial number code
+MODELS = {
+    "MakeSkyBlue": {"protocol": "makeskyblue", "code": "MSB"},
+    "MakeSkyBlue MPPT": {"protocol": "makeskybluemppt", "code": "MPPT"},
+    "MakeSkyBlue IoTrix": {
+        "protocol": "makeskyblue",
+        "code": "IOT",
+        "topic_segment": "makeskyblue/iotrix",
+        "diagnostics": False,
+    },
+    "JK BMS": {"protocol": "jkbms", "code": "JK"},
+    "DDSU666": {"protocol": "ddsu666", "code": "DDSU"},
+    "Megarevo": {"protocol": "megarevo", "code": "MGR"},
+    "PZEMV04": {"protocol": "pzem_v04", "code": "PZEM"},
+}
+
+# Entities that hold a setting rather than a measurement
+SETTING_TYPES = {"number", "select", "switch", "time", "button", "text"}
+
+# Typical value per unit, refined by a keyword in the register name
+BASE_VALUES = {
+    "VOLT": 230.0,
+    "AMPERE": 5.0,
+    "MILLIAMPERE": 500.0,
+    "WATT": 1000.0,
+    "KILO_WATT": 1.0,
+    "VAR": 100.0,
+    "CELSIUS": 30.0,
+    "HERTZ": 50.0,
+    "Hz": 50.0,
+    "PERCENTAGE": 80.0,
+    "AMPERE_HOUR": 100.0,
+    "KILOWATT_HOUR": 100.0,
+    "mΩ": 0.5,
+}
+NAME_BASE_VALUES = (
+    ("cell", "VOLT", 3.3),
+    ("pv", "VOLT", 120.0),
+    ("bat", "VOLT", 52.0),
+    ("factor", "PERCENTAGE", 98.0),
+)
+# Relative step of the random walk per poll and its bound around the base
+WALK_STEP = 0.005
+WALK_RANGE = 0.05
+# Energy counters grow by this many kWh per poll
+ENERGY_STEP = 0.01
+DIAGNOSTICS_INTERVAL = 30
+
+
+def load_protocol(name: str) -> dict[str, Any]:
+    """Load a protocol file by name (blocking)."""
+    return load_protocol_file(PROTOCOL_DIR / f"{name}.json")
+
+
+class RegisterModel:
+    """Value generator and encoder for one register."""
+
+    __slots__ = (
+        "base",
+        "bcd",
+        "changing",
+        "counter",
+        "maximum",
+        "memory",
+        "minimum",
+        "offset",
+        "position",
+        "scale",
+        "struct",
+        "swap",
+        "value",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        details: dict[str, Any],
+        memory: bytearray,
+        position: int,
+        endian: str,
+    ) -> None:
+        """Initialize the register at a byte position of its register image."""
+        fmt, _size = TYPE_FORMATS[details["type"]]
+        self.struct = struct.Struct(f"{endian}{fmt}")
+        self.bcd = details["type"] in BCD_TYPES
+        self.swap = self.struct.size > 2 and details.get("word_order") == "little"
+        self.memory = memory
+        self.position = position
+        self.scale = details.get("scale", 1) or 1
+        self.offset = details.get("offset", 0)
+        self.minimum = details.get("min_value")
+        self.maximum = details.get("max_value")
+        unit = details.get("unit") or ""
+        self.counter = details.get("state_class") in ("total", "total_increasing")
+        self.changing = self.counter or (
+            details.get("sensor_type") not in SETTING_TYPES
+            and "enum" not in details
+            and "bitmask" not in details
+            and "fields" not in details
+            and unit in BASE_VALUES
+        )
+        if "enum" in details:
+            # First documented state, stored raw
+            raw = next(iter(details["enum_map"]))
+            self.base = (raw - self.offset) * self.scale
+        elif self.minimum is not None:
+            self.base = self.minimum
+        elif self.changing:
+            self.base = BASE_VALUES.get(unit, 100.0)
+            for keyword, keyword_unit, value in NAME_BASE_VALUES:
+                if unit == keyword_unit and keyword in name:
+                    self.base = value
+                    break
+        else:
+            self.base = 0
+        if self.maximum is not None:
+            self.base = min(self.base, self.maximum)
+        self.value = self.base
+
+    def step(self) -> None:
+        """Advance the value by one poll."""
+        if self.counter:
+            self.value += ENERGY_STEP
+            return
+        spread = abs(self.base) * WALK_RANGE
+        self.value += random.gauss(0, abs(self.base) * WALK_STEP)
+        self.value = min(max(self.value, self.base - spread), self.base + spread)
+        if self.minimum is not None:
+            self.value = max(self.value, self.minimum)
+        if self.maximum is not None:
+            self.value = min(self.value, self.maximum)
+
+    def encode(self) -> None:
+        """Write the raw value into the register image."""
+        if self.struct.format[-1] in "fd":
+            raw = self.value / self.scale + self.offset
+        else:
+            raw = int(round(self.value / self.scale + self.offset))
+            bits = self.struct.size * 8
+            if self.bcd:
+                raw = bcd_encode(min(max(raw, 0), 10 ** (bits // 4) - 1))
+            elif self.struct.format[-1].islower():
+                raw = min(max(raw, -(1 << (bits - 1))), (1 << (bits - 1)) - 1)
+            else:
+                raw = min(max(raw, 0), (1 << bits) - 1)
+        self.struct.pack_into(self.memory, self.position, raw)
+        if self.swap:
+            window = slice(self.position, self.position + self.struct.size)
+            self.memory[window] = swap_words(self.memory[window])
+
+
+class SimulatedDevice:
+    """One simulated device publishing notify frames to a transport."""
+
+    def __init__(
+        self,
+        transport,
+        serial: str,
+        model: str,
+        protocol_data: dict[str, Any],
+        loss: float = 0.0,
+    ) -> None:
+        """Initialize the device and its register images."""
+        config = MODELS[model]
+        self.transport = transport
+        self.serial = serial
+        self.model = model
+        self._protocol_data = protocol_data
+        self._base_topic = (
+            f"{serial}/{config['topic_segment']}"
+            if "topic_segment" in config
+            else serial
+        )
+        self._diagnostics = config.get("diagnostics", True)
+        self._loss = loss
+        self._endian = ">" if protocol_data.get("endianness", "BE") == "BE" else "<"
+        self._byte_addressing = protocol_data.get("addressing") == "byte"
+        self._inbound_crc = protocol_data.get("inbound_crc", False)
+        self._trailer = protocol_data.get("frame_trailer", False)
+        self._memory: dict[int, bytearray] = {}
+        self._bits: dict[int, bytearray] = {}
+        self._models: list[RegisterModel] = []
+        self._segments: list[dict[str, Any]] = []
+        self._led = True
+        self._sequence = 0
+        self._started = time.monotonic()
+        self.frames = 0
+        self.bytes = 0
+        self.commands = 0
+        self.configs = 0
+        self.heartbeats = 0
+        self.lost_frames = 0
+        self._build_memory()
+        self._configure(protocol_data.get("segments", []))
+
+    def _position(self, address: int) -> int:
+        """Return the byte position of a register address in its image."""
+        return address if self._byte_addressing else address * 2
+
+    def _build_memory(self) -> None:
+        """Allocate the register images and set every register to its start value."""
+        extents: dict[int, int] = {}
+        for segment in self._protocol_data.get("segments", []):
+            command = segment["read_command"]
+            end = self._position(segment["start_address"]) + segment["length"] * 2
+            extents[command] = max(extents.get(command, 0), end)
+        for register, details in self._protocol_data.get("registers", {}).items():
+            command, address = register >> 20, register & 0xFFFFF
+            if command in (1, 2):
+                extents[command] = max(extents.get(command, 0), address + 1)
+            elif details.get("type") in TYPE_FORMATS:
+                size = details.get("length") or TYPE_FORMATS[details["type"]][1] or 0
+                end = self._position(address) + size
+                extents[command] = max(extents.get(command, 0), end)
+
+        for command, end in extents.items():
+            if command in (1, 2):
+                self._bits[command] = bytearray(end)
+            else:
+                self._memory[command] = bytearray(end)
+
+        for register, details in self._protocol_data.get("registers", {}).items():
+            command, address = register >> 20, register & 0xFFFFF
+            data_type = details.get("type")
+            if command in (1, 2) or command not in self._memory:
+                continue
+            position = self._position(address)
+            if data_type == "STRING":
+                text = f"SIM {self.serial}".encode("ascii")
+                length = details.get("length", 0)
+                self._memory[command][position : position + length] = text[
+                    :length
+                ].ljust(length, b"\x00")
+            elif data_type in TYPE_FORMATS:
+                model = RegisterModel(
+                    details.get("name", ""),
+                    details,
+                    self._memory[command],
+                    position,
+                    self._endian,
+                )
+                model.encode()
+                if model.changing:
+                    self._models.append(model)
+
+    def _configure(self, segments: list[dict[str, Any]]) -> None:
+        """Use the segments of a configuration for the following polls."""
+        self._segments = [
+            {
+                "header": struct.pack(
+                    f"{self._endian}BBHH",
+                    segment.get("slave_id", 1),
+                    segment["read_command"],
+                    segment["start_address"],
+                    segment["length"],
+                ),
+                **segment,
+            }
+            for segment in segments
+            if segment.get("read_command") in self._memory
+            or segment.get("read_command") in self._bits
+        ]
+
+    def topic(self, *parts: str) -> str:
+        """Build a topic below the base topic of the device."""
+        return f"{self._base_topic}/{'/'.join(parts)}"
+
+    def start(self) -> None:
+        """Subscribe to the device topics and announce the device."""
+        self.transport.subscribe(self.topic("config"), self._handle_config)
+        self.transport.subscribe(self.topic("control", "#"), self._handle_control)
+        self.transport.subscribe(
+            self.topic("host", "heartbeat"), self._handle_heartbeat
+        )
+        self.transport.publish(self.topic("online"), b"online")
+        if self._diagnostics:
+            self.publish_diagnostics()
+
+    async def run(self, rate: float) -> None:
+        """Publish a poll cycle rate times per second until cancelled."""
+        interval = 1 / rate
+        # Spread the devices over the poll interval instead of polling in lockstep
+        await asyncio.sleep(random.uniform(0, interval))
+        next_poll = time.monotonic()
+        next_diagnostics = next_poll + DIAGNOSTICS_INTERVAL
+        while True:
+            self.poll()
+            now = time.monotonic()
+            if self._diagnostics and now >= next_diagnostics:
+                self.publish_diagnostics()
+                next_diagnostics = now + DIAGNOSTICS_INTERVAL
+            next_poll += interval
+            if next_poll < now:
+                # Overloaded: skip the missed polls instead of bursting
+                next_poll = now
+            await asyncio.sleep(next_poll - now)
+
+    def poll(self) -> None:
+        """Advance all measurements and publish every segment."""
+        for model in self._models:
+            model.step()
+            model.encode()
+        for segment in self._segments:
+            self.publish_segment(segment)
+
+    def publish_segment(self, segment: dict[str, Any]) -> None:
+        """Encode the current values of a segment and publish the frame."""
+        command = segment["read_command"]
+        length = segment["length"]
+        if command in self._bits:
+            bits = self._bits[command]
+            data = bytearray((length + 7) // 8)
+            for index in range(length):
+                address = segment["start_address"] + index
+                if address < len(bits) and bits[address]:
+                    data[index // 8] |= 1 << (index % 8)
+        else:
+            memory = self._memory[command]
+            start = self._position(segment["start_address"])
+            data = memory[start : start + length * 2].ljust(length * 2, b"\x00")
+        frame = segment["header"] + data
+        if self._trailer:
+            uptime_ms = int((time.monotonic() - self._started) * 1000)
+            frame += FRAME_TRAILER.pack(self._sequence, uptime_ms & 0xFFFFFFFF)
+            self._sequence = (self._sequence + 1) & 0xFFFF
+        if self._inbound_crc:
+            frame += struct.pack("<H", crc16_modbus(frame))
+        if self._loss and random.random() < self._loss:
+            self.lost_frames += 1
+            return
+        self.transport.publish(self.topic("notify"), frame)
+        self.frames += 1
+        self.bytes += len(frame)
+
+    def publish_diagnostics(self) -> None:
+        """Publish the diagnostics JSON of the device."""
+        self.transport.publish(
+            self.topic("diagnostics"),
+            json.dumps(
+                {
+                    "ssid": "simulator",
+                    "rssi": random.randint(-75, -40),
+                    "led": "on" if self._led else "off",
+                }
+            ),
+        )
+
+    def restart(self) -> None:
+        """Restart the device: the frame sequence and uptime start over."""
+        self._sequence = 0
+        self._started = time.monotonic()
+        self.transport.publish(self.topic("online"), b"online")
+
+    def _handle_config(self, topic: str, payload: bytes) -> None:
+        """Use the segments sent by the integration."""
+        try:
+            segments = json.loads(payload)["segments"]
+            self._configure(segments)
+        except (KeyError, TypeError, ValueError) as e:
+            _LOGGER.warning("%s: invalid config %r: %s", self.serial, payload, e)
+            return
+        self.configs += 1
+
+    def _handle_heartbeat(self, topic: str, payload: bytes) -> None:
+        """Count a heartbeat of the host."""
+        self.heartbeats += 1
+
+    def _handle_control(self, topic: str, payload: bytes) -> None:
+        """Handle commands, restarts and LED changes."""
+        action = topic.rsplit("/", 1)[-1]
+        if action == "cmd":
+            self.commands += 1
+            self._write(payload)
+        elif action in ("restart", "reconfig"):
+            self.restart()
+        elif action == "led":
+            self._led = payload in (b"on", "on")
+            if self._diagnostics:
+                self.publish_diagnostics()
+
+    def _write(self, payload: bytes) -> None:
+        """Apply a Modbus write and answer with the segments it touched."""
+        if len(payload) < 6:
+            return
+        _slave_id, write_command, address, value = struct.unpack_from(
+            ">BBHH", payload
+        )
+        if write_command == 5:
+            bits = self._bits.get(1)
+            if bits is not None and address < len(bits):
+                bits[address] = value == 0xFF00
+            touched = {(1, address)}
+        else:
+            words = [value]
+            if write_command == 16:
+                # [slave][16][address:2][count:2][words], see ProtocolCodec.pack
+                count = min(value, (len(payload) - 6) // 2)
+                words = struct.unpack_from(f">{count}H", payload, 6)
+            elif write_command != 6:
+                return
+            memory = self._memory.get(3)
+            if memory is None:
+                return
+            step = 2 if self._byte_addressing else 1
+            touched = set()
+            for index, word in enumerate(words):
+                position = self._position(address + index * step)
+                if position + 2 <= len(memory):
+                    struct.pack_into(f"{self._endian}H", memory, position, word)
+                touched.add((3, address + index * step))
+        for segment in self._segments:
+            start = segment["start_address"]
+            end = start + segment["length"] * (2 if self._byte_addressing else 1)
+            if any(
+                command == segment["read_command"] and start <= address < end
+                for command, address in touched
+            ):
+                self.publish_segment(segment)
@@ -0,0 +1,158 @@
+"""MQTT transports for the Solar Manager fleet simulator.
+
+Solar Manager or solar_manager © 2025 by @maybetaken is
+licensed under Creative Commons
+Attribution-NonCommercial-NoDerivatives 4.0 International.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import sys
+
+MessageCallback = Callable[[str, bytes], None]
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    """Return True if an MQTT topic filter with + and # matches a topic."""
+    filter_levels = topic_filter.split("/")
+    topic_levels = topic.split("/")
+    for index, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if index >= len(topic_levels):
+            return False
+        if level not in ("+", topic_levels[index]):
+            return False
+    return len(filter_levels) == len(topic_levels)
+
+
+class SubscriptionIndex:
+    """Topic filters and their subscribers, indexed for fast matching.
+
+    Every simulated device subscribes to its own topics, so a fleet has
+    thousands of filters. Exact filters are looked up directly and wildcard
+    filters are grouped by their first level, which is the serial number.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self._exact: dict[str, set] = {}
+        self._wildcard: dict[str | None, dict[str, set]] = {}
+
+    def add(self, topic_filter: str, subscriber) -> None:
+        """Add a subscriber for a topic filter."""
+        if "+" not in topic_filter and "#" not in topic_filter:
+            self._exact.setdefault(topic_filter, set()).add(subscriber)
+            return
+        first = topic_filter.split("/", 1)[0]
+        group = self._wildcard.setdefault(
+            None if first in ("+", "#") else first, {}
+        )
+        group.setdefault(topic_filter, set()).add(subscriber)
+
+    def remove(self, topic_filter: str, subscriber) -> None:
+        """Remove a subscriber from a topic filter."""
+        if "+" not in topic_filter and "#" not in topic_filter:
+            subscribers = self._exact.get(topic_filter)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._exact[topic_filter]
+            return
+        first = topic_filter.split("/", 1)[0]
+        key = None if first in ("+", "#") else first
+        group = self._wildcard.get(key, {})
+        subscribers = group.get(topic_filter)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del group[topic_filter]
+            if not group:
+                self._wildcard.pop(key, None)
+
+    def match(self, topic: str) -> set:
+        """Return the subscribers of all filters matching a topic."""
+        matched = set(self._exact.get(topic, ()))
+        for key in (topic.split("/", 1)[0], None):
+            for topic_filter, subscribers in self._wildcard.get(key, {}).items():
+                if topic_matches(topic_filter, topic):
+                    matched.update(subscribers)
+        return matched
+
+
+class PahoTransport:
+    """Connection to an external broker such as mosquitto (requires paho-mqtt).
+
+    Messages arrive on the paho network thread and are handed to the
+    subscribers on the event loop.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 1883,
+        username: str | None = None,
+        password: str | None = None,
+    ) -> None:
+        """Initialize the transport."""
+        try:
+            import paho.mqtt.client as mqtt  # noqa: PLC0415
+        except ImportError:
+            sys.exit("An external broker requires paho-mqtt: pip install paho-mqtt")
+        try:
+            self._client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        except AttributeError:  # paho-mqtt < 2.0
+            self._client = mqtt.Client()
+        if username:
+            self._client.username_pw_set(username, password)
+        self._client.max_queued_messages_set(0)
+        self._client.on_connect = self._on_connect
+        self._client.on_message = self._on_message
+        self._host = host
+        self._port = port
+        self._index = SubscriptionIndex()
+        self._filters: set[str] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.dropped = 0
+
+    async def start(self) -> None:
+        """Connect and start the network thread."""
+        self._loop = asyncio.get_running_loop()
+        await self._loop.run_in_executor(
+            None, self._client.connect, self._host, self._port
+        )
+        self._client.loop_start()
+
+    async def stop(self) -> None:
+        """Disconnect and stop the network thread."""
+        self._client.disconnect()
+        await asyncio.get_running_loop().run_in_executor(None, self._client.loop_stop)
+
+    def subscribe(self, topic_filter: str, callback: MessageCallback) -> None:
+        """Call callback for every message matching topic_filter."""
+        self._index.add(topic_filter, callback)
+        if topic_filter not in self._filters:
+            self._filters.add(topic_filter)
+            self._client.subscribe(topic_filter)
+
+    def publish(self, topic: str, payload: bytes | str, retain: bool = False) -> None:
+        """Publish a message with QoS 0."""
+        info = self._client.publish(topic, payload, retain=retain)
+        if info.rc:
+            self.dropped += 1
+
+    def _on_connect(self, client, userdata, *args) -> None:
+        """Subscribe again after a reconnect."""
+        for topic_filter in self._filters:
+            client.subscribe(topic_filter)
+
+    def _on_message(self, client, userdata, message) -> None:
+        """Hand a message from the network thread to the event loop."""
+        self._loop.call_soon_threadsafe(self._dispatch, message.topic, message.payload)
+
+    def _dispatch(self, topic: str, payload: bytes) -> None:
+        """Call the subscribers of a message."""
+        for callback in self._index.match(topic):
+            callback(topic, payload)